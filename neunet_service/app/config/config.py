@@ -1,6 +1,6 @@
 from pydantic import Field, field_validator
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import List, Literal
 import os
 
 class Settings(BaseSettings):
@@ -9,6 +9,35 @@ class Settings(BaseSettings):
     vandalism_repo_path: str = Field("MeLiRom/deberta-model-wiki-vandalism", alias = "VANDALISM_REPO_PATH")
     maxlen: int = Field(512,alias="MAXLEN")
     debug: bool = Field(True,alias = "DEBUG")
+    # Каскад: быстрый фильтр решает очевидные случаи, трансформер - остальные
+    enable_cascade: bool = Field(True, alias="ENABLE_CASCADE")
+    fast_filter_path: str = Field("fast_filter.joblib", alias="FAST_FILTER_PATH")
+    fast_benign_threshold: float = Field(0.05, alias="FAST_BENIGN_THRESHOLD")
+    fast_vandal_threshold: float = Field(0.95, alias="FAST_VANDAL_THRESHOLD")
+    # Уверенность вердикта "вандализм" быстрого уровня (правила и линейная модель); должна быть
+    # ниже VANDALISM_REVERT_THRESHOLD бэкенда (0.8), иначе правки откатываются без трансформера и модератора
+    fast_vandal_confidence: float = Field(0.75, alias="FAST_VANDAL_CONFIDENCE")
+    # Массовое удаление - удалена такая доля текста статьи
+    fast_blanking_ratio: float = Field(0.8, alias="FAST_BLANKING_RATIO")
+    # Инференс: Rust-токенизатор, окна для длинных правок, батчи по длине
+    use_fast_tokenizer: bool = Field(True, alias="USE_FAST_TOKENIZER")
+    window_stride: int = Field(128, alias="WINDOW_STRIDE")
+    max_windows: int = Field(16, alias="MAX_WINDOWS")
+    window_aggregation: Literal["max", "mean"] = Field("max", alias="WINDOW_AGGREGATION")
+    batch_size: int = Field(16, alias="BATCH_SIZE")
+    batch_max_tokens: int = Field(8192, alias="BATCH_MAX_TOKENS")
+    # Prefork-сервер (app/serve.py): модель грузится один раз, воркеры делят веса
+    serve_host: str = Field("0.0.0.0", alias="SERVE_HOST")
+    serve_port: int = Field(8010, alias="SERVE_PORT")
+    serve_workers: int = Field(2, alias="SERVE_WORKERS")
+    serve_threads_per_worker: int = Field(0, alias="SERVE_THREADS_PER_WORKER")  # 0 - ядра поровну
+    serve_pin_cpus: bool = Field(True, alias="SERVE_PIN_CPUS")
+    serve_memory_report_interval: float = Field(300.0, alias="SERVE_MEMORY_REPORT_INTERVAL")
+    # Эмбеддинги для гибридного поиска: та же модель e5, что встроена в Typesense (ts/multilingual-e5-base)
+    enable_embeddings: bool = Field(False, alias="ENABLE_EMBEDDINGS")
+    embedding_model_path: str = Field("intfloat/multilingual-e5-base", alias="EMBEDDING_MODEL_PATH")
+    embedding_maxlen: int = Field(512, alias="EMBEDDING_MAXLEN")
+    embedding_batch_size: int = Field(32, alias="EMBEDDING_BATCH_SIZE")
     
 
 
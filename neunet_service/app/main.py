@@ -3,6 +3,8 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from app.router.router import api_router
 from app.config.config import settings
+from app.models.vandalism_model import get_model_and_tokenizer, get_fast_filter
+from app.models.embedding_model import get_embedding_model
 
 app = FastAPI(
     title="Wiki API Neunets",
@@ -24,6 +26,15 @@ app.add_middleware(
 # API Router
 app.include_router(api_router, prefix="/models")
 router = APIRouter()
+
+@app.on_event("startup")
+async def startup_event():
+    # Загружаем модели заранее, а не на первом запросе
+    get_fast_filter()
+    await get_model_and_tokenizer()
+    if settings.enable_embeddings:
+        await get_embedding_model()
+
 @app.get("/health")
 async def health_check():
     return JSONResponse(content={"status": "healthy"})
\ No newline at end of file
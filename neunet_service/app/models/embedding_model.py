@@ -0,0 +1,58 @@
+from typing import List
+
+import torch
+from transformers import AutoModel, AutoTokenizer
+
+from app.config.config import settings
+from app.models.inference import length_buckets
+
+# e5 обучена с префиксами: без них качество поиска заметно падает
+E5_PREFIXES = {"query": "query: ", "passage": "passage: "}
+
+_embedding_cache = None
+
+
+async def load_embedding_model(model_path=settings.embedding_model_path):
+    device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+    tokenizer = AutoTokenizer.from_pretrained(model_path)
+    model = AutoModel.from_pretrained(model_path).to(device)
+    model.eval()
+    return device, tokenizer, model
+
+
+async def get_embedding_model():
+    """Модель эмбеддингов, загруженная при первом обращении"""
+    global _embedding_cache
+    if _embedding_cache is None:
+        _embedding_cache = await load_embedding_model()
+    return _embedding_cache
+
+
+def embed_texts(device, tokenizer, model, texts: List[str], kind: str) -> List[List[float]]:
+    """
+    Нормированные эмбеддинги (mean pooling по токенам, как у e5). Тексты идут
+    в модель батчами по длине, длинные обрезаются до embedding_maxlen токенов.
+    """
+    prefix = E5_PREFIXES[kind]
+    encoded = tokenizer([prefix + text for text in texts], truncation=True, max_length=settings.embedding_maxlen)
+    input_ids = encoded["input_ids"]
+    embeddings: List[List[float]] = [[] for _ in texts]
+
+    with torch.inference_mode():
+        for batch in length_buckets(
+            [len(ids) for ids in input_ids],
+            settings.embedding_batch_size,
+            settings.batch_max_tokens,
+        ):
+            padded = tokenizer.pad(
+                {"input_ids": [input_ids[i] for i in batch]},
+                padding=True,
+                return_tensors="pt",
+            ).to(device)
+            hidden = model(**padded).last_hidden_state
+            mask = padded["attention_mask"].unsqueeze(-1).to(hidden.dtype)
+            pooled = (hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1e-9)
+            normalized = torch.nn.functional.normalize(pooled, p=2, dim=1).tolist()
+            for index, vector in zip(batch, normalized):
+                embeddings[index] = vector
+    return embeddings
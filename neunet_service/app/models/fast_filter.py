@@ -0,0 +1,210 @@
+import math
+import os
+import re
+from collections import Counter
+from dataclasses import dataclass
+from typing import List, Optional
+
+import joblib
+import numpy as np
+from scipy.sparse import csr_matrix, hstack
+from sklearn.feature_extraction.text import HashingVectorizer
+
+from app.config.config import settings
+
+# Нецензурные слова. Английские ищутся целым словом (с типичными окончаниями),
+# чтобы не ловить "Dickens" или "Scunthorpe"; русские корни - от начала слова
+PROFANITY_WORDS = (
+    r"(?:mother)?fuck\w*", r"shit(?:s|ty|ting)?", r"bitch(?:es|y)?", r"cunts?", r"dicks?", r"assholes?",
+    r"fag(?:s|gots?)?", r"nigg(?:a|as|er|ers)", r"whores?", r"sluts?",
+)
+PROFANITY_STEMS = (
+    "хуй", "хуе", "хуя", "пизд", "бля", "ебан", "ебат", "ёб", "сука", "муда", "пидор", "гандон", "залуп",
+)
+PROFANITY_RE = re.compile(
+    r"\b(?:" + "|".join(PROFANITY_WORDS) + r")\b|\b(?:" + "|".join(PROFANITY_STEMS) + r")\w*",
+    re.IGNORECASE | re.UNICODE,
+)
+WORD_RE = re.compile(r"\w+", re.UNICODE)
+REPEAT_RE = re.compile(r"(.)\1+", re.DOTALL)
+# Серии букв и цифр: "ааааааа", "1111111", но не разделители вроде "-----" или "====="
+ALNUM_REPEAT_RE = re.compile(r"([^\W_])\1+", re.UNICODE)
+
+
+def char_entropy(text: str) -> float:
+    """Энтропия Шеннона по символам (бит на символ)"""
+    if not text:
+        return 0.0
+    counts = Counter(text)
+    total = len(text)
+    return -sum((c / total) * math.log2(c / total) for c in counts.values())
+
+
+def max_repeat_run(text: str, alnum_only: bool = False) -> int:
+    """Длина самой длинной серии одинаковых символов (alnum_only - только буквы и цифры)"""
+    longest = 1 if text else 0
+    for match in (ALNUM_REPEAT_RE if alnum_only else REPEAT_RE).finditer(text):
+        longest = max(longest, len(match.group(0)))
+    return longest
+
+
+def profanity_count(text: str) -> int:
+    return sum(1 for _ in PROFANITY_RE.finditer(text))
+
+
+def extract_features(added_text: str, removed_text: str) -> np.ndarray:
+    """Дешёвые признаки правки: размеры, доля удалённого, энтропия, капс, повторы, мат"""
+    added_len = len(added_text)
+    removed_len = len(removed_text)
+    letters = [ch for ch in added_text if ch.isalpha()]
+    upper_ratio = sum(1 for ch in letters if ch.isupper()) / len(letters) if letters else 0.0
+    words = max(len(WORD_RE.findall(added_text)), 1)
+    profanity = profanity_count(added_text)
+    non_alnum = sum(1 for ch in added_text if not ch.isalnum() and not ch.isspace())
+    return np.array([
+        math.log1p(added_len),
+        math.log1p(removed_len),
+        math.log1p(added_len / (removed_len + 1)),
+        removed_len / (added_len + removed_len + 1),
+        char_entropy(added_text),
+        upper_ratio,
+        math.log1p(max_repeat_run(added_text)),
+        profanity,
+        profanity / words,
+        non_alnum / (added_len + 1),
+    ], dtype=np.float64)
+
+
+@dataclass
+class FastPrediction:
+    # None - быстрый уровень не уверен, решение за трансформером
+    predicted_class: Optional[int]
+    confidence: float
+    vandalism_probability: float
+    reason: str
+
+    @property
+    def decided(self) -> bool:
+        return self.predicted_class is not None
+
+
+class FastVandalismFilter:
+    """
+    Быстрый уровень каскада: правила для очевидных случаев и линейная модель
+    (хэшированные символьные n-граммы + признаки). Трансформер запускается,
+    только если вероятность вандализма попала между порогами.
+    """
+
+    def __init__(
+        self,
+        classifier=None,
+        benign_threshold: float = 0.05,
+        vandal_threshold: float = 0.95,
+        vandal_confidence: float = 0.75,
+        blanking_ratio: float = 0.8,
+    ):
+        self.classifier = classifier
+        self.benign_threshold = benign_threshold
+        self.vandal_threshold = vandal_threshold
+        self.vandal_confidence = vandal_confidence
+        self.blanking_ratio = blanking_ratio
+        self.vectorizer = build_vectorizer()
+
+    def transform(self, added_texts: List[str], removed_texts: List[str]):
+        hashed = self.vectorizer.transform(added_texts)
+        dense = np.vstack([extract_features(a, r) for a, r in zip(added_texts, removed_texts)])
+        return hstack([hashed, csr_matrix(dense)]).tocsr()
+
+    def predict(
+        self,
+        added_text: str,
+        removed_text: str,
+        article_length: Optional[int] = None,
+        trusted_author: bool = False,
+    ) -> FastPrediction:
+        rule = self._apply_rules(added_text, removed_text, article_length, trusted_author)
+        if rule is not None:
+            return rule
+
+        if self.classifier is None:
+            return FastPrediction(None, 0.0, 0.5, "no_fast_model")
+
+        probability = float(self.classifier.predict_proba(self.transform([added_text], [removed_text]))[0][1])
+        if probability <= self.benign_threshold:
+            return FastPrediction(0, 1 - probability, probability, "linear_model")
+        if probability >= self.vandal_threshold:
+            # Уверенность ограничена, как и у правил: без трансформера правка не откатывается
+            return FastPrediction(1, self.vandal_confidence, probability, "linear_model")
+        return FastPrediction(None, 0.0, probability, "uncertain")
+
+    def _apply_rules(
+        self,
+        added_text: str,
+        removed_text: str,
+        article_length: Optional[int] = None,
+        trusted_author: bool = False,
+    ) -> Optional[FastPrediction]:
+        """
+        Правила для очевидного вандализма. Быстрый уровень не должен откатывать правки сам:
+        уверенность vandal_confidence ниже порога автоотката бэкенда (VANDALISM_REVERT_THRESHOLD),
+        поэтому такие правки уходят на модерацию.
+        """
+        added_len = len(added_text.strip())
+        removed_len = len(removed_text.strip())
+
+        # Массовое удаление: удалена большая часть статьи, взамен почти ничего
+        if (
+            article_length
+            and removed_len >= 200
+            and removed_len >= self.blanking_ratio * article_length
+            and added_len <= 0.05 * removed_len
+        ):
+            return self._vandal_rule("mass_blanking")
+
+        if added_len >= 30 and max_repeat_run(added_text, alnum_only=True) >= 30:
+            return self._vandal_rule("repeated_characters")
+
+        profanity = profanity_count(added_text)
+        if profanity >= 3:
+            return self._vandal_rule("profanity_burst")
+
+        letters = [ch for ch in added_text if ch.isalpha()]
+        if len(letters) >= 30 and sum(1 for ch in letters if ch.isupper()) / len(letters) >= 0.8:
+            return self._vandal_rule("uppercase")
+
+        # Мелкая правка без мата от автора с репутацией - исправление опечатки. У новых авторов
+        # короткая правка (ссылка, число, дата) проверяется моделью
+        if trusted_author and added_len + removed_len <= 20 and profanity == 0:
+            return FastPrediction(0, 0.95, 0.05, "small_edit")
+
+        return None
+
+    def _vandal_rule(self, reason: str) -> FastPrediction:
+        return FastPrediction(1, self.vandal_confidence, self.vandal_confidence, reason)
+
+
+def build_vectorizer() -> HashingVectorizer:
+    return HashingVectorizer(
+        analyzer="char_wb",
+        ngram_range=(2, 4),
+        n_features=2 ** 20,
+        alternate_sign=False,
+        lowercase=True,
+    )
+
+
+def load_fast_filter(path: str = settings.fast_filter_path) -> FastVandalismFilter:
+    """Загрузка обученной линейной модели; без неё работают только правила"""
+    classifier = None
+    if path and os.path.exists(path):
+        classifier = joblib.load(path)
+        print(f"Быстрый фильтр загружен: {path}")
+    else:
+        print(f"Модель быстрого фильтра не найдена ({path}), используются только правила")
+    return FastVandalismFilter(
+        classifier,
+        benign_threshold=settings.fast_benign_threshold,
+        vandal_threshold=settings.fast_vandal_threshold,
+        vandal_confidence=settings.fast_vandal_confidence,
+        blanking_ratio=settings.fast_blanking_ratio,
+    )
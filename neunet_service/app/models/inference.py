@@ -0,0 +1,165 @@
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+
+import torch
+
+from app.config.config import settings
+
+
+@dataclass
+class TransformerScore:
+    predicted_class: int
+    confidence: float
+    vandalism_probability: float
+    windows: int
+
+
+ADDED_MARKER = "[TEXT ADDED]:"
+REMOVED_MARKER = "[TEXT REMOVED]:"
+
+
+def build_input_text(added_text: str, removed_text: str) -> str:
+    return ADDED_MARKER + added_text + REMOVED_MARKER + removed_text
+
+
+def _select_windows(windows: List[List[int]], max_windows: int) -> List[List[int]]:
+    """Равномерная выборка окон с сохранением первого и последнего"""
+    if max_windows <= 0 or len(windows) <= max_windows:
+        return windows
+    if max_windows == 1:
+        return windows[:1]
+    step = (len(windows) - 1) / (max_windows - 1)
+    return [windows[round(i * step)] for i in range(max_windows)]
+
+
+def _split_budget(added_len: int, removed_len: int, budget: int) -> Tuple[int, int]:
+    """
+    Делит токены окна между добавленным и удалённым текстом: короткая сторона
+    берётся целиком, если влезает в половину, остаток отдаётся длинной
+    """
+    half = budget // 2
+    if removed_len <= half:
+        return budget - removed_len, removed_len
+    if added_len <= half:
+        return added_len, budget - added_len
+    return budget - half, half
+
+
+def _chunks(ids: List[int], size: int, stride: int) -> List[List[int]]:
+    """Перекрывающиеся куски по size токенов; соседние делят stride токенов"""
+    if len(ids) <= size:
+        return [ids]
+    step = max(size - stride, 1)
+    starts = list(range(0, len(ids) - size, step)) + [len(ids) - size]
+    return [ids[start:start + size] for start in starts]
+
+
+def encode_windows(tokenizer, edits: List[Tuple[str, str]]) -> List[Tuple[int, List[int]]]:
+    """
+    Токенизация правок (added_text, removed_text) с разбиением длинных на окна по maxlen токенов.
+    Добавленный и удалённый текст режутся на окна отдельно, и каждое окно собирается как
+    "[TEXT ADDED]:<кусок добавленного>[TEXT REMOVED]:<кусок удалённого>" - модель всегда видит,
+    какая часть текста добавлена, а какая удалена. Возвращает пары (индекс правки, input_ids окна).
+    """
+    added_marker, removed_marker = tokenizer(
+        [ADDED_MARKER, REMOVED_MARKER], add_special_tokens=False
+    )["input_ids"]
+    added_ids = tokenizer([added for added, _ in edits], add_special_tokens=False)["input_ids"]
+    removed_ids = tokenizer([removed for _, removed in edits], add_special_tokens=False)["input_ids"]
+    budget = (
+        settings.maxlen
+        - tokenizer.num_special_tokens_to_add(pair=False)
+        - len(added_marker)
+        - len(removed_marker)
+    )
+    stride = min(settings.window_stride, budget // 4)
+
+    windows = []
+    for edit_index, (added, removed) in enumerate(zip(added_ids, removed_ids)):
+        if len(added) + len(removed) <= budget:
+            added_chunks, removed_chunks = [added], [removed]
+        else:
+            added_budget, removed_budget = _split_budget(len(added), len(removed), budget)
+            added_chunks = _chunks(added, added_budget, stride)
+            removed_chunks = _chunks(removed, removed_budget, stride)
+
+        # Окон столько, сколько кусков у длинной стороны; куски короткой распределяются пропорционально
+        count = max(len(added_chunks), len(removed_chunks))
+        edit_windows = []
+        for i in range(count):
+            added_chunk = added_chunks[i * len(added_chunks) // count]
+            removed_chunk = removed_chunks[i * len(removed_chunks) // count]
+            edit_windows.append(tokenizer.build_inputs_with_special_tokens(
+                added_marker + added_chunk + removed_marker + removed_chunk
+            ))
+        for input_ids in _select_windows(edit_windows, settings.max_windows):
+            windows.append((edit_index, input_ids))
+    return windows
+
+
+def length_buckets(lengths: List[int], batch_size: int, max_tokens: int) -> List[List[int]]:
+    """
+    Группирует индексы по длине: внутри батча длины близки, поэтому паддинга мало.
+    Батч ограничен и числом окон, и суммой токенов с учётом паддинга до самого длинного.
+    """
+    order = sorted(range(len(lengths)), key=lambda i: lengths[i])
+    batches = []
+    current: List[int] = []
+    for index in order:
+        # Окна отсортированы по возрастанию, поэтому текущее - самое длинное в батче
+        padded_tokens = lengths[index] * (len(current) + 1)
+        if current and (len(current) >= batch_size or padded_tokens > max_tokens):
+            batches.append(current)
+            current = []
+        current.append(index)
+    if current:
+        batches.append(current)
+    return batches
+
+
+def aggregate(probabilities: List[float], method: str) -> float:
+    if method == "mean":
+        return sum(probabilities) / len(probabilities)
+    return max(probabilities)
+
+
+def score_edits(device, tokenizer, model, edits: List[Tuple[str, str]]) -> List[TransformerScore]:
+    """
+    Оценка пачки правок (added_text, removed_text): все окна всех правок идут в модель
+    батчами по длине, вероятности вандализма окон агрегируются по правке (max или mean).
+    """
+    windows = encode_windows(tokenizer, edits)
+    probabilities = [0.0] * len(windows)
+
+    with torch.inference_mode():
+        for batch in length_buckets(
+            [len(input_ids) for _, input_ids in windows],
+            settings.batch_size,
+            settings.batch_max_tokens,
+        ):
+            padded = tokenizer.pad(
+                {"input_ids": [windows[i][1] for i in batch]},
+                padding=True,
+                return_tensors="pt",
+            ).to(device)
+            logits = model(**padded).logits
+            vandal_probabilities = torch.nn.functional.softmax(logits, dim=-1)[:, 1].tolist()
+            for window_index, probability in zip(batch, vandal_probabilities):
+                probabilities[window_index] = probability
+
+    per_edit: Dict[int, List[float]] = {}
+    for (edit_index, _), probability in zip(windows, probabilities):
+        per_edit.setdefault(edit_index, []).append(probability)
+
+    scores = []
+    for edit_index in range(len(edits)):
+        text_probabilities = per_edit.get(edit_index, [0.0])
+        probability = aggregate(text_probabilities, settings.window_aggregation)
+        predicted_class = int(probability >= 0.5)
+        scores.append(TransformerScore(
+            predicted_class=predicted_class,
+            confidence=probability if predicted_class == 1 else 1 - probability,
+            vandalism_probability=probability,
+            windows=len(text_probabilities),
+        ))
+    return scores
@@ -1,17 +1,39 @@
-from transformers import  DebertaV2Tokenizer, DebertaV2ForSequenceClassification
+from transformers import  DebertaV2Tokenizer, DebertaV2TokenizerFast, DebertaV2ForSequenceClassification
 import torch
 from app.config.config import settings
+from app.models.fast_filter import FastVandalismFilter, load_fast_filter
+
+# Модели загружаются один раз на процесс
+_model_cache = None
+_fast_filter = None
+
 async def load_model_and_tokenizer(model_path=settings.vandalism_model_path, repo_path= settings.vandalism_repo_path):
     """Загрузка модели и токенизатора"""
     device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
     print(f"Используется устройство: {device}")
     
     # Загружаем токенизатор и модель
-    tokenizer = DebertaV2Tokenizer.from_pretrained("microsoft/deberta-v3-base")
+    tokenizer_class = DebertaV2TokenizerFast if settings.use_fast_tokenizer else DebertaV2Tokenizer
+    tokenizer = tokenizer_class.from_pretrained("microsoft/deberta-v3-base")
 
     model = DebertaV2ForSequenceClassification.from_pretrained(repo_path).to(device)
 
     
     model.resize_token_embeddings(len(tokenizer))
+    model.eval()
     
-    return device, tokenizer, model
\ No newline at end of file
+    return device, tokenizer, model
+
+async def get_model_and_tokenizer():
+    """Модель трансформера, загруженная при первом обращении"""
+    global _model_cache
+    if _model_cache is None:
+        _model_cache = await load_model_and_tokenizer()
+    return _model_cache
+
+def get_fast_filter() -> FastVandalismFilter:
+    """Быстрый уровень каскада"""
+    global _fast_filter
+    if _fast_filter is None:
+        _fast_filter = load_fast_filter()
+    return _fast_filter
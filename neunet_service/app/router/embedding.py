@@ -0,0 +1,23 @@
+import asyncio
+
+from fastapi import APIRouter, HTTPException, status
+from app.schemas.embedding import EmbeddingData, EmbeddingResponse
+from app.models.embedding_model import get_embedding_model, embed_texts
+from app.config.config import settings
+router = APIRouter()
+
+
+@router.post("/", response_model=EmbeddingResponse)
+async def create_embeddings(
+    data: EmbeddingData,
+):
+    if not settings.enable_embeddings:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Embeddings are disabled")
+    device, tokenizer, model = await get_embedding_model()
+    # Инференс вне цикла событий: /health и соседние запросы не ждут пачку документов
+    embeddings = await asyncio.to_thread(embed_texts, device, tokenizer, model, data.texts, data.kind)
+    return EmbeddingResponse(
+        model=settings.embedding_model_path,
+        dimensions=len(embeddings[0]),
+        embeddings=embeddings,
+    )
@@ -1,9 +1,11 @@
 from fastapi import APIRouter
 from app.router import (
+    embedding,
     vandalism
 )
 
 api_router = APIRouter()
 
 # Include all routers
-api_router.include_router(vandalism.router, prefix="/vandalism", tags=["vandalism"])
\ No newline at end of file
+api_router.include_router(vandalism.router, prefix="/vandalism", tags=["vandalism"])
+api_router.include_router(embedding.router, prefix="/embeddings", tags=["embeddings"])
\ No newline at end of file
@@ -1,29 +1,76 @@
+import asyncio
+from typing import List, Optional
 from fastapi import APIRouter, HTTPException, Depends, status, Query
-from app.schemas.vandalism import VandalismData, VandalismResponse
-from app.models.vandalism_model import load_model_and_tokenizer
+from app.schemas.vandalism import VandalismData, VandalismResponse, VandalismBatchData, VandalismBatchResponse
+from app.models.vandalism_model import get_model_and_tokenizer, get_fast_filter
+from app.models.inference import score_edits
 from app.config.config import settings
-import torch
 router = APIRouter()
 
+TRANSFORMER_MODEL_NAME = "Roberta Vandalism Model V1"
+# Прогоны трансформера по одному на воркер: каждый и так занимает все его потоки (SERVE_THREADS_PER_WORKER)
+_transformer_lock = asyncio.Lock()
+
+
+async def score_commits(items: List[VandalismData]) -> List[VandalismResponse]:
+    """Каскад для пачки правок: быстрый фильтр, затем один батчевый прогон трансформера"""
+    results: List[Optional[VandalismResponse]] = [None] * len(items)
+    pending = []
+
+    # Быстрый уровень каскада: очевидные правки не доходят до трансформера
+    for index, item in enumerate(items):
+        fast_only = item.max_tier == "fast"
+        if settings.enable_cascade or fast_only:
+            fast_prediction = get_fast_filter().predict(
+                item.added_text, item.removed_text, item.article_length, item.trusted_author
+            )
+            if fast_prediction.decided:
+                results[index] = VandalismResponse(
+                    model_data=f"Fast filter ({fast_prediction.reason})",
+                    predicted_class=fast_prediction.predicted_class,
+                    confidence=fast_prediction.confidence,
+                    decided_by="fast"
+                )
+                continue
+            if fast_only:
+                # Неуверенный быстрый уровень без права на трансформер - правка считается нормальной
+                results[index] = VandalismResponse(
+                    model_data=f"Fast filter ({fast_prediction.reason})",
+                    predicted_class=0,
+                    confidence=1 - fast_prediction.vandalism_probability,
+                    decided_by="fast"
+                )
+                continue
+        pending.append(index)
+
+    if pending:
+        device, tokenizer, model = await get_model_and_tokenizer()
+        edits = [(items[i].added_text, items[i].removed_text) for i in pending]
+        # Инференс вне цикла событий: /health и быстрый уровень других запросов не ждут пачку окон
+        async with _transformer_lock:
+            scores = await asyncio.to_thread(score_edits, device, tokenizer, model, edits)
+        for index, score in zip(pending, scores):
+            results[index] = VandalismResponse(
+                model_data=TRANSFORMER_MODEL_NAME,
+                predicted_class=score.predicted_class,
+                confidence=score.confidence,
+                decided_by="transformer",
+                windows=score.windows
+            )
+    return results
+
+
 @router.post("/", response_model=VandalismResponse)
 async def check_vandalism(
     commit_data: VandalismData,
 
 ):
-    device, tokenizer, model = await load_model_and_tokenizer()
-    concat_string = "[TEXT ADDED]:" + commit_data.added_text + "[TEXT REMOVED]:" + commit_data.removed_text
-    inputs = tokenizer(concat_string, return_tensors="pt", truncation=True, padding=True, max_length=settings.maxlen)
-    inputs.to(device)
-        
-        # Предсказание
-    with torch.no_grad():
-        outputs = model(**inputs)
-        predictions = torch.nn.functional.softmax(outputs.logits, dim=-1)
-        predicted_class = torch.argmax(predictions, dim=-1).item()
-        confidence = predictions[0][predicted_class].item()
-    return VandalismResponse (
-        model_data = "Roberta Vandalism Model V1",
-        predicted_class=predicted_class,
-        confidence= confidence
-)
-    
\ No newline at end of file
+    results = await score_commits([commit_data])
+    return results[0]
+
+
+@router.post("/batch", response_model=VandalismBatchResponse)
+async def check_vandalism_batch(
+    batch: VandalismBatchData,
+):
+    return VandalismBatchResponse(results=await score_commits(batch.items))
@@ -0,0 +1,12 @@
+from pydantic import BaseModel, Field
+from typing import List, Literal
+
+class EmbeddingData(BaseModel):
+    texts: List[str] = Field(..., min_length=1, max_length=256)
+    # query - поисковый запрос, passage - индексируемый документ (разные префиксы e5)
+    kind: Literal["query", "passage"] = "passage"
+
+class EmbeddingResponse(BaseModel):
+    model: str
+    dimensions: int
+    embeddings: List[List[float]]
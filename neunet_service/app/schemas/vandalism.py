@@ -4,8 +4,24 @@ from typing import Literal, Optional, List, Dict, Any, Union
 class VandalismData(BaseModel):
     added_text:str
     removed_text:str
+    # "fast" - только быстрый фильтр (для доверенных авторов), трансформер не запускается
+    max_tier: Literal["fast", "transformer"] = "transformer"
+    # Длина статьи до правки (символы); нужна правилу массового удаления
+    article_length: Optional[int] = Field(None, ge=0)
+    # Автор с устоявшейся репутацией: только его мелкие правки быстрый уровень пропускает без модели
+    trusted_author: bool = False
 
 class VandalismResponse(BaseModel):
     model_data:str
     predicted_class:Union[Literal[0], Literal[1]]
     confidence: float
+    # Какой уровень каскада принял решение
+    decided_by: Literal["fast", "transformer"] = "transformer"
+    # Число окон, на которые разбита длинная правка
+    windows: Optional[int] = None
+
+class VandalismBatchData(BaseModel):
+    items: List[VandalismData] = Field(..., min_length=1, max_length=256)
+
+class VandalismBatchResponse(BaseModel):
+    results: List[VandalismResponse]
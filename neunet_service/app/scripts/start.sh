@@ -1,2 +1,5 @@
 #!/bin/bash
-exec uvicorn app.main:app --host 0.0.0.0 --port 8010
\ No newline at end of file
+if [ "${SERVE_MODE:-uvicorn}" = "prefork" ]; then
+    exec python -m app.serve
+fi
+exec uvicorn app.main:app --host 0.0.0.0 --port 8010
@@ -0,0 +1,87 @@
+"""
+Обучение линейной модели быстрого фильтра.
+
+    python -m app.scripts.train_fast_filter edits.jsonl --output fast_filter.joblib
+
+Входной файл - JSONL с полями added_text, removed_text, label (1 - вандализм)
+и необязательным article_length (длина статьи до правки, для правила массового удаления).
+С --label-with-transformer метки берутся из DeBERTa (дистилляция), поле label не нужно.
+"""
+import argparse
+import asyncio
+import json
+
+import joblib
+import numpy as np
+from sklearn.linear_model import SGDClassifier
+from sklearn.model_selection import train_test_split
+
+from app.config.config import settings
+from app.models.fast_filter import FastVandalismFilter
+
+
+def read_pairs(path: str):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+async def transformer_labels(pairs):
+    import torch
+    from app.models.vandalism_model import get_model_and_tokenizer
+
+    device, tokenizer, model = await get_model_and_tokenizer()
+    labels = []
+    for pair in pairs:
+        text = "[TEXT ADDED]:" + pair["added_text"] + "[TEXT REMOVED]:" + pair["removed_text"]
+        inputs = tokenizer(text, return_tensors="pt", truncation=True, max_length=settings.maxlen).to(device)
+        with torch.no_grad():
+            labels.append(int(model(**inputs).logits.argmax(dim=-1).item()))
+    return labels
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("dataset")
+    parser.add_argument("--output", default=settings.fast_filter_path)
+    parser.add_argument("--label-with-transformer", action="store_true")
+    parser.add_argument("--test-size", type=float, default=0.2)
+    args = parser.parse_args()
+
+    pairs = read_pairs(args.dataset)
+    labels = asyncio.run(transformer_labels(pairs)) if args.label_with_transformer else [p["label"] for p in pairs]
+
+    train, test, y_train, y_test = train_test_split(
+        pairs, np.array(labels), test_size=args.test_size, random_state=42, stratify=labels
+    )
+    fast_filter = FastVandalismFilter(
+        benign_threshold=settings.fast_benign_threshold,
+        vandal_threshold=settings.fast_vandal_threshold,
+        vandal_confidence=settings.fast_vandal_confidence,
+        blanking_ratio=settings.fast_blanking_ratio,
+    )
+    classifier = SGDClassifier(loss="log_loss", alpha=1e-5, class_weight="balanced", max_iter=200, random_state=42)
+    classifier.fit(
+        fast_filter.transform([p["added_text"] for p in train], [p["removed_text"] for p in train]),
+        y_train,
+    )
+    fast_filter.classifier = classifier
+
+    # Доля отложенной выборки, решённой быстрым уровнем, и точность этих решений
+    decided = correct = 0
+    for pair, label in zip(test, y_test):
+        prediction = fast_filter.predict(
+            pair["added_text"], pair["removed_text"], pair.get("article_length"), pair.get("trusted_author", False)
+        )
+        if prediction.decided:
+            decided += 1
+            correct += int(prediction.predicted_class == label)
+    print(f"Решено быстрым уровнем: {decided}/{len(test)} ({decided / max(len(test), 1):.1%})")
+    if decided:
+        print(f"Точность решений быстрого уровня: {correct / decided:.2%}")
+
+    joblib.dump(classifier, args.output)
+    print(f"Модель сохранена: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
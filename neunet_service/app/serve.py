@@ -0,0 +1,188 @@
+"""
+Prefork-сервер: модель загружается один раз в родительском процессе, затем
+процесс форкается на SERVE_WORKERS воркеров uvicorn на общем сокете.
+
+    python -m app.serve
+
+Веса модели после fork разделяются между воркерами copy-on-write: тензоры только
+читаются, поэтому страницы не копируются. gc.freeze() переносит объекты родителя
+в постоянное поколение, и сборщик мусора в воркерах не трогает их заголовки.
+В родителе не выполняется ни одного инференса: пул потоков OpenMP, созданный
+до fork, в дочернем процессе зависает.
+
+Только CPU: CUDA-контекст не переживает fork.
+"""
+import asyncio
+import gc
+import logging
+import os
+import signal
+import socket
+import sys
+import time
+from typing import Dict, List
+
+import psutil
+
+from app.config.config import settings
+
+logger = logging.getLogger("app.serve")
+
+
+def process_memory(pid: int) -> Dict:
+    """RSS, PSS и USS процесса в МБ. PSS честно делит общие страницы весов между воркерами"""
+    process = psutil.Process(pid)
+    full = process.memory_full_info()
+    return {
+        "rss_mb": round(full.rss / 2 ** 20, 1),
+        "pss_mb": round(getattr(full, "pss", 0) / 2 ** 20, 1),
+        "uss_mb": round(full.uss / 2 ** 20, 1),
+    }
+
+
+def worker_cpus(index: int, threads: int) -> List[int]:
+    """Ядра воркера: непересекающиеся отрезки по threads ядер (по кругу, если ядер меньше)"""
+    available = sorted(os.sched_getaffinity(0))
+    start = index * threads
+    return [available[(start + offset) % len(available)] for offset in range(threads)]
+
+
+class PreforkServer:
+    def __init__(self, workers: int, threads_per_worker: int, host: str, port: int):
+        self.workers = workers
+        self.threads_per_worker = threads_per_worker or max((os.cpu_count() or 1) // workers, 1)
+        self.host = host
+        self.port = port
+        self.sock = None
+        self.children: Dict[int, int] = {}  # pid -> индекс воркера
+        self.shutting_down = False
+
+    def preload(self):
+        """Загрузка моделей в родителе, до fork"""
+        # До импорта torch: CUDA не инициализируется, модель грузится на CPU
+        os.environ["CUDA_VISIBLE_DEVICES"] = ""
+        import torch
+        from app.models.vandalism_model import get_fast_filter, get_model_and_tokenizer
+
+        # Один поток в родителе: пул OpenMP не создаётся до fork
+        torch.set_num_threads(1)
+
+        get_fast_filter()
+        _, _, model = asyncio.run(get_model_and_tokenizer())
+        for parameter in model.parameters():
+            parameter.requires_grad_(False)
+        if settings.enable_embeddings:
+            from app.models.embedding_model import get_embedding_model
+            _, _, embedding_model = asyncio.run(get_embedding_model())
+            for parameter in embedding_model.parameters():
+                parameter.requires_grad_(False)
+
+        # Импорт приложения до fork, чтобы его модули тоже были общими
+        import app.main  # noqa: F401
+
+    def bind(self):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.bind((self.host, self.port))
+        self.sock.listen(2048)
+        self.sock.set_inheritable(True)
+
+    def spawn(self, index: int):
+        pid = os.fork()
+        if pid:
+            self.children[pid] = index
+            return
+        try:
+            self.run_worker(index)
+        finally:
+            os._exit(0)
+
+    def run_worker(self, index: int):
+        import torch
+        import uvicorn
+        from app.main import app
+
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        gc.enable()
+
+        torch.set_num_threads(self.threads_per_worker)
+        if settings.serve_pin_cpus and hasattr(os, "sched_setaffinity"):
+            cpus = worker_cpus(index, self.threads_per_worker)
+            os.sched_setaffinity(0, cpus)
+            logger.info(f"Воркер {index} (pid {os.getpid()}): потоков {self.threads_per_worker}, ядра {cpus}")
+
+        config = uvicorn.Config(app, lifespan="on", log_level="info", timeout_keep_alive=30)
+        uvicorn.Server(config).run(sockets=[self.sock])
+
+    def report_memory(self):
+        rows = []
+        for pid, index in sorted(self.children.items(), key=lambda item: item[1]):
+            try:
+                rows.append({"worker": index, "pid": pid, **process_memory(pid)})
+            except psutil.Error:
+                continue
+        parent = process_memory(os.getpid())
+        total_pss = parent["pss_mb"] + sum(row["pss_mb"] for row in rows)
+        for row in rows:
+            logger.info(f"Воркер {row['worker']} (pid {row['pid']}): RSS {row['rss_mb']} МБ, "
+                        f"PSS {row['pss_mb']} МБ, USS {row['uss_mb']} МБ")
+        logger.info(f"Родитель: RSS {parent['rss_mb']} МБ; суммарный PSS {round(total_pss, 1)} МБ")
+
+    def stop(self, signum, frame):
+        self.shutting_down = True
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def run(self):
+        # Сборщик мусора выключен до fork, чтобы не перекладывать объекты между поколениями
+        gc.disable()
+        self.preload()
+        self.bind()
+        gc.freeze()
+
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        for index in range(self.workers):
+            self.spawn(index)
+        logger.info(f"Prefork: {self.workers} воркеров на {self.host}:{self.port}")
+
+        next_report = time.monotonic() + 10
+        while self.children:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid:
+                index = self.children.pop(pid, None)
+                if index is not None and not self.shutting_down:
+                    logger.warning(f"Воркер {index} (pid {pid}) завершился со статусом {status}, перезапуск")
+                    self.spawn(index)
+                continue
+
+            interval = settings.serve_memory_report_interval
+            if interval > 0 and time.monotonic() >= next_report:
+                self.report_memory()
+                next_report = time.monotonic() + interval
+            time.sleep(0.5)
+
+        self.sock.close()
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+    server = PreforkServer(
+        workers=settings.serve_workers,
+        threads_per_worker=settings.serve_threads_per_worker,
+        host=settings.serve_host,
+        port=settings.serve_port,
+    )
+    server.run()
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Доля трафика, которую быстрый фильтр снимает с трансформера.
+
+    python -m benchmarks.cascade_offload --count 5000
+    python -m benchmarks.cascade_offload --dataset edits.jsonl --with-transformer --output report.json
+
+С --with-transformer неуверенные правки прогоняются через DeBERTa, и отчёт
+показывает среднюю задержку каскада против "всё через трансформер".
+"""
+import argparse
+import asyncio
+import json
+import time
+from collections import Counter
+
+from benchmarks.data import read_pairs, synthetic_pairs
+from app.models.fast_filter import load_fast_filter
+
+
+async def transformer_latency_ms(pairs) -> float:
+    import torch
+    from app.config.config import settings
+    from app.models.vandalism_model import get_model_and_tokenizer
+
+    device, tokenizer, model = await get_model_and_tokenizer()
+    started = time.perf_counter()
+    for pair in pairs:
+        text = "[TEXT ADDED]:" + pair["added_text"] + "[TEXT REMOVED]:" + pair["removed_text"]
+        inputs = tokenizer(text, return_tensors="pt", truncation=True, max_length=settings.maxlen).to(device)
+        with torch.no_grad():
+            model(**inputs)
+    return (time.perf_counter() - started) * 1000 / max(len(pairs), 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dataset", help="JSONL с added_text, removed_text, label; без него - синтетика")
+    parser.add_argument("--count", type=int, default=2000)
+    parser.add_argument("--distribution", default="realistic")
+    parser.add_argument("--vandal-share", type=float, default=0.1)
+    parser.add_argument("--with-transformer", action="store_true")
+    parser.add_argument("--sample", type=int, default=200, help="Сколько правок прогнать через трансформер")
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    pairs = read_pairs(args.dataset) if args.dataset else list(
+        synthetic_pairs(args.count, args.distribution, args.vandal_share)
+    )
+    fast_filter = load_fast_filter()
+
+    reasons = Counter()
+    decided = correct = 0
+    started = time.perf_counter()
+    for pair in pairs:
+        prediction = fast_filter.predict(pair["added_text"], pair["removed_text"])
+        reasons[prediction.reason] += 1
+        if prediction.decided:
+            decided += 1
+            if "label" in pair and prediction.predicted_class == pair["label"]:
+                correct += 1
+    fast_ms = (time.perf_counter() - started) * 1000 / max(len(pairs), 1)
+
+    labeled = all("label" in pair for pair in pairs)
+    report = {
+        "edits": len(pairs),
+        "offloaded_share": round(decided / max(len(pairs), 1), 4),
+        "fast_tier_accuracy": round(correct / decided, 4) if decided and labeled else None,
+        "fast_tier_ms_per_edit": round(fast_ms, 4),
+        "decisions": dict(reasons),
+    }
+
+    if args.with_transformer:
+        sample = pairs[:args.sample]
+        transformer_ms = asyncio.run(transformer_latency_ms(sample))
+        offloaded = report["offloaded_share"]
+        report["transformer_ms_per_edit"] = round(transformer_ms, 2)
+        report["cascade_ms_per_edit"] = round(fast_ms + (1 - offloaded) * transformer_ms, 2)
+
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
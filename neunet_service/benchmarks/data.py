@@ -0,0 +1,99 @@
+"""
+Данные для бенчмарков: чтение размеченных правок и генерация синтетических
+пар added/removed разных размеров.
+"""
+import json
+import random
+from typing import Dict, Iterator, List, Optional
+
+WORDS_EN = (
+    "history city river population government century science language article "
+    "museum university empire economy culture station region railway climate "
+    "village school church built founded located known during between several "
+    "north south became largest species family album released season team"
+).split()
+WORDS_RU = (
+    "история город река население правительство век наука язык статья музей "
+    "университет империя экономика культура станция регион железная климат "
+    "деревня школа церковь построен основан расположен известен годы между "
+    "несколько север юг стал крупнейший вид семейство альбом сезон команда"
+).split()
+VANDAL_INSERTS = (
+    "LOL", "fuck this", "shit shit shit", "haha", "блять", "сука", "пизд", "xD",
+    "I WAS HERE", "ЭТО ВСЁ НЕПРАВДА", "buy cheap pills",
+)
+
+# Размер правки в символах: (min, max, доля трафика)
+SIZE_DISTRIBUTIONS = {
+    "small": [(5, 80, 1.0)],
+    "medium": [(200, 2000, 1.0)],
+    "large": [(5000, 40000, 1.0)],
+    "realistic": [(5, 80, 0.55), (80, 1000, 0.3), (1000, 8000, 0.12), (8000, 60000, 0.03)],
+}
+
+
+def read_pairs(path: str) -> List[Dict]:
+    """JSONL с полями added_text, removed_text и (необязательно) label"""
+    pairs = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                pairs.append(json.loads(line))
+    return pairs
+
+
+def _sentence(rng: random.Random, words: List[str], length: int) -> str:
+    parts = []
+    size = 0
+    while size < length:
+        sentence = " ".join(rng.choice(words) for _ in range(rng.randint(6, 14))).capitalize() + ". "
+        parts.append(sentence)
+        size += len(sentence)
+    return "".join(parts)[:length]
+
+
+def _size(rng: random.Random, distribution: str) -> int:
+    buckets = SIZE_DISTRIBUTIONS[distribution]
+    point = rng.random() * sum(weight for _, _, weight in buckets)
+    for low, high, weight in buckets:
+        if point <= weight:
+            return rng.randint(low, high)
+        point -= weight
+    low, high, _ = buckets[-1]
+    return rng.randint(low, high)
+
+
+def _vandal_pair(rng: random.Random, words: List[str], size: int) -> Dict:
+    kind = rng.choice(("blanking", "repeat", "caps", "profanity", "spam"))
+    if kind == "blanking":
+        return {"added_text": rng.choice(VANDAL_INSERTS), "removed_text": _sentence(rng, words, max(size, 1200))}
+    if kind == "repeat":
+        return {"added_text": rng.choice("!aAoO)ыХ") * max(size // 4, 35), "removed_text": ""}
+    if kind == "caps":
+        return {"added_text": _sentence(rng, words, max(size, 40)).upper(), "removed_text": ""}
+    if kind == "profanity":
+        text = _sentence(rng, words, size)
+        insert = " ".join(rng.choice(VANDAL_INSERTS) for _ in range(rng.randint(1, 4)))
+        cut = rng.randint(0, len(text))
+        return {"added_text": text[:cut] + " " + insert + " " + text[cut:], "removed_text": _sentence(rng, words, size // 2)}
+    return {"added_text": rng.choice(VANDAL_INSERTS) + " " + _sentence(rng, words, size), "removed_text": ""}
+
+
+def synthetic_pairs(
+    count: int,
+    distribution: str = "realistic",
+    vandal_share: float = 0.1,
+    seed: Optional[int] = 42,
+) -> Iterator[Dict]:
+    """Синтетические правки с меткой label (1 - вандализм)"""
+    rng = random.Random(seed)
+    for _ in range(count):
+        words = WORDS_RU if rng.random() < 0.5 else WORDS_EN
+        size = _size(rng, distribution)
+        if rng.random() < vandal_share:
+            pair = _vandal_pair(rng, words, size)
+            pair["label"] = 1
+        else:
+            removed = _sentence(rng, words, rng.randint(0, size)) if rng.random() < 0.6 else ""
+            pair = {"added_text": _sentence(rng, words, size), "removed_text": removed, "label": 0}
+        yield pair
@@ -0,0 +1,239 @@
+"""
+Бенчмарк модели вандализма: пропускная способность и задержки по размеру батча,
+числу потоков torch и распределению размеров правок.
+
+В процессе (модель загружается здесь же, по умолчанию только CPU):
+    python -m benchmarks.inference_bench inprocess --threads 1,2,4 --batch-sizes 1,8,32
+    python -m benchmarks.inference_bench inprocess --threads 4 --batch-sizes 16 --profile-dir traces/
+
+По HTTP (работающий сервис, батчи > 1 идут в /models/vandalism/batch):
+    python -m benchmarks.inference_bench http --url http://localhost:8010 --concurrency 1,4,16 --batch-sizes 1,8
+
+Отчёт: JSON в stdout/--output и плоский CSV (--csv), одна строка на конфигурацию.
+"""
+import argparse
+import json
+import os
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Tuple
+
+from benchmarks.data import SIZE_DISTRIBUTIONS, read_pairs, synthetic_pairs
+from benchmarks.report import latency_summary, memory_info, write_report
+
+
+def int_list(value: str) -> List[int]:
+    return [int(item) for item in value.split(",") if item.strip()]
+
+
+def chunks(items: List, size: int) -> List[List]:
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def load_pairs(args, distribution: str) -> List[Dict]:
+    if args.dataset:
+        return read_pairs(args.dataset)[:args.count]
+    return list(synthetic_pairs(args.count, distribution, args.vandal_share, seed=args.seed))
+
+
+def run_inprocess(args) -> List[Dict]:
+    if args.device == "cpu":
+        # До импорта torch: CUDA не инициализируется вовсе
+        os.environ["CUDA_VISIBLE_DEVICES"] = ""
+
+    import asyncio
+    import torch
+    from app.config.config import settings
+    from app.models.inference import encode_windows, score_edits
+    from app.models.vandalism_model import load_model_and_tokenizer
+
+    torch.set_num_interop_threads(1)
+    device, tokenizer, model = asyncio.run(load_model_and_tokenizer())
+    loaded_memory = memory_info()
+
+    rows = []
+    for distribution in args.distributions:
+        edits = [(p["added_text"], p["removed_text"]) for p in load_pairs(args, distribution)]
+        windows = encode_windows(tokenizer, edits)
+        tokens = sum(len(input_ids) for _, input_ids in windows)
+
+        for threads in args.threads:
+            torch.set_num_threads(threads)
+            for batch_size in args.batch_sizes:
+                settings.batch_size = batch_size
+                batches = chunks(edits, batch_size)
+                for batch in batches[:args.warmup]:
+                    score_edits(device, tokenizer, model, batch)
+
+                latencies = []
+                started = time.perf_counter()
+                for batch in batches:
+                    call_started = time.perf_counter()
+                    score_edits(device, tokenizer, model, batch)
+                    latencies.append((time.perf_counter() - call_started) * 1000)
+                seconds = time.perf_counter() - started
+
+                row = {
+                    "mode": "inprocess",
+                    "device": str(device),
+                    "distribution": distribution,
+                    "threads": threads,
+                    "batch_size": batch_size,
+                    "edits": len(edits),
+                    "windows": len(windows),
+                    "tokens": tokens,
+                    "seconds": round(seconds, 3),
+                    "edits_per_sec": round(len(edits) / seconds, 2),
+                    "tokens_per_sec": round(tokens / seconds, 1),
+                    "ms_per_edit": round(seconds * 1000 / len(edits), 2),
+                    **latency_summary(latencies),
+                    **memory_info(),
+                }
+                if args.profile_dir:
+                    row["trace"] = profile(args.profile_dir, device, tokenizer, model, batches[:args.profile_batches],
+                                           f"{distribution}_t{threads}_b{batch_size}")
+                rows.append(row)
+                print(f"{distribution} threads={threads} batch={batch_size}: "
+                      f"{row['edits_per_sec']} edits/s, p99 {row['p99_ms']} ms", flush=True)
+
+    for row in rows:
+        row["model_loaded_rss_mb"] = loaded_memory["rss_mb"]
+    return rows
+
+
+def profile(profile_dir: str, device, tokenizer, model, batches: List[List[Tuple[str, str]]], name: str) -> str:
+    """Chrome-трейс torch.profiler и таблица самых дорогих операторов"""
+    from torch.profiler import ProfilerActivity, profile as torch_profile
+    from app.models.inference import score_edits
+
+    os.makedirs(profile_dir, exist_ok=True)
+    activities = [ProfilerActivity.CPU]
+    if device.type == "cuda":
+        activities.append(ProfilerActivity.CUDA)
+    with torch_profile(activities=activities, record_shapes=True, profile_memory=True) as prof:
+        for batch in batches:
+            score_edits(device, tokenizer, model, batch)
+
+    trace_path = os.path.join(profile_dir, f"{name}.json")
+    prof.export_chrome_trace(trace_path)
+    with open(os.path.join(profile_dir, f"{name}_ops.txt"), "w", encoding="utf-8") as f:
+        f.write(prof.key_averages().table(sort_by="self_cpu_time_total", row_limit=25))
+    return trace_path
+
+
+def post_json(url: str, payload: Dict, timeout: float) -> Dict:
+    request = urllib.request.Request(
+        url,
+        data=json.dumps(payload).encode("utf-8"),
+        headers={"Content-Type": "application/json"},
+        method="POST",
+    )
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return json.loads(response.read())
+
+
+def run_http(args) -> List[Dict]:
+    base_url = args.url.rstrip("/")
+    rows = []
+    for distribution in args.distributions:
+        pairs = load_pairs(args, distribution)
+        items = [{"added_text": p["added_text"], "removed_text": p["removed_text"]} for p in pairs]
+
+        for concurrency in args.concurrency:
+            for batch_size in args.batch_sizes:
+                if batch_size == 1:
+                    requests = [(f"{base_url}/models/vandalism/", item) for item in items]
+                else:
+                    requests = [(f"{base_url}/models/vandalism/batch", {"items": batch})
+                                for batch in chunks(items, batch_size)]
+
+                def send(request):
+                    call_started = time.perf_counter()
+                    try:
+                        result = post_json(request[0], request[1], args.timeout)
+                        error = None
+                    except Exception as exc:
+                        result, error = None, repr(exc)
+                    return (time.perf_counter() - call_started) * 1000, result, error
+
+                with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                    list(pool.map(send, requests[:args.warmup]))
+                    started = time.perf_counter()
+                    results = list(pool.map(send, requests))
+                    seconds = time.perf_counter() - started
+
+                latencies = [latency for latency, _, error in results if error is None]
+                errors = [error for _, _, error in results if error is not None]
+                decided_by_fast = 0
+                for _, result, _ in results:
+                    for response in (result or {}).get("results", [result] if result else []):
+                        decided_by_fast += int(response.get("decided_by") == "fast")
+
+                row = {
+                    "mode": "http",
+                    "url": base_url,
+                    "distribution": distribution,
+                    "concurrency": concurrency,
+                    "batch_size": batch_size,
+                    "edits": len(items),
+                    "requests": len(requests),
+                    "errors": len(errors),
+                    "fast_tier_share": round(decided_by_fast / len(items), 4) if items else None,
+                    "seconds": round(seconds, 3),
+                    "edits_per_sec": round(len(items) / seconds, 2),
+                    "requests_per_sec": round(len(requests) / seconds, 2),
+                    **latency_summary(latencies),
+                }
+                if errors:
+                    row["first_error"] = errors[0]
+                rows.append(row)
+                print(f"{distribution} concurrency={concurrency} batch={batch_size}: "
+                      f"{row['edits_per_sec']} edits/s, p99 {row['p99_ms']} ms, errors {len(errors)}", flush=True)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("mode", choices=["inprocess", "http"])
+    parser.add_argument("--dataset", help="JSONL с added_text, removed_text; без него - синтетика")
+    parser.add_argument("--count", type=int, default=256)
+    parser.add_argument("--distributions", type=lambda v: v.split(","), default=["realistic"],
+                        help=f"Через запятую: {', '.join(sorted(SIZE_DISTRIBUTIONS))}")
+    parser.add_argument("--vandal-share", type=float, default=0.1)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--batch-sizes", type=int_list, default=[1, 8, 32])
+    parser.add_argument("--warmup", type=int, default=2, help="Батчей/запросов на прогрев")
+    parser.add_argument("--output", help="JSON-отчёт")
+    parser.add_argument("--csv", help="CSV, строка на конфигурацию")
+    # inprocess
+    parser.add_argument("--threads", type=int_list, default=[1, 2, 4], help="torch.set_num_threads")
+    parser.add_argument("--device", choices=["cpu", "auto"], default="cpu")
+    parser.add_argument("--profile-dir", help="Каталог для трейсов torch.profiler")
+    parser.add_argument("--profile-batches", type=int, default=3)
+    # http
+    parser.add_argument("--url", default="http://localhost:8010")
+    parser.add_argument("--concurrency", type=int_list, default=[1, 4, 16])
+    parser.add_argument("--timeout", type=float, default=60.0)
+    args = parser.parse_args()
+
+    for distribution in args.distributions:
+        if distribution not in SIZE_DISTRIBUTIONS:
+            parser.error(f"Неизвестное распределение: {distribution}")
+
+    rows = run_inprocess(args) if args.mode == "inprocess" else run_http(args)
+    report = {
+        "mode": args.mode,
+        "cpu_count": os.cpu_count(),
+        "count": args.count,
+        "results": rows,
+    }
+    if rows:
+        best = max(rows, key=lambda row: row["edits_per_sec"])
+        report["best"] = {key: best[key] for key in ("distribution", "batch_size", "edits_per_sec", "p99_ms")
+                          if key in best}
+    write_report(report, rows, args.output, args.csv)
+
+
+if __name__ == "__main__":
+    main()
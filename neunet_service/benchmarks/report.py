@@ -0,0 +1,57 @@
+"""
+Общие функции отчётов бенчмарков: перцентили, память процесса, запись JSON/CSV.
+"""
+import csv
+import json
+import math
+import os
+from typing import Dict, List, Optional
+
+import psutil
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """Перцентиль методом ближайшего ранга"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(math.ceil(q / 100 * len(ordered)) - 1, 0)
+    return ordered[rank]
+
+
+def latency_summary(latencies_ms: List[float]) -> Dict:
+    return {
+        "p50_ms": round(percentile(latencies_ms, 50), 2) if latencies_ms else None,
+        "p95_ms": round(percentile(latencies_ms, 95), 2) if latencies_ms else None,
+        "p99_ms": round(percentile(latencies_ms, 99), 2) if latencies_ms else None,
+        "mean_ms": round(sum(latencies_ms) / len(latencies_ms), 2) if latencies_ms else None,
+    }
+
+
+def memory_info(pid: Optional[int] = None) -> Dict:
+    """RSS и PSS процесса в МБ. PSS делит разделяемые страницы между процессами (только Linux)"""
+    process = psutil.Process(pid or os.getpid())
+    info = {"rss_mb": round(process.memory_info().rss / 2 ** 20, 1)}
+    try:
+        full = process.memory_full_info()
+        info["pss_mb"] = round(getattr(full, "pss", 0) / 2 ** 20, 1) or None
+        info["uss_mb"] = round(full.uss / 2 ** 20, 1)
+    except (psutil.AccessDenied, AttributeError):
+        pass
+    return info
+
+
+def write_report(report: Dict, rows: List[Dict], json_path: Optional[str] = None, csv_path: Optional[str] = None):
+    """Печать JSON-отчёта и запись в файлы; rows - плоские строки для CSV"""
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    if json_path:
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    if csv_path and rows:
+        fields = []
+        for row in rows:
+            fields.extend(key for key in row if key not in fields)
+        with open(csv_path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=fields)
+            writer.writeheader()
+            writer.writerows(rows)
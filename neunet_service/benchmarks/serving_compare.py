@@ -0,0 +1,119 @@
+"""
+Сравнение режимов запуска сервиса: память на воркер и суммарная пропускная способность.
+
+    python -m benchmarks.serving_compare --workers 4 --count 400 --output serving.json
+
+"uvicorn" - как сейчас: uvicorn --workers N, каждый воркер грузит свою копию модели.
+"prefork" - python -m app.serve: модель грузится один раз, воркеры делят веса (copy-on-write).
+
+Каждый режим запускается подпроцессом на своём порту, после /health снимается
+RSS/PSS всех процессов дерева, затем идёт нагрузка по HTTP (benchmarks.inference_bench).
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+import urllib.request
+from types import SimpleNamespace
+from typing import Dict, List
+
+import psutil
+
+from benchmarks.inference_bench import int_list, run_http
+from benchmarks.report import memory_info, write_report
+
+
+def wait_healthy(url: str, timeout: float) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(f"{url}/health", timeout=2) as response:
+                if response.status == 200:
+                    return True
+        except OSError:
+            pass
+        time.sleep(1)
+    return False
+
+
+def tree_memory(pid: int) -> Dict:
+    root = psutil.Process(pid)
+    processes = [root] + root.children(recursive=True)
+    rows = []
+    for process in processes:
+        try:
+            rows.append({"pid": process.pid, **memory_info(process.pid)})
+        except psutil.Error:
+            continue
+    return {
+        "processes": rows,
+        "total_rss_mb": round(sum(row["rss_mb"] for row in rows), 1),
+        "total_pss_mb": round(sum(row.get("pss_mb") or 0 for row in rows), 1),
+    }
+
+
+def command_for(mode: str, workers: int, port: int) -> List[str]:
+    if mode == "uvicorn":
+        return [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1",
+                "--port", str(port), "--workers", str(workers)]
+    return [sys.executable, "-m", "app.serve"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modes", type=lambda v: v.split(","), default=["uvicorn", "prefork"])
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--port", type=int, default=8020)
+    parser.add_argument("--count", type=int, default=256)
+    parser.add_argument("--distribution", default="realistic")
+    parser.add_argument("--concurrency", type=int_list, default=None, help="По умолчанию 2 x workers")
+    parser.add_argument("--batch-sizes", type=int_list, default=[1])
+    parser.add_argument("--startup-timeout", type=float, default=300)
+    parser.add_argument("--output")
+    parser.add_argument("--csv")
+    args = parser.parse_args()
+
+    report = {"workers": args.workers, "cpu_count": os.cpu_count(), "modes": {}}
+    rows = []
+    for offset, mode in enumerate(args.modes):
+        port = args.port + offset
+        url = f"http://127.0.0.1:{port}"
+        threads = max((os.cpu_count() or 1) // args.workers, 1)
+        env = dict(os.environ, CUDA_VISIBLE_DEVICES="", SERVE_HOST="127.0.0.1", SERVE_PORT=str(port),
+                   SERVE_WORKERS=str(args.workers), SERVE_MEMORY_REPORT_INTERVAL="0")
+        if mode == "uvicorn":
+            # Без ограничения каждый воркер uvicorn берёт все ядра
+            env.update(OMP_NUM_THREADS=str(threads), MKL_NUM_THREADS=str(threads))
+
+        process = subprocess.Popen(command_for(mode, args.workers, port), env=env)
+        try:
+            if not wait_healthy(url, args.startup_timeout):
+                report["modes"][mode] = {"error": "service did not become healthy"}
+                continue
+            # Все воркеры должны успеть загрузить модель
+            time.sleep(5)
+            memory = tree_memory(process.pid)
+            load = run_http(SimpleNamespace(
+                url=url, dataset=None, count=args.count, distributions=[args.distribution],
+                vandal_share=0.1, seed=42, concurrency=args.concurrency or [2 * args.workers],
+                batch_sizes=args.batch_sizes, warmup=args.workers * 2, timeout=120.0,
+            ))
+            memory_after = tree_memory(process.pid)
+            report["modes"][mode] = {"memory_idle": memory, "memory_after_load": memory_after, "load": load}
+            for row in load:
+                rows.append({"serving_mode": mode, "workers": args.workers,
+                             "total_rss_mb": memory_after["total_rss_mb"],
+                             "total_pss_mb": memory_after["total_pss_mb"], **row})
+        finally:
+            process.terminate()
+            try:
+                process.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+    write_report(report, rows, args.output, args.csv)
+
+
+if __name__ == "__main__":
+    main()
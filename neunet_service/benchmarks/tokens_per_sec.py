@@ -0,0 +1,120 @@
+"""
+Пропускная способность в токенах/сек: до и после перехода на быстрый токенизатор
+с окнами и батчами по длине.
+
+    python -m benchmarks.tokens_per_sec --count 500 --distribution realistic
+    python -m benchmarks.tokens_per_sec --tokenize-only --output tokens.json
+
+"before" - DebertaV2Tokenizer, по одной правке, обрезание до MAXLEN (как было в эндпоинте).
+"after"  - DebertaV2TokenizerFast, все окна пачки, батчи по длине (app.models.inference).
+Токены считаются без паддинга; для "after" это все токены всех окон.
+"""
+import argparse
+import json
+import time
+
+import torch
+from transformers import DebertaV2Tokenizer, DebertaV2TokenizerFast
+
+from app.config.config import settings
+from app.models.inference import build_input_text, encode_windows, length_buckets, score_edits
+from benchmarks.data import SIZE_DISTRIBUTIONS, read_pairs, synthetic_pairs
+
+TOKENIZER_NAME = "microsoft/deberta-v3-base"
+
+
+def bench_tokenizers(edits):
+    texts = [build_input_text(added, removed) for added, removed in edits]
+    slow = DebertaV2Tokenizer.from_pretrained(TOKENIZER_NAME)
+    fast = DebertaV2TokenizerFast.from_pretrained(TOKENIZER_NAME)
+
+    started = time.perf_counter()
+    slow_tokens = sum(len(slow(text, truncation=True, max_length=settings.maxlen)["input_ids"]) for text in texts)
+    slow_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    windows = encode_windows(fast, edits)
+    fast_seconds = time.perf_counter() - started
+    fast_tokens = sum(len(input_ids) for _, input_ids in windows)
+
+    return {
+        "before": {"tokens": slow_tokens, "seconds": round(slow_seconds, 3),
+                   "tokens_per_sec": round(slow_tokens / slow_seconds, 1)},
+        "after": {"tokens": fast_tokens, "windows": len(windows), "seconds": round(fast_seconds, 3),
+                  "tokens_per_sec": round(fast_tokens / fast_seconds, 1)},
+    }
+
+
+def padding_share(lengths, batches):
+    real = sum(lengths)
+    padded = sum(max(lengths[i] for i in batch) * len(batch) for batch in batches)
+    return round(1 - real / padded, 4) if padded else 0.0
+
+
+def bench_model(edits, device, model):
+    texts = [build_input_text(added, removed) for added, removed in edits]
+    slow = DebertaV2Tokenizer.from_pretrained(TOKENIZER_NAME)
+    fast = DebertaV2TokenizerFast.from_pretrained(TOKENIZER_NAME)
+
+    # До: по одной правке, как в старом эндпоинте
+    started = time.perf_counter()
+    before_tokens = 0
+    with torch.no_grad():
+        for text in texts:
+            inputs = slow(text, return_tensors="pt", truncation=True, padding=True, max_length=settings.maxlen).to(device)
+            before_tokens += int(inputs["input_ids"].shape[1])
+            model(**inputs)
+    before_seconds = time.perf_counter() - started
+
+    # После: окна и батчи по длине
+    started = time.perf_counter()
+    score_edits(device, fast, model, edits)
+    after_seconds = time.perf_counter() - started
+    windows = encode_windows(fast, edits)
+    lengths = [len(input_ids) for _, input_ids in windows]
+    after_tokens = sum(lengths)
+
+    # Для сравнения: те же окна батчами в исходном порядке
+    unsorted_batches = [list(range(i, min(i + settings.batch_size, len(lengths))))
+                        for i in range(0, len(lengths), settings.batch_size)]
+    return {
+        "before": {"tokens": before_tokens, "seconds": round(before_seconds, 3),
+                   "tokens_per_sec": round(before_tokens / before_seconds, 1)},
+        "after": {"tokens": after_tokens, "windows": len(windows), "seconds": round(after_seconds, 3),
+                  "tokens_per_sec": round(after_tokens / after_seconds, 1),
+                  "padding_share": padding_share(lengths, length_buckets(lengths, settings.batch_size,
+                                                                          settings.batch_max_tokens)),
+                  "padding_share_unsorted": padding_share(lengths, unsorted_batches)},
+        "edits_per_sec": {"before": round(len(edits) / before_seconds, 2),
+                          "after": round(len(edits) / after_seconds, 2)},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dataset", help="JSONL с added_text, removed_text; без него - синтетика")
+    parser.add_argument("--count", type=int, default=300)
+    parser.add_argument("--distribution", default="realistic", choices=sorted(SIZE_DISTRIBUTIONS))
+    parser.add_argument("--tokenize-only", action="store_true")
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    pairs = read_pairs(args.dataset) if args.dataset else list(synthetic_pairs(args.count, args.distribution))
+    edits = [(p["added_text"], p["removed_text"]) for p in pairs]
+
+    report = {"edits": len(edits), "distribution": None if args.dataset else args.distribution,
+              "tokenizer": bench_tokenizers(edits)}
+    if not args.tokenize_only:
+        import asyncio
+        from app.models.vandalism_model import load_model_and_tokenizer
+        device, _, model = asyncio.run(load_model_and_tokenizer())
+        report["model"] = bench_model(edits, device, model)
+
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
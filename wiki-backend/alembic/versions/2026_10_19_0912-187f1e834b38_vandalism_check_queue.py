@@ -0,0 +1,40 @@
+# alembic/script.py.mako
+"""Vandalism check queue
+
+Revision ID: 187f1e834b38
+Revises: 32c0025cfdc6
+Create Date: 2026-10-19 09:12:04.318220
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '187f1e834b38'
+down_revision = '32c0025cfdc6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('vandalism_check_queue',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('commit_id', sa.UUID(), nullable=False),
+    sa.Column('attempts', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('locked_until', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['commit_id'], ['commits.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('vandalism_check_queue', schema=None) as batch_op:
+        batch_op.create_index('ix_vandalism_check_queue_commit_id', ['commit_id'], unique=True)
+        batch_op.create_index('ix_vandalism_check_queue_locked_until', ['locked_until'], unique=False)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('vandalism_check_queue', schema=None) as batch_op:
+        batch_op.drop_index('ix_vandalism_check_queue_locked_until')
+        batch_op.drop_index('ix_vandalism_check_queue_commit_id')
+
+    op.drop_table('vandalism_check_queue')
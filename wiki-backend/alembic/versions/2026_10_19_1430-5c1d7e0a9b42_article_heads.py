@@ -0,0 +1,53 @@
+# alembic/script.py.mako
+"""Article heads
+
+Revision ID: 5c1d7e0a9b42
+Revises: 187f1e834b38
+Create Date: 2026-10-19 14:30:11.502113
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '5c1d7e0a9b42'
+down_revision = '187f1e834b38'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('article_heads',
+    sa.Column('article_id', sa.UUID(), nullable=False),
+    sa.Column('head_commit_id', sa.UUID(), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('language', sa.String(length=8), nullable=True),
+    sa.Column('title', sa.String(length=255), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['article_id'], ['articles.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['head_commit_id'], ['commits.id'], ),
+    sa.PrimaryKeyConstraint('article_id')
+    )
+    with op.batch_alter_table('article_heads', schema=None) as batch_op:
+        batch_op.create_index('ix_article_heads_head_commit_id', ['head_commit_id'], unique=False)
+        batch_op.create_index('ix_article_heads_status', ['status'], unique=False)
+
+    # Заполняем по текущим головам веток main
+    op.execute("""
+        INSERT INTO article_heads (article_id, head_commit_id, status, title, updated_at)
+        SELECT DISTINCT ON (b.article_id)
+               b.article_id, b.head_commit_id, a.status, a.title, COALESCE(a.updated_at, now())
+        FROM branches b
+        JOIN articles a ON a.id = b.article_id
+        WHERE b.name = 'main' AND b.head_commit_id IS NOT NULL
+        ORDER BY b.article_id, b.created_at DESC
+    """)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('article_heads', schema=None) as batch_op:
+        batch_op.drop_index('ix_article_heads_status')
+        batch_op.drop_index('ix_article_heads_head_commit_id')
+
+    op.drop_table('article_heads')
@@ -0,0 +1,145 @@
+# alembic/script.py.mako
+"""Head-only search index
+
+Revision ID: 8e3b6a1f2d70
+Revises: 5c1d7e0a9b42
+Create Date: 2026-10-19 15:45:27.318940
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '8e3b6a1f2d70'
+down_revision = '5c1d7e0a9b42'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # tsvector больше не считается для каждой ревизии: старые колонки, индексы и триггер удаляются
+    op.execute("DROP TRIGGER IF EXISTS trigger_update_tsv ON articles_full_text")
+    op.execute("DROP FUNCTION IF EXISTS update_tsv_columns()")
+    op.drop_index('ix_articles_full_text_tsv_en_gin', table_name='articles_full_text')
+    op.drop_index('ix_articles_full_text_tsv_ru_gin', table_name='articles_full_text')
+    op.drop_column('articles_full_text', 'tsv_en')
+    op.drop_column('articles_full_text', 'tsv_ru')
+
+    op.create_table('article_search_index',
+    sa.Column('article_id', sa.UUID(), nullable=False),
+    sa.Column('commit_id', sa.UUID(), nullable=False),
+    sa.Column('tsv_ru', postgresql.TSVECTOR(), nullable=True),
+    sa.Column('tsv_en', postgresql.TSVECTOR(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['article_id'], ['articles.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['commit_id'], ['commits.id'], ),
+    sa.PrimaryKeyConstraint('article_id')
+    )
+    op.create_index('ix_article_search_index_tsv_ru_gin', 'article_search_index', ['tsv_ru'], postgresql_using='gin')
+    op.create_index('ix_article_search_index_tsv_en_gin', 'article_search_index', ['tsv_en'], postgresql_using='gin')
+
+    # Строка индекса пересчитывается, только когда голова main указывает на коммит с полным текстом.
+    # Порядок вставки не важен: текст может появиться и до, и после смены головы
+    op.execute("""
+        CREATE OR REPLACE FUNCTION refresh_article_search_index(p_article_id uuid, p_commit_id uuid)
+        RETURNS void AS $$
+        BEGIN
+            INSERT INTO article_search_index (article_id, commit_id, tsv_ru, tsv_en, updated_at)
+            SELECT aft.article_id, aft.commit_id,
+                   to_tsvector('russian', aft.text), to_tsvector('english', aft.text), now()
+            FROM articles_full_text aft
+            WHERE aft.article_id = p_article_id AND aft.commit_id = p_commit_id
+            LIMIT 1
+            ON CONFLICT (article_id) DO UPDATE
+            SET commit_id = EXCLUDED.commit_id,
+                tsv_ru = EXCLUDED.tsv_ru,
+                tsv_en = EXCLUDED.tsv_en,
+                updated_at = EXCLUDED.updated_at
+            WHERE article_search_index.commit_id IS DISTINCT FROM EXCLUDED.commit_id;
+        END;
+        $$ LANGUAGE plpgsql;
+
+        CREATE OR REPLACE FUNCTION article_heads_search_index_trigger()
+        RETURNS TRIGGER AS $$
+        BEGIN
+            PERFORM refresh_article_search_index(NEW.article_id, NEW.head_commit_id);
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+
+        CREATE OR REPLACE FUNCTION articles_full_text_search_index_trigger()
+        RETURNS TRIGGER AS $$
+        BEGIN
+            IF EXISTS (
+                SELECT 1 FROM article_heads
+                WHERE article_id = NEW.article_id AND head_commit_id = NEW.commit_id
+            ) THEN
+                PERFORM refresh_article_search_index(NEW.article_id, NEW.commit_id);
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+
+        CREATE TRIGGER trigger_article_heads_search_index_insert
+        AFTER INSERT ON article_heads
+        FOR EACH ROW EXECUTE FUNCTION article_heads_search_index_trigger();
+
+        CREATE TRIGGER trigger_article_heads_search_index_update
+        AFTER UPDATE OF head_commit_id ON article_heads
+        FOR EACH ROW WHEN (OLD.head_commit_id IS DISTINCT FROM NEW.head_commit_id)
+        EXECUTE FUNCTION article_heads_search_index_trigger();
+
+        CREATE TRIGGER trigger_articles_full_text_search_index
+        AFTER INSERT ON articles_full_text
+        FOR EACH ROW EXECUTE FUNCTION articles_full_text_search_index_trigger();
+    """)
+
+    # Заполняем по текущим головам
+    op.execute("""
+        INSERT INTO article_search_index (article_id, commit_id, tsv_ru, tsv_en)
+        SELECT DISTINCT ON (h.article_id)
+               h.article_id, h.head_commit_id,
+               to_tsvector('russian', aft.text), to_tsvector('english', aft.text)
+        FROM article_heads h
+        JOIN articles_full_text aft ON aft.article_id = h.article_id AND aft.commit_id = h.head_commit_id
+        ORDER BY h.article_id
+    """)
+
+
+def downgrade() -> None:
+    op.execute("""
+        DROP TRIGGER IF EXISTS trigger_articles_full_text_search_index ON articles_full_text;
+        DROP TRIGGER IF EXISTS trigger_article_heads_search_index_update ON article_heads;
+        DROP TRIGGER IF EXISTS trigger_article_heads_search_index_insert ON article_heads;
+        DROP FUNCTION IF EXISTS articles_full_text_search_index_trigger();
+        DROP FUNCTION IF EXISTS article_heads_search_index_trigger();
+        DROP FUNCTION IF EXISTS refresh_article_search_index(uuid, uuid);
+    """)
+    op.drop_index('ix_article_search_index_tsv_en_gin', table_name='article_search_index')
+    op.drop_index('ix_article_search_index_tsv_ru_gin', table_name='article_search_index')
+    op.drop_table('article_search_index')
+
+    op.add_column('articles_full_text', sa.Column('tsv_ru', postgresql.TSVECTOR))
+    op.add_column('articles_full_text', sa.Column('tsv_en', postgresql.TSVECTOR))
+    op.create_index('ix_articles_full_text_tsv_ru_gin', 'articles_full_text', ['tsv_ru'], postgresql_using='gin')
+    op.create_index('ix_articles_full_text_tsv_en_gin', 'articles_full_text', ['tsv_en'], postgresql_using='gin')
+    op.execute("""
+        UPDATE articles_full_text
+        SET tsv_ru = to_tsvector('russian', text),
+            tsv_en = to_tsvector('english', text)
+    """)
+    op.execute("""
+        CREATE OR REPLACE FUNCTION update_tsv_columns()
+        RETURNS TRIGGER AS $$
+        BEGIN
+            NEW.tsv_ru := to_tsvector('russian', NEW.text);
+            NEW.tsv_en := to_tsvector('english', NEW.text);
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql;
+
+        CREATE TRIGGER trigger_update_tsv
+        BEFORE INSERT OR UPDATE ON articles_full_text
+        FOR EACH ROW EXECUTE FUNCTION update_tsv_columns();
+    """)
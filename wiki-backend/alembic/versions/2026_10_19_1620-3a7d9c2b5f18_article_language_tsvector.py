@@ -0,0 +1,127 @@
+# alembic/script.py.mako
+"""Article language and single tsvector
+
+Revision ID: 3a7d9c2b5f18
+Revises: 8e3b6a1f2d70
+Create Date: 2026-10-19 16:20:43.117205
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from app.utils.language import SAMPLE_CHARS, detect_language, ts_config_for
+
+# revision identifiers, used by Alembic.
+revision = '3a7d9c2b5f18'
+down_revision = '8e3b6a1f2d70'
+branch_labels = None
+depends_on = None
+
+REFRESH_FUNCTION_SQL = """
+    CREATE OR REPLACE FUNCTION refresh_article_search_index(p_article_id uuid, p_commit_id uuid)
+    RETURNS void AS $$
+    BEGIN
+        INSERT INTO article_search_index (article_id, commit_id, tsv, updated_at)
+        SELECT aft.article_id, aft.commit_id, to_tsvector(h.ts_config::regconfig, aft.text), now()
+        FROM articles_full_text aft
+        JOIN article_heads h ON h.article_id = aft.article_id
+        WHERE aft.article_id = p_article_id AND aft.commit_id = p_commit_id
+        LIMIT 1
+        ON CONFLICT (article_id) DO UPDATE
+        SET commit_id = EXCLUDED.commit_id,
+            tsv = EXCLUDED.tsv,
+            updated_at = EXCLUDED.updated_at;
+    END;
+    $$ LANGUAGE plpgsql;
+"""
+
+PREVIOUS_REFRESH_FUNCTION_SQL = """
+    CREATE OR REPLACE FUNCTION refresh_article_search_index(p_article_id uuid, p_commit_id uuid)
+    RETURNS void AS $$
+    BEGIN
+        INSERT INTO article_search_index (article_id, commit_id, tsv_ru, tsv_en, updated_at)
+        SELECT aft.article_id, aft.commit_id,
+               to_tsvector('russian', aft.text), to_tsvector('english', aft.text), now()
+        FROM articles_full_text aft
+        WHERE aft.article_id = p_article_id AND aft.commit_id = p_commit_id
+        LIMIT 1
+        ON CONFLICT (article_id) DO UPDATE
+        SET commit_id = EXCLUDED.commit_id,
+            tsv_ru = EXCLUDED.tsv_ru,
+            tsv_en = EXCLUDED.tsv_en,
+            updated_at = EXCLUDED.updated_at
+        WHERE article_search_index.commit_id IS DISTINCT FROM EXCLUDED.commit_id;
+    END;
+    $$ LANGUAGE plpgsql;
+"""
+
+
+def upgrade() -> None:
+    op.add_column('article_heads', sa.Column('ts_config', sa.String(length=32), server_default='simple', nullable=False))
+    op.create_index('ix_article_heads_language', 'article_heads', ['language'], unique=False)
+
+    # Язык существующих голов: тем же кодом, что и при записи
+    bind = op.get_bind()
+    rows = bind.execute(sa.text(f"""
+        SELECT h.article_id, left(aft.text, {SAMPLE_CHARS}) AS sample
+        FROM article_heads h
+        JOIN articles_full_text aft ON aft.article_id = h.article_id AND aft.commit_id = h.head_commit_id
+    """)).all()
+    update = sa.text("UPDATE article_heads SET language = :language, ts_config = :ts_config WHERE article_id = :article_id")
+    for row in rows:
+        language = detect_language(row.sample)
+        bind.execute(update, {"article_id": row.article_id, "language": language, "ts_config": ts_config_for(language)})
+
+    # Один tsvector в конфигурации языка статьи вместо двух
+    op.drop_index('ix_article_search_index_tsv_en_gin', table_name='article_search_index')
+    op.drop_index('ix_article_search_index_tsv_ru_gin', table_name='article_search_index')
+    op.drop_column('article_search_index', 'tsv_en')
+    op.drop_column('article_search_index', 'tsv_ru')
+    op.add_column('article_search_index', sa.Column('tsv', postgresql.TSVECTOR(), nullable=True))
+    op.execute("""
+        UPDATE article_search_index si
+        SET tsv = to_tsvector(h.ts_config::regconfig, aft.text)
+        FROM article_heads h
+        JOIN articles_full_text aft ON aft.article_id = h.article_id AND aft.commit_id = h.head_commit_id
+        WHERE h.article_id = si.article_id
+    """)
+    op.create_index('ix_article_search_index_tsv_gin', 'article_search_index', ['tsv'], postgresql_using='gin')
+
+    op.execute(REFRESH_FUNCTION_SQL)
+    # Смена языка головы тоже перестраивает tsvector
+    op.execute("""
+        DROP TRIGGER IF EXISTS trigger_article_heads_search_index_update ON article_heads;
+        CREATE TRIGGER trigger_article_heads_search_index_update
+        AFTER UPDATE OF head_commit_id, ts_config ON article_heads
+        FOR EACH ROW WHEN (OLD.head_commit_id IS DISTINCT FROM NEW.head_commit_id
+                           OR OLD.ts_config IS DISTINCT FROM NEW.ts_config)
+        EXECUTE FUNCTION article_heads_search_index_trigger();
+    """)
+
+
+def downgrade() -> None:
+    op.execute("""
+        DROP TRIGGER IF EXISTS trigger_article_heads_search_index_update ON article_heads;
+        CREATE TRIGGER trigger_article_heads_search_index_update
+        AFTER UPDATE OF head_commit_id ON article_heads
+        FOR EACH ROW WHEN (OLD.head_commit_id IS DISTINCT FROM NEW.head_commit_id)
+        EXECUTE FUNCTION article_heads_search_index_trigger();
+    """)
+    op.drop_index('ix_article_search_index_tsv_gin', table_name='article_search_index')
+    op.drop_column('article_search_index', 'tsv')
+    op.add_column('article_search_index', sa.Column('tsv_ru', postgresql.TSVECTOR(), nullable=True))
+    op.add_column('article_search_index', sa.Column('tsv_en', postgresql.TSVECTOR(), nullable=True))
+    op.execute(PREVIOUS_REFRESH_FUNCTION_SQL)
+    op.execute("""
+        UPDATE article_search_index si
+        SET tsv_ru = to_tsvector('russian', aft.text),
+            tsv_en = to_tsvector('english', aft.text)
+        FROM articles_full_text aft
+        WHERE aft.article_id = si.article_id AND aft.commit_id = si.commit_id
+    """)
+    op.create_index('ix_article_search_index_tsv_ru_gin', 'article_search_index', ['tsv_ru'], postgresql_using='gin')
+    op.create_index('ix_article_search_index_tsv_en_gin', 'article_search_index', ['tsv_en'], postgresql_using='gin')
+
+    op.drop_index('ix_article_heads_language', table_name='article_heads')
+    op.drop_column('article_heads', 'ts_config')
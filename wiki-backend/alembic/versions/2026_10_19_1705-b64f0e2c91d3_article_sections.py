@@ -0,0 +1,37 @@
+# alembic/script.py.mako
+"""Article sections
+
+Revision ID: b64f0e2c91d3
+Revises: 3a7d9c2b5f18
+Create Date: 2026-10-19 17:05:52.640318
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = 'b64f0e2c91d3'
+down_revision = '3a7d9c2b5f18'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Разделы читаются только по article_id для строк страницы выдачи, GIN не нужен.
+    # Заполняются при SEARCH_SECTIONS_ENABLED (scripts/rebuild_sections.py для существующих статей)
+    op.create_table('article_sections',
+    sa.Column('article_id', sa.UUID(), nullable=False),
+    sa.Column('position', sa.Integer(), nullable=False),
+    sa.Column('commit_id', sa.UUID(), nullable=False),
+    sa.Column('heading', sa.String(length=255), nullable=True),
+    sa.Column('body', sa.Text(), nullable=False),
+    sa.Column('tsv', postgresql.TSVECTOR(), nullable=True),
+    sa.ForeignKeyConstraint(['article_id'], ['articles.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['commit_id'], ['commits.id'], ),
+    sa.PrimaryKeyConstraint('article_id', 'position')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('article_sections')
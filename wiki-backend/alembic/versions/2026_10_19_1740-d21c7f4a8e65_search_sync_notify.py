@@ -0,0 +1,40 @@
+# alembic/script.py.mako
+"""Notify on search sync queue insert
+
+Revision ID: d21c7f4a8e65
+Revises: b64f0e2c91d3
+Create Date: 2026-10-19 17:40:09.274511
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'd21c7f4a8e65'
+down_revision = 'b64f0e2c91d3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Уведомление уходит при commit транзакции, добавившей записи; одно на оператор, а не на строку
+    op.execute("""
+        CREATE OR REPLACE FUNCTION notify_search_sync()
+        RETURNS TRIGGER AS $$
+        BEGIN
+            PERFORM pg_notify('search_sync', '');
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+
+        CREATE TRIGGER trigger_notify_search_sync
+        AFTER INSERT ON search_sync_queue
+        FOR EACH STATEMENT EXECUTE FUNCTION notify_search_sync();
+    """)
+
+
+def downgrade() -> None:
+    op.execute("""
+        DROP TRIGGER IF EXISTS trigger_notify_search_sync ON search_sync_queue;
+        DROP FUNCTION IF EXISTS notify_search_sync();
+    """)
@@ -0,0 +1,46 @@
+# alembic/script.py.mako
+"""One search sync queue row per article, lease columns
+
+Revision ID: 6f2a9d4c1e07
+Revises: d21c7f4a8e65
+Create Date: 2026-10-19 18:15:42.108375
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '6f2a9d4c1e07'
+down_revision = 'd21c7f4a8e65'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # От накопленных дублей остаётся последняя операция, но время первой правки
+    op.execute("""
+        UPDATE search_sync_queue q
+        SET created_at = first.created_at
+        FROM (
+            SELECT article_id, min(created_at) AS created_at FROM search_sync_queue GROUP BY article_id
+        ) first
+        WHERE first.article_id = q.article_id
+    """)
+    op.execute("""
+        DELETE FROM search_sync_queue q
+        USING search_sync_queue newer
+        WHERE newer.article_id = q.article_id AND newer.id > q.id
+    """)
+    with op.batch_alter_table('search_sync_queue', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+        batch_op.add_column(sa.Column('locked_until', sa.DateTime(timezone=True), nullable=True))
+        batch_op.drop_index('ix_typesense_sync_queue_article_id')
+        batch_op.create_index('ix_typesense_sync_queue_article_id', ['article_id'], unique=True)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('search_sync_queue', schema=None) as batch_op:
+        batch_op.drop_index('ix_typesense_sync_queue_article_id')
+        batch_op.create_index('ix_typesense_sync_queue_article_id', ['article_id'], unique=False)
+        batch_op.drop_column('locked_until')
+        batch_op.drop_column('version')
@@ -0,0 +1,58 @@
+# alembic/script.py.mako
+"""Trigram index on head titles and notify on head title/status change
+
+Revision ID: 3b8e5f1a7c24
+Revises: 6f2a9d4c1e07
+Create Date: 2026-10-19 18:40:27.531904
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '3b8e5f1a7c24'
+down_revision = '6f2a9d4c1e07'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    # Запасной путь подсказок (префикс любого слова и опечатки), пока индекс в памяти не построен
+    op.execute("CREATE INDEX ix_article_heads_title_trgm ON article_heads USING gin (lower(title) gin_trgm_ops)")
+    # Каждый воркер держит подсказки в памяти и обновляет их по этому каналу.
+    # REFRESH_HEAD_SQL переписывает title и status при каждой смене головы - уведомляем только о реальных изменениях
+    op.execute("""
+        CREATE OR REPLACE FUNCTION notify_article_head_title()
+        RETURNS TRIGGER AS $$
+        BEGIN
+            IF TG_OP = 'DELETE' THEN
+                PERFORM pg_notify('article_heads', json_build_object('id', OLD.article_id, 'deleted', true)::text);
+                RETURN NULL;
+            END IF;
+            PERFORM pg_notify('article_heads', json_build_object(
+                'id', NEW.article_id, 'title', NEW.title, 'status', NEW.status
+            )::text);
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+
+        CREATE TRIGGER trigger_notify_article_head_insert_delete
+        AFTER INSERT OR DELETE ON article_heads
+        FOR EACH ROW EXECUTE FUNCTION notify_article_head_title();
+
+        CREATE TRIGGER trigger_notify_article_head_update
+        AFTER UPDATE OF title, status ON article_heads
+        FOR EACH ROW
+        WHEN (OLD.title IS DISTINCT FROM NEW.title OR OLD.status IS DISTINCT FROM NEW.status)
+        EXECUTE FUNCTION notify_article_head_title();
+    """)
+
+
+def downgrade() -> None:
+    op.execute("""
+        DROP TRIGGER IF EXISTS trigger_notify_article_head_update ON article_heads;
+        DROP TRIGGER IF EXISTS trigger_notify_article_head_insert_delete ON article_heads;
+        DROP FUNCTION IF EXISTS notify_article_head_title();
+    """)
+    op.drop_index('ix_article_heads_title_trgm', table_name='article_heads')
@@ -13,12 +13,15 @@ from app.core.database import get_db
 from app.core.security import get_current_active_user, require_permission
 from app.models.user import User
 from app.models.article import Article, ArticleFull, Commit, Branch, CommitParent
+from app.models.article_head import ArticleHead
 from app.schemas.article import (
     ArticleResponse, ArticleCreate, ArticleResponseOne, ArticleUpdate,
     CommitResponse, CommitCreate,
     BranchResponse, BranchCreate
 )
 from app.services.commit_service import CommitService
+from app.services.article_head_service import ArticleHeadService
+from app.services.search_services.search_cache import mark_search_index_changed
 from app.services.template_service import TemplateService
 from app.utils.md_to_html import md_to_html
 import re
@@ -66,23 +69,28 @@ async def get_article(
     if not article:
         raise HTTPException(status_code=404,detail="Article not found")
     commit_service = CommitService(db)
-    branch_query = await db.execute(
-        select(Branch)
-        .where(Branch.article_id==article_id)
-        .where(Branch.name==branch)
-    )
-    branch_result = branch_query.scalar_one_or_none()
-    if not branch_result:
+    if branch == "main":
+        # Голова main хранится в article_heads, ветку искать не нужно
+        head_commit_id = await db.scalar(
+            select(ArticleHead.head_commit_id).where(ArticleHead.article_id == article_id)
+        )
+    else:
+        head_commit_id = await db.scalar(
+            select(Branch.head_commit_id)
+            .where(Branch.article_id==article_id)
+            .where(Branch.name==branch)
+        )
+    if not head_commit_id:
         raise HTTPException(status_code=404,detail="Branch name not found")
     
     full_content_result = await db.execute(
         select(ArticleFull.text)
         .where(ArticleFull.article_id==article_id)
-        .where(ArticleFull.commit_id==branch_result.head_commit_id)
+        .where(ArticleFull.commit_id==head_commit_id)
     )
     full_content = full_content_result.scalar_one_or_none()
     if not full_content:
-        full_content = await commit_service.rebuild_content_at_commit(branch_result.head_commit_id)
+        full_content = await commit_service.rebuild_content_at_commit(head_commit_id)
 
     if not full_content:
         raise HTTPException(status_code=404,detail="Failed to extact content of the head commit")
@@ -143,6 +151,7 @@ async def create_article(
         created_by=current_user.id,
     )
     db.add(main_branch)
+    await ArticleHeadService(db).refresh(article.id, content=article_data.content)
     commit_service = CommitService(db)
     await db.commit()
 
@@ -188,6 +197,7 @@ async def update_article(
     update_data = article_update.model_dump(exclude_unset=True, exclude={"content", "message"})
     for field, value in update_data.items():
         setattr(article, field, value)
+    await ArticleHeadService(db).refresh(article.id)
     
     await db.commit()
     await db.refresh(article)
@@ -210,6 +220,8 @@ async def delete_article(
         )
     
     await db.delete(article)
+    # Удалённая статья не должна оставаться в закэшированной выдаче
+    mark_search_index_changed(db)
     await db.commit()
     
     return {"message": f"Article {article_id} deleted successfully"}
@@ -344,6 +356,7 @@ async def add_article_categories(
         if existing.scalar_one_or_none() is None:
             db.add(ArticleCategory(article_id=article_id, category_id=cid))
     
+    await ArticleHeadService(db).mark_facets_changed([article_id])
     await db.commit()
     return {"message": "Categories added successfully"}
 
@@ -366,5 +379,6 @@ async def remove_article_category(
         raise HTTPException(status_code=404, detail="Category not assigned to article")
     
     await db.delete(assoc)
+    await ArticleHeadService(db).mark_facets_changed([article_id])
     await db.commit()
     # no body returned
@@ -14,6 +14,7 @@ from app.models.article import Article
 from app.schemas.article import ArticleResponse
 from app.models.category import ArticleCategory
 from app.services.category_service import CategoryService
+from app.services.article_head_service import ArticleHeadService
 
 router = APIRouter()
 
@@ -127,6 +128,11 @@ async def update_category(
             if parent:
                 path = f"{parent.path}.{path}"
         category.path = path
+        # Путь раздела - значение фильтра и фасета поиска у всех его статей
+        article_ids = (await db.scalars(
+            select(ArticleCategory.article_id).where(ArticleCategory.category_id == category_id)
+        )).all()
+        await ArticleHeadService(db).mark_facets_changed(article_ids)
     
     await db.commit()
     await db.refresh(category)
@@ -148,6 +154,12 @@ async def delete_category(
             detail="Category not found"
         )
     
+    # Раздел пропадает из фильтров и фасетов поиска у всех его статей
+    article_ids = (await db.scalars(
+        select(ArticleCategory.article_id).where(ArticleCategory.category_id == category_id)
+    )).all()
+    await ArticleHeadService(db).mark_facets_changed(article_ids)
+    
     await db.delete(category)
     await db.commit()
     
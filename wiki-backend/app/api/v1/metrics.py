@@ -0,0 +1,38 @@
+# app/api/v1/metrics.py
+from fastapi import APIRouter, Depends, HTTPException
+
+from app.core.enums import TrustTier
+from app.core.security import get_current_user
+from app.core.metrics import metrics
+from app.services.search_services.search_cache import SearchCache
+
+router = APIRouter()
+
+@router.get("/", response_model=dict)
+async def get_metrics(current_user = Depends(get_current_user)):
+    """Счётчики и задержки внутренних компонентов (агрегировано по всем воркерам; admin only)"""
+    # Частые запросы - это тексты, которые вводили пользователи
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+
+    snapshot = await metrics.snapshot()
+    counters = snapshot["counters"]
+
+    # Доля проверок на вандализм, которых удалось избежать благодаря репутации авторов
+    trust_total = sum(counters.get(f"vandalism.trust.{tier.value}", 0) for tier in TrustTier)
+    snapshot["vandalism_trust"] = {
+        "checks": trust_total,
+        "skipped_share": round(counters.get("vandalism.trust.skip", 0) / trust_total, 4) if trust_total else None,
+        "light_share": round(counters.get("vandalism.trust.light", 0) / trust_total, 4) if trust_total else None,
+    }
+
+    # Кэш выдачи поиска: общая доля попаданий и самые частые запросы за сутки
+    cache_hits = counters.get("search.cache.hit", 0) + counters.get("search.cache.negative_hit", 0)
+    cache_lookups = cache_hits + counters.get("search.cache.miss", 0)
+    snapshot["search_cache"] = {
+        "version": await SearchCache.get_version(),
+        "lookups": cache_lookups,
+        "hit_rate": round(cache_hits / cache_lookups, 4) if cache_lookups else None,
+        "top_queries": await SearchCache.query_stats(),
+    }
+    return snapshot
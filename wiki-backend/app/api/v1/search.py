@@ -1,39 +1,128 @@
 # app/api/v1/endpoints/search.py
 from typing import Optional
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from fastapi_cache.decorator import cache
 from typesense import AsyncClient
 from app.core.config import settings
 from app.core.database import get_db
 from app.core.typesense_client import get_typesense_client
-from app.schemas.search import SearchQueryParams, SearchResponse, SearchResultItem
+from app.schemas.search import (
+    SearchQueryParams, SearchResponse, SearchResultItem, SearchSyncStatus,
+    SuggestResponse, SuggestSelection,
+)
+from app.services.search_services.search_cache import SearchCache
+from app.services.search_services.search_cursor import (
+    InvalidSearchCursor, StaleSearchCursor, decode_cursor, index_version, next_cursor, query_fingerprint,
+)
 from app.services.search_services.search_service_factory import SearchServiceFactory
+from app.services.search_services.title_suggest import (
+    SUGGEST_TOP_K, fallback_suggest, record_selection, title_suggest_index,
+)
+from app.services.typesense_sync_worker import TypesenseSyncWorker
 
 router = APIRouter()
 
 @router.get("/", response_model=SearchResponse)
-@cache(expire=settings.cache_expire)
 async def search_articles(
     params: SearchQueryParams = Depends(),
     db: AsyncSession = Depends(get_db),
     typesense_client: Optional[AsyncClient] = Depends(get_typesense_client)
 ):
-    # Создаём нужный сервис внутри функции
+    # Версия индекса в ключе кэша: после изменения статьи старая выдача не читается
+    search_cache = SearchCache(settings.SEARCH_ENGINE.value)
     search_service = SearchServiceFactory.create_service(settings.SEARCH_ENGINE, db, typesense_client)
-    total, results = await search_service.search(
-        q=params.q,
+    if (params.category or params.tag) and not search_service.supports_filters:
+        raise HTTPException(status_code=400, detail="Search engine does not support category and tag filters")
+    # facets на страницу выдачи не влияет: ни в ключ кэша, ни в отпечаток курсора не входит
+    cache_params = params.model_dump(exclude={"facets"})
+    fingerprint = query_fingerprint(cache_params)
+    cursor = None
+    if params.cursor:
+        try:
+            cursor = decode_cursor(params.cursor, fingerprint, await index_version())
+        except StaleSearchCursor as e:
+            raise HTTPException(status_code=409, detail=str(e))
+        except InvalidSearchCursor as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        # Курсоры одной страницы различаются временем выдачи - в ключ кэша идёт только позиция
+        cache_params["cursor"] = f"{cursor.offset}:{cursor.id}"
+    version, cached = await search_cache.get(cache_params)
+    if version is None:
+        version = await index_version()
+    if cached is not None:
+        total, results = cached
+    else:
+        total, results = await search_service.search(
+            q=params.q,
+            language=params.language,
+            fields=params.fields,
+            limit=params.limit,
+            offset=params.offset,
+            hybrid=params.hybrid,
+            semantic_weight=params.semantic_weight,
+            cursor=cursor,
+            category=params.category,
+            tag=params.tag,
+        )
+        await search_cache.set(version, cache_params, total, results)
+    facets = await search_facets(search_cache, search_service, params) if params.facets else None
+    # Сервисы досчитывают до SEARCH_MATCH_CAP + 1, чтобы отличить "ровно N" от "больше N"
+    total_capped = 0 < settings.SEARCH_MATCH_CAP < total
+    return SearchResponse(
+        query=params.q,
         language=params.language,
         fields=params.fields,
-        limit=params.limit,
-        offset=params.offset,
-        hybrid=params.hybrid,
-        semantic_weight=params.semantic_weight
+        total=settings.SEARCH_MATCH_CAP if total_capped else total,
+        total_capped=total_capped,
+        results=[SearchResultItem.model_validate(r) for r in results],
+        next_cursor=next_cursor(version, fingerprint, total, cursor.offset if cursor else params.offset,
+                                params.limit, results),
+        facets=facets,
     )
-    return SearchResponse(
-        query=params.q,
+
+
+async def search_facets(search_cache: SearchCache, search_service, params: SearchQueryParams):
+    """Фасеты не зависят от страницы: считаются один раз на запрос и версию индекса, листание берёт их из кэша"""
+    facet_params = params.model_dump(include={"q", "language", "fields", "category", "tag"})
+    facet_params["kind"] = "facets"
+    # Обращение к фасетам - не поисковый запрос: статистику кэша выдачи не искажает
+    version, cached = await search_cache.get(facet_params, record=False)
+    if cached is not None:
+        # Пустые фасеты кэш хранит маркером пустой выдачи
+        return cached[1] or {}
+    facets = await search_service.facets(
+        q=params.q,
         language=params.language,
         fields=params.fields,
-        total=total,
-        results=[SearchResultItem.model_validate(r) for r in results]
-    )
\ No newline at end of file
+        category=params.category,
+        tag=params.tag,
+    )
+    await search_cache.set(version, facet_params, int(bool(facets)), facets)
+    return facets
+
+
+@router.get("/suggest", response_model=SuggestResponse)
+async def suggest_titles(
+    q: str = Query(..., min_length=1, max_length=100, description="Начало заголовка или любого его слова"),
+    limit: int = Query(10, ge=1, le=SUGGEST_TOP_K),
+    db: AsyncSession = Depends(get_db),
+):
+    """Подсказки заголовков на каждое нажатие клавиши: индекс в памяти воркера, без запроса к БД"""
+    results, source = [], "memory"
+    if title_suggest_index.ready:
+        results = title_suggest_index.suggest(q, limit)
+    if not results:
+        # Индекс ещё строится (или потерял LISTEN) либо префикс не найден - возможно, опечатка
+        results, source = await fallback_suggest(db, q, limit), "trgm"
+    return SuggestResponse(query=q, source=source, results=results)
+
+
+@router.post("/suggest/select", status_code=status.HTTP_204_NO_CONTENT)
+async def select_suggestion(selection: SuggestSelection):
+    await record_selection(str(selection.article_id))
+
+
+@router.get("/sync-status", response_model=SearchSyncStatus)
+async def search_sync_status(db: AsyncSession = Depends(get_db)):
+    """Лидер синхронизации с Typesense и отставание очереди search_sync_queue"""
+    return SearchSyncStatus.model_validate(await TypesenseSyncWorker.get_status(db))
@@ -1,20 +1,32 @@
+from typing import Optional
 from fastapi_cache import FastAPICache
 from fastapi_cache.backends.redis import RedisBackend
 from redis import asyncio as aioredis
 from app.core.config import settings
 
+redis_client: Optional[aioredis.Redis] = None
+
+def get_redis() -> aioredis.Redis:
+    """
+    Возвращает общий для процесса клиент Redis (создаётся при первом обращении)
+    """
+    global redis_client
+    if redis_client is None:
+        redis_client = aioredis.from_url(
+            settings.redis_url,
+            encoding="utf8",
+            decode_responses=True,
+            socket_timeout=5,
+            retry_on_timeout=True,
+            max_connections=100
+        )
+    return redis_client
+
 async def init_redis_cache():
     """
     Инициализирует подключение к Redis и настраивает кэширование
     """
-    redis = aioredis.from_url(
-        settings.redis_url,
-        encoding="utf8",
-        decode_responses=True,
-        socket_timeout=5,
-        retry_on_timeout=True,
-        max_connections=100
-    )
+    redis = get_redis()
     
     if not await redis.ping():
         raise ConnectionError("Failed to connect to Redis")
@@ -36,4 +48,4 @@ def custom_key_builder(
     Кастомный билдер ключей для кэша
     Формат: namespace:module:function:args:kwargs
     """
-    return f"{namespace}:{func.__module__}:{func.__name__}:{args}:{kwargs}"
\ No newline at end of file
+    return f"{namespace}:{func.__module__}:{func.__name__}:{args}:{kwargs}"
@@ -1,7 +1,7 @@
 from pydantic import Field, field_validator
 from pydantic_settings import BaseSettings
 from typing import List
-from app.core.enums import SearchEngineType
+from app.core.enums import EmbeddingSource, SearchEngineType, TypesenseIndexMode, VandalismCheckMode
 import os
 
 class Settings(BaseSettings):
@@ -48,18 +48,113 @@ class Settings(BaseSettings):
     minio_public_url: str = Field("http://localhost:9000", alias="MINIO_PUBLIC_URL")
 
     SEARCH_ENGINE: SearchEngineType = Field(SearchEngineType.POSTGRES, env="SEARCH_ENGINE")
+    # Подсчёт совпадений останавливается на этом числе (0 - точное количество)
+    SEARCH_MATCH_CAP: int = Field(0, alias="SEARCH_MATCH_CAP")
+    # Разделы головы (article_sections): сниппет строится по лучшему разделу, а не по всей статье
+    SEARCH_SECTIONS_ENABLED: bool = Field(False, alias="SEARCH_SECTIONS_ENABLED")
+    # Кэш выдачи с версией индекса в ключе: устаревает при изменении статьи, TTL может быть долгим (0 - выключен)
+    SEARCH_CACHE_TTL: int = Field(3600, alias="SEARCH_CACHE_TTL")
+    SEARCH_CACHE_NEGATIVE_TTL: int = Field(600, alias="SEARCH_CACHE_NEGATIVE_TTL")
+    # Курсор следующей страницы (next_cursor) действителен, пока не изменился индекс, но не дольше этого
+    SEARCH_CURSOR_TTL_SECONDS: int = Field(3600, alias="SEARCH_CURSOR_TTL_SECONDS")
+    # Значений на фасет (раздел, тег) в ответе поиска с facets=true
+    SEARCH_FACET_LIMIT: int = Field(20, alias="SEARCH_FACET_LIMIT")
+    # SEARCH_ENGINE=embedded: каталог сегментов, который лидер синхронизации пишет, а все воркеры читают через mmap
+    SEARCH_EMBEDDED_INDEX_PATH: str = Field("search_index", alias="SEARCH_EMBEDDED_INDEX_PATH")
+    # Больше сегментов - самые новые сливаются в один
+    SEARCH_EMBEDDED_MAX_SEGMENTS: int = Field(16, alias="SEARCH_EMBEDDED_MAX_SEGMENTS")
+    SEARCH_EMBEDDED_TITLE_BOOST: float = Field(2.0, alias="SEARCH_EMBEDDED_TITLE_BOOST")
+    # Подсказки заголовков (/search/suggest) из памяти воркера; выключено - только pg_trgm
+    SEARCH_SUGGEST_ENABLED: bool = Field(True, alias="SEARCH_SUGGEST_ENABLED")
+    # Ключи подсказок - хвосты заголовка с каждого из первых N слов
+    SEARCH_SUGGEST_WORD_KEYS: int = Field(4, alias="SEARCH_SUGGEST_WORD_KEYS")
+    SEARCH_SUGGEST_CACHE_SIZE: int = Field(50000, alias="SEARCH_SUGGEST_CACHE_SIZE")
+    SEARCH_SUGGEST_POPULARITY_REFRESH_SECONDS: int = Field(60, alias="SEARCH_SUGGEST_POPULARITY_REFRESH_SECONDS")
+    # Синхронизация с Typesense по LISTEN/NOTIFY: уведомления копятся SEARCH_SYNC_DEBOUNCE_MS
+    # (но не дольше SEARCH_SYNC_MAX_DELAY_MS), страховочный проход очереди - раз в SEARCH_SYNC_SWEEP_SECONDS
+    SEARCH_SYNC_DEBOUNCE_MS: int = Field(200, alias="SEARCH_SYNC_DEBOUNCE_MS")
+    SEARCH_SYNC_MAX_DELAY_MS: int = Field(1000, alias="SEARCH_SYNC_MAX_DELAY_MS")
+    SEARCH_SYNC_SWEEP_SECONDS: int = Field(300, alias="SEARCH_SYNC_SWEEP_SECONDS")
+    SEARCH_SYNC_BATCH_SIZE: int = Field(100, alias="SEARCH_SYNC_BATCH_SIZE")
+    # Параллельные потребители очереди у лидера (пачки захватываются через SKIP LOCKED)
+    SEARCH_SYNC_CONSUMERS: int = Field(1, alias="SEARCH_SYNC_CONSUMERS")
+    SEARCH_SYNC_LEASE_SECONDS: int = Field(120, alias="SEARCH_SYNC_LEASE_SECONDS")
+    # Синхронизирует один воркер-лидер (advisory lock), остальные пробуют стать лидером с этим интервалом
+    SEARCH_SYNC_LEADER_RETRY_SECONDS: int = Field(10, alias="SEARCH_SYNC_LEADER_RETRY_SECONDS")
+    SEARCH_SYNC_HEARTBEAT_SECONDS: int = Field(5, alias="SEARCH_SYNC_HEARTBEAT_SECONDS")
+    # Размер одного запроса import_ в Typesense (JSONL), байт
+    SEARCH_SYNC_IMPORT_CHUNK_BYTES: int = Field(2 * 1024 * 1024, alias="SEARCH_SYNC_IMPORT_CHUNK_BYTES")
     TYPESENSE_HOST: str = Field(...,alias="TYPESENSE_HOST")
     TYPESENSE_PORT: int = Field(...,alias="TYPESENSE_PORT")
     TYPESENSE_API_KEY: str = Field(...,alias="TYPESENSE_API_KEY")
     TYPESENSE_EMBEDDING_MODEL: str = Field("ts/multilingual-e5-base", env="TYPESENSE_EMBEDDING_MODEL")
+    TYPESENSE_INDEX_MODE: TypesenseIndexMode = Field(TypesenseIndexMode.ARTICLE, alias="TYPESENSE_INDEX_MODE")
+    # Размер фрагмента в режиме passage: e5 видит 512 токенов, длиннее эмбеддер обрезает
+    TYPESENSE_PASSAGE_MAX_CHARS: int = Field(1500, alias="TYPESENSE_PASSAGE_MAX_CHARS")
+    # local: документы и запросы эмбеддит сервис моделей (EMBEDDING_SERVICE_URL), Typesense не делает инференс
+    TYPESENSE_EMBEDDING_SOURCE: EmbeddingSource = Field(EmbeddingSource.TYPESENSE, alias="TYPESENSE_EMBEDDING_SOURCE")
+    EMBEDDING_SERVICE_URL: str = Field("http://localhost:8010/models/embeddings/", alias="EMBEDDING_SERVICE_URL")
+    # Модель сервиса (часть ключа кэша) и размерность поля embedding
+    EMBEDDING_MODEL: str = Field("intfloat/multilingual-e5-base", alias="EMBEDDING_MODEL")
+    EMBEDDING_DIMENSIONS: int = Field(768, alias="EMBEDDING_DIMENSIONS")
+    EMBEDDING_BATCH_SIZE: int = Field(64, alias="EMBEDDING_BATCH_SIZE")
+    EMBEDDING_TIMEOUT: float = Field(30.0, alias="EMBEDDING_TIMEOUT")
+    # Модель всё равно видит 512 токенов: хвост документа не отправляется
+    EMBEDDING_MAX_CHARS: int = Field(4000, alias="EMBEDDING_MAX_CHARS")
+    QUERY_EMBEDDING_CACHE_TTL: int = Field(7 * 86400, alias="QUERY_EMBEDDING_CACHE_TTL")
 
     # Vandalism Detection
     VANDALISM_CHECK_URL: str = Field(
         "http://localhost:8010/models/vandalism/", alias="VANDALISM_CHECK_URL"
     )
+    # Реплики сервиса модели через запятую; если не заданы, используется VANDALISM_CHECK_URL
+    VANDALISM_CHECK_URLS: str = Field("", alias="VANDALISM_CHECK_URLS")
+    VANDALISM_CONNECT_TIMEOUT: float = Field(0.5, alias="VANDALISM_CONNECT_TIMEOUT")
+    VANDALISM_READ_TIMEOUT: float = Field(5.0, alias="VANDALISM_READ_TIMEOUT")
+    VANDALISM_MAX_CONNECTIONS: int = Field(20, alias="VANDALISM_MAX_CONNECTIONS")
+    # Через сколько мс без ответа запрос дублируется на следующую реплику
+    VANDALISM_HEDGE_DELAY_MS: int = Field(300, alias="VANDALISM_HEDGE_DELAY_MS")
+    VANDALISM_CIRCUIT_FAILURES: int = Field(5, alias="VANDALISM_CIRCUIT_FAILURES")
+    VANDALISM_CIRCUIT_RESET_SECONDS: float = Field(30.0, alias="VANDALISM_CIRCUIT_RESET_SECONDS")
     ENABLE_VANDALISM_CHECK: bool = Field(False, alias="ENABLE_VANDALISM_CHECK")
     VANDALISM_REVERT_THRESHOLD: float = Field(0.8, alias="VANDALISM_REVERT_THRESHOLD")
     VANDALISM_MODERATION_THRESHOLD: float = Field(0.6, alias="VANDALISM_MODERATION_THRESHOLD")
+    # sync - проверка до записи коммита, async - коммит принимается сразу, проверка в фоне
+    VANDALISM_CHECK_MODE: VandalismCheckMode = Field(VandalismCheckMode.SYNC, alias="VANDALISM_CHECK_MODE")
+    # Роли, которые в async-режиме всё равно проверяются синхронно (через запятую)
+    VANDALISM_SYNC_ROLES: str = Field("", alias="VANDALISM_SYNC_ROLES")
+    VANDALISM_QUEUE_POLL_INTERVAL: float = Field(2.0, alias="VANDALISM_QUEUE_POLL_INTERVAL")
+    VANDALISM_QUEUE_BATCH_SIZE: int = Field(20, alias="VANDALISM_QUEUE_BATCH_SIZE")
+    VANDALISM_QUEUE_LEASE_SECONDS: int = Field(120, alias="VANDALISM_QUEUE_LEASE_SECONDS")
+    VANDALISM_QUEUE_MAX_ATTEMPTS: int = Field(5, alias="VANDALISM_QUEUE_MAX_ATTEMPTS")
+    # Учётная запись, от имени которой воркер откатывает вандализм; если не задана - самый старый активный админ
+    VANDALISM_BOT_USER_ID: str = Field("", alias="VANDALISM_BOT_USER_ID")
+    # Репутация авторов: доверенные пропускают проверку или проходят только быстрый фильтр
+    TRUST_ENABLED: bool = Field(False, alias="TRUST_ENABLED")
+    TRUST_REFRESH_SECONDS: int = Field(3600, alias="TRUST_REFRESH_SECONDS")
+    # Роли с правом модерации (permissions.can_moderate)
+    TRUST_TRUSTED_ROLES: str = Field("admin,editor", alias="TRUST_TRUSTED_ROLES")
+    TRUST_MIN_COMMITS: int = Field(20, alias="TRUST_MIN_COMMITS")
+    TRUST_MIN_ACCOUNT_AGE_DAYS: int = Field(14, alias="TRUST_MIN_ACCOUNT_AGE_DAYS")
+    TRUST_FULL_COMMITS: int = Field(200, alias="TRUST_FULL_COMMITS")
+    TRUST_FULL_ACCOUNT_AGE_DAYS: int = Field(180, alias="TRUST_FULL_ACCOUNT_AGE_DAYS")
+    TRUST_FLAG_PENALTY: float = Field(0.3, alias="TRUST_FLAG_PENALTY")
+    TRUST_SKIP_THRESHOLD: float = Field(0.9, alias="TRUST_SKIP_THRESHOLD")
+    TRUST_LIGHT_THRESHOLD: float = Field(0.6, alias="TRUST_LIGHT_THRESHOLD")
+
+    @property
+    def vandalism_check_urls(self) -> List[str]:
+        urls = [url.strip() for url in self.VANDALISM_CHECK_URLS.split(",") if url.strip()]
+        return urls or [self.VANDALISM_CHECK_URL]
+
+    @property
+    def vandalism_sync_roles(self) -> List[str]:
+        return [role.strip() for role in self.VANDALISM_SYNC_ROLES.split(",") if role.strip()]
+
+    @property
+    def trust_trusted_roles(self) -> List[str]:
+        return [role.strip() for role in self.TRUST_TRUSTED_ROLES.split(",") if role.strip()]
+
     class Config:
         env_file = ".env"
         env_file_encoding = 'utf-8'
@@ -26,6 +26,10 @@ AsyncSessionLocal = async_sessionmaker(
 
 Base = declarative_base()
 
+def asyncpg_dsn() -> str:
+    """DSN для прямого подключения asyncpg (LISTEN/NOTIFY, advisory locks) вне пула SQLAlchemy"""
+    return settings.database_url.replace("postgresql+asyncpg://", "postgresql://", 1)
+
 async def get_db():
     async with AsyncSessionLocal() as session:
         try:
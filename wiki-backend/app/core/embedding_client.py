@@ -0,0 +1,70 @@
+# app/core/embedding_client.py
+import logging
+import time
+from typing import List, Optional
+
+import httpx
+
+from app.core.config import settings
+from app.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingServiceUnavailable(Exception):
+    """Сервис моделей не вернул эмбеддинги"""
+
+
+class EmbeddingClient:
+    """
+    Клиент эндпоинта эмбеддингов сервиса моделей (TYPESENSE_EMBEDDING_SOURCE=local).
+    Тексты отправляются пачками по EMBEDDING_BATCH_SIZE через общий пул соединений.
+    """
+
+    def __init__(self):
+        self.client: Optional[httpx.AsyncClient] = None
+
+    async def initialize(self):
+        self.get_client()
+
+    async def close(self):
+        if self.client:
+            await self.client.aclose()
+            self.client = None
+
+    def get_client(self) -> httpx.AsyncClient:
+        if self.client is None:
+            self.client = httpx.AsyncClient(
+                timeout=httpx.Timeout(settings.EMBEDDING_TIMEOUT, connect=settings.VANDALISM_CONNECT_TIMEOUT),
+                limits=httpx.Limits(max_connections=10, max_keepalive_connections=10, keepalive_expiry=30.0),
+            )
+        return self.client
+
+    async def embed(self, texts: List[str], kind: str = "passage") -> List[List[float]]:
+        """kind: query - поисковый запрос, passage - документ (у e5 разные префиксы)"""
+        embeddings: List[List[float]] = []
+        for start in range(0, len(texts), settings.EMBEDDING_BATCH_SIZE):
+            batch = [text[:settings.EMBEDDING_MAX_CHARS] for text in texts[start:start + settings.EMBEDDING_BATCH_SIZE]]
+            started = time.perf_counter()
+            try:
+                response = await self.get_client().post(
+                    settings.EMBEDDING_SERVICE_URL, json={"texts": batch, "kind": kind}
+                )
+                response.raise_for_status()
+                data = response.json()
+            except Exception as e:
+                await metrics.incr("embedding.errors")
+                raise EmbeddingServiceUnavailable(f"Embedding request failed: {e!r}") from e
+            finally:
+                await metrics.observe(f"embedding.{kind}", (time.perf_counter() - started) * 1000)
+            if data.get("dimensions") != settings.EMBEDDING_DIMENSIONS:
+                raise EmbeddingServiceUnavailable(
+                    f"Embedding model returned {data.get('dimensions')} dimensions, "
+                    f"EMBEDDING_DIMENSIONS is {settings.EMBEDDING_DIMENSIONS}"
+                )
+            embeddings.extend(data["embeddings"])
+        return embeddings
+
+
+# Глобальный экземпляр
+embedding_client = EmbeddingClient()
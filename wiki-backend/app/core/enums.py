@@ -3,4 +3,22 @@ from enum import Enum
 
 class SearchEngineType(str, Enum):
     POSTGRES = "postgres"
-    TYPESENSE = "typesense"
\ No newline at end of file
+    TYPESENSE = "typesense"
+    EMBEDDED = "embedded"  # BM25 по сегментам на диске внутри процесса (search_services/embedded_index.py)
+
+class TypesenseIndexMode(str, Enum):
+    ARTICLE = "article"  # документ на статью (коллекция articles)
+    PASSAGE = "passage"  # документ на фрагмент головы (коллекция article_passages), группировка по статье
+
+class EmbeddingSource(str, Enum):
+    TYPESENSE = "typesense"  # встроенная модель Typesense считает эмбеддинги при import и на каждый запрос
+    LOCAL = "local"  # эмбеддинги считает сервис моделей, в Typesense они приходят готовыми
+
+class VandalismCheckMode(str, Enum):
+    SYNC = "sync"
+    ASYNC = "async"
+
+class TrustTier(str, Enum):
+    SKIP = "skip"  # проверка не выполняется
+    LIGHT = "light"  # только быстрый фильтр сервиса модели
+    FULL = "full"  # полная проверка трансформером
@@ -0,0 +1,90 @@
+# app/core/metrics.py
+import bisect
+import logging
+from typing import Any, Dict, Optional
+
+from app.core.cache import get_redis
+
+logger = logging.getLogger(__name__)
+
+# Верхние границы корзин гистограммы задержек (мс)
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+METRICS_PREFIX = "wiki-metrics"
+
+
+class Metrics:
+    """
+    Счётчики и гистограммы задержек в Redis, общие для всех воркеров uvicorn.
+    Ошибки Redis не должны влиять на обработку запросов, поэтому они только логируются.
+    """
+
+    def __init__(self, prefix: str = METRICS_PREFIX):
+        self.prefix = prefix
+
+    @property
+    def counters_key(self) -> str:
+        return f"{self.prefix}:counters"
+
+    def histogram_key(self, name: str) -> str:
+        return f"{self.prefix}:hist:{name}"
+
+    async def incr(self, name: str, amount: int = 1):
+        try:
+            await get_redis().hincrby(self.counters_key, name, amount)
+        except Exception as e:
+            logger.debug(f"Failed to update metric {name}: {e}")
+
+    async def observe(self, name: str, value_ms: float):
+        idx = bisect.bisect_left(LATENCY_BUCKETS_MS, value_ms)
+        bucket = str(LATENCY_BUCKETS_MS[idx]) if idx < len(LATENCY_BUCKETS_MS) else "+Inf"
+        key = self.histogram_key(name)
+        try:
+            async with get_redis().pipeline(transaction=False) as pipe:
+                pipe.hincrby(key, bucket, 1)
+                pipe.hincrby(key, "count", 1)
+                pipe.hincrbyfloat(key, "sum", value_ms)
+                await pipe.execute()
+        except Exception as e:
+            logger.debug(f"Failed to update histogram {name}: {e}")
+
+    async def get_counter(self, name: str) -> int:
+        value = await get_redis().hget(self.counters_key, name)
+        return int(value) if value else 0
+
+    async def snapshot(self) -> Dict[str, Any]:
+        redis = get_redis()
+        counters = await redis.hgetall(self.counters_key)
+        histograms = {}
+        hist_prefix = self.histogram_key("")
+        async for key in redis.scan_iter(match=f"{hist_prefix}*"):
+            histograms[key[len(hist_prefix):]] = self._summarize(await redis.hgetall(key))
+        return {
+            "counters": {name: int(value) for name, value in counters.items()},
+            "latency_ms": histograms,
+        }
+
+    def _summarize(self, raw: Dict[str, str]) -> Dict[str, Optional[float]]:
+        count = int(raw.get("count", 0))
+        total = float(raw.get("sum", 0))
+        summary: Dict[str, Optional[float]] = {
+            "count": count,
+            "avg": round(total / count, 3) if count else None,
+        }
+        for quantile in (0.5, 0.95, 0.99):
+            summary[f"p{int(quantile * 100)}"] = self._quantile(raw, count, quantile)
+        return summary
+
+    def _quantile(self, raw: Dict[str, str], count: int, quantile: float) -> Optional[float]:
+        """Оценка квантиля по верхней границе корзины (None - больше последней корзины)"""
+        if not count:
+            return None
+        target = quantile * count
+        seen = 0
+        for bound in LATENCY_BUCKETS_MS:
+            seen += int(raw.get(str(bound), 0))
+            if seen >= target:
+                return float(bound)
+        return None
+
+
+metrics = Metrics()
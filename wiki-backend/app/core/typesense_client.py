@@ -2,6 +2,7 @@
 import typesense
 from typesense import AsyncClient
 from app.core.config import settings
+from app.core.enums import EmbeddingSource, TypesenseIndexMode
 
 
 class TypesenseClient:
@@ -40,31 +41,101 @@ async def get_typesense_client() -> AsyncClient:
     return typesense_client.get_client()
 
 EMBEDDING_MODEL = settings.TYPESENSE_EMBEDDING_MODEL
-async def ensure_typesense_collection():
-    """Создаёт коллекцию с поддержкой семантического поиска."""
-    schema = {
-        'name': 'articles',
+# Имя, по которому приложение ищет и пишет статьи: коллекция или алиас на неё
+# (полная переиндексация строит новую коллекцию и переключает алиас)
+ARTICLES_COLLECTION = 'articles'
+PASSAGES_COLLECTION = 'article_passages'
+
+
+def embedding_field(source_fields: list) -> dict:
+    """
+    Поле эмбеддинга: встроенная модель Typesense считает его из source_fields при import
+    и для каждого запроса; с TYPESENSE_EMBEDDING_SOURCE=local вектор приходит готовым.
+    """
+    if settings.TYPESENSE_EMBEDDING_SOURCE == EmbeddingSource.LOCAL:
+        return {'name': 'embedding', 'type': 'float[]', 'num_dim': settings.EMBEDDING_DIMENSIONS}
+    return {
+        'name': 'embedding',
+        'type': 'float[]',
+        'embed': {
+            'from': source_fields,
+            'model_config': {
+                'model_name': EMBEDDING_MODEL
+            }
+        }
+    }
+
+
+def articles_schema(name: str = ARTICLES_COLLECTION) -> dict:
+    """
+    Схема коллекции статей с поддержкой семантического поиска.
+    categories - пути разделов статьи вместе с предками, tags - теги (фильтры и фасеты поиска)
+    """
+    return {
+        'name': name,
         'fields': [
             {'name': 'id', 'type': 'string'},
             {'name': 'title', 'type': 'string'},
             {'name': 'content', 'type': 'string'},
             {'name': 'language', 'type': 'string', 'facet': True},
+            {'name': 'categories', 'type': 'string[]', 'facet': True, 'optional': True},
+            {'name': 'tags', 'type': 'string[]', 'facet': True, 'optional': True},
             {'name': 'created_at', 'type': 'int64'},
             {'name': 'updated_at', 'type': 'int64'},
-            {
-                'name': 'embedding',
-                'type': 'float[]',
-                'embed': {
-                    'from': ['title', 'content'],          # поля для генерации эмбеддинга
-                    'model_config': {
-                        'model_name': EMBEDDING_MODEL
-                    }
-                }
-            }
+            embedding_field(['title', 'content']),          # поля для генерации эмбеддинга
         ],
         'default_sorting_field': 'updated_at'
     }
+
+
+def passages_schema(name: str = PASSAGES_COLLECTION) -> dict:
+    """
+    Схема коллекции фрагментов: документ на раздел головы статьи (не длиннее
+    TYPESENSE_PASSAGE_MAX_CHARS), эмбеддинг на фрагмент. article_id - facet, чтобы
+    группировать попадания по статье (group_by).
+    """
+    return {
+        'name': name,
+        'fields': [
+            {'name': 'id', 'type': 'string'},
+            {'name': 'article_id', 'type': 'string', 'facet': True},
+            {'name': 'title', 'type': 'string'},
+            {'name': 'heading', 'type': 'string', 'optional': True},
+            {'name': 'content', 'type': 'string'},
+            {'name': 'position', 'type': 'int32'},
+            {'name': 'language', 'type': 'string', 'facet': True},
+            {'name': 'categories', 'type': 'string[]', 'facet': True, 'optional': True},
+            {'name': 'tags', 'type': 'string[]', 'facet': True, 'optional': True},
+            {'name': 'created_at', 'type': 'int64'},
+            {'name': 'updated_at', 'type': 'int64'},
+            embedding_field(['title', 'heading', 'content']),
+        ],
+        'default_sorting_field': 'updated_at'
+    }
+
+
+def index_collection(mode: TypesenseIndexMode | None = None) -> str:
+    """Коллекция (или алиас), в которую пишет синхронизация и по которой идёт поиск"""
+    mode = mode or settings.TYPESENSE_INDEX_MODE
+    return PASSAGES_COLLECTION if mode == TypesenseIndexMode.PASSAGE else ARTICLES_COLLECTION
+
+
+def index_schema(name: str, mode: TypesenseIndexMode | None = None) -> dict:
+    mode = mode or settings.TYPESENSE_INDEX_MODE
+    return passages_schema(name) if mode == TypesenseIndexMode.PASSAGE else articles_schema(name)
+
+
+async def ensure_typesense_collection():
+    """Создаёт коллекцию с поддержкой семантического поиска."""
+    name = index_collection()
+    schema = index_schema(name)
     typesense_client = await get_typesense_client()
+    try:
+        # Коллекцию за алиасом ведёт scripts/reindex_typesense.py
+        await typesense_client.aliases[name].retrieve()
+        return
+    except typesense.exceptions.ObjectNotFound:
+        pass
     try:
         
         await typesense_client.collections.create(schema)
@@ -72,5 +143,5 @@ async def ensure_typesense_collection():
         # Если коллекция существует, можно либо обновить её (удалив и создав заново),
         # либо использовать миграцию (но Typesense не поддерживает изменение схемы на лету,
         # поэтому проще пересоздать коллекцию с новыми данными).
-        await typesense_client.collections['articles'].delete()
-        await typesense_client.collections.create(schema)
\ No newline at end of file
+        await typesense_client.collections[name].delete()
+        await typesense_client.collections.create(schema)
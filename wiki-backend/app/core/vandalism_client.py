@@ -0,0 +1,203 @@
+# app/core/vandalism_client.py
+import asyncio
+import logging
+import time
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+from app.core.config import settings
+from app.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class VandalismServiceUnavailable(Exception):
+    """Ни одна реплика сервиса модели не вернула ответ"""
+
+
+class CircuitBreaker:
+    """
+    Размыкается после failure_threshold ошибок подряд. Пока цепь разомкнута,
+    запросы к реплике не отправляются; через reset_timeout пропускается один
+    пробный запрос, успешный ответ замыкает цепь.
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow_request(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open":
+            # Пробный запрос один: остальные снова ждут reset_timeout
+            self.opened_at = time.monotonic()
+            return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self):
+        self.failures += 1
+        if self.failures >= self.failure_threshold:
+            if self.opened_at is None:
+                logger.warning("Vandalism service circuit opened")
+            self.opened_at = time.monotonic()
+
+
+class VandalismClient:
+    """
+    Общий для процесса клиент сервиса модели вандализма: пул keep-alive соединений,
+    короткие таймауты, circuit breaker на каждую реплику и hedging между репликами.
+    """
+
+    def __init__(self):
+        self.client: Optional[httpx.AsyncClient] = None
+        self.urls: List[str] = settings.vandalism_check_urls
+        self.breakers: Dict[str, CircuitBreaker] = {
+            url: CircuitBreaker(settings.VANDALISM_CIRCUIT_FAILURES, settings.VANDALISM_CIRCUIT_RESET_SECONDS)
+            for url in self.urls
+        }
+
+    async def initialize(self):
+        """Создаёт пул соединений."""
+        self.get_client()
+
+    async def close(self):
+        if self.client:
+            await self.client.aclose()
+            self.client = None
+
+    def get_client(self) -> httpx.AsyncClient:
+        if self.client is None:
+            self.client = httpx.AsyncClient(
+                timeout=httpx.Timeout(
+                    connect=settings.VANDALISM_CONNECT_TIMEOUT,
+                    read=settings.VANDALISM_READ_TIMEOUT,
+                    write=settings.VANDALISM_READ_TIMEOUT,
+                    pool=settings.VANDALISM_CONNECT_TIMEOUT,
+                ),
+                limits=httpx.Limits(
+                    max_connections=settings.VANDALISM_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.VANDALISM_MAX_CONNECTIONS,
+                    keepalive_expiry=30.0,
+                ),
+            )
+        return self.client
+
+    async def score(
+        self,
+        added_text: str,
+        removed_text: str,
+        max_tier: str = "transformer",
+        article_length: Optional[int] = None,
+        trusted_author: bool = False,
+    ) -> Tuple[float, bool]:
+        """
+        Возвращает (confidence, is_vandalism). max_tier="fast" - только быстрый фильтр сервиса.
+        article_length - длина статьи до правки, по ней сервис распознаёт массовое удаление.
+        trusted_author - автор с репутацией, его мелкие правки сервис пропускает без модели.
+        Бросает VandalismServiceUnavailable, если все реплики недоступны или цепь разомкнута.
+        """
+        # Только проверка состояния: пробный запрос полуоткрытой цепи занимается перед самой отправкой
+        if all(self.breakers[url].state == "open" for url in self.urls):
+            await metrics.incr("vandalism.circuit_open")
+            raise VandalismServiceUnavailable("All vandalism service replicas are circuit-broken")
+
+        payload = {
+            "added_text": added_text,
+            "removed_text": removed_text,
+            "max_tier": max_tier,
+            "article_length": article_length,
+            "trusted_author": trusted_author,
+        }
+        started = time.perf_counter()
+        try:
+            result = await self._hedged_post(self.urls, payload)
+        except VandalismServiceUnavailable:
+            await metrics.incr("vandalism.errors")
+            raise
+        finally:
+            await metrics.observe("vandalism.request", (time.perf_counter() - started) * 1000)
+
+        await metrics.incr("vandalism.requests")
+        confidence = result.get("confidence", 0)
+        predicted_class = result.get("predicted_class", 0)
+        return confidence, predicted_class == 1
+
+    async def _post(self, url: str, payload: dict) -> dict:
+        try:
+            response = await self.get_client().post(url, json=payload)
+            response.raise_for_status()
+            data = response.json()
+        except Exception:
+            self.breakers[url].record_failure()
+            raise
+        self.breakers[url].record_success()
+        return data
+
+    async def _hedged_post(self, urls: List[str], payload: dict) -> dict:
+        """
+        Отправляет запрос первой реплике. Если за VANDALISM_HEDGE_DELAY_MS ответа нет
+        (или реплика ответила ошибкой), запрос дублируется следующей. Возвращается
+        первый успешный ответ, остальные запросы отменяются. Circuit breaker реплики
+        спрашивается прямо перед отправкой ей запроса: если ответ пришёл раньше,
+        пробный запрос полуоткрытой цепи не расходуется впустую.
+        """
+        remaining = list(urls)
+        pending = set()
+        last_error: Optional[BaseException] = None
+        hedge_delay = settings.VANDALISM_HEDGE_DELAY_MS / 1000
+        try:
+            while remaining or pending:
+                url = self._next_allowed(remaining)
+                if url is not None:
+                    if pending:
+                        await metrics.incr("vandalism.hedged_requests")
+                    pending.add(asyncio.create_task(self._post(url, payload)))
+                if not pending:
+                    break
+
+                done, pending = await asyncio.wait(
+                    pending,
+                    timeout=hedge_delay if remaining else None,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    last_error = task.exception()
+                    logger.warning(f"Vandalism service replica failed: {last_error!r}")
+        finally:
+            for task in pending:
+                task.cancel()
+
+        if last_error is None:
+            raise VandalismServiceUnavailable("All vandalism service replicas are circuit-broken")
+        raise VandalismServiceUnavailable(f"Vandalism service request failed: {last_error!r}")
+
+    def _next_allowed(self, remaining: List[str]) -> Optional[str]:
+        """Следующая реплика, чья цепь пропускает запрос; реплики с разомкнутой цепью пропускаются"""
+        while remaining:
+            url = remaining.pop(0)
+            if self.breakers[url].allow_request():
+                return url
+        return None
+
+
+# Глобальный экземпляр
+vandalism_client = VandalismClient()
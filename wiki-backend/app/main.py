@@ -6,7 +6,11 @@ from sqlalchemy import text
 from app.core.database import AsyncSessionLocal
 
 from app.core.typesense_client import typesense_client
+from app.core.vandalism_client import vandalism_client
+from app.core.embedding_client import embedding_client
 from app.services.typesense_sync_worker import TypesenseSyncWorker
+from app.services.search_services.title_suggest import TitleSuggestListener
+from app.services.vandalism_worker import VandalismScoringWorker
 import typesense.exceptions
 
 def ensure_typesense_collection():
@@ -38,6 +42,7 @@ async def check_database_connection():
         print(f"Database connection failed: {e}")
         return False
 from app.core.config import settings
+from app.core.enums import VandalismCheckMode
 from app.core.cache import init_redis_cache
 from app.api.v1.router import api_router
 import os
@@ -62,15 +67,30 @@ async def startup_event():
     success = await check_database_connection()
     print(f"Search engine is:{settings.SEARCH_ENGINE}")
     await typesense_client.initialize()
-    sync_worker = TypesenseSyncWorker(interval_seconds=60)
-    asyncio.create_task(sync_worker.run())
+    await vandalism_client.initialize()
+    app.state.sync_worker = TypesenseSyncWorker()
+    asyncio.create_task(app.state.sync_worker.run())
+    app.state.suggest_listener = TitleSuggestListener() if settings.SEARCH_SUGGEST_ENABLED else None
+    if app.state.suggest_listener is not None:
+        asyncio.create_task(app.state.suggest_listener.run())
+    if settings.ENABLE_VANDALISM_CHECK and settings.VANDALISM_CHECK_MODE == VandalismCheckMode.ASYNC:
+        vandalism_worker = VandalismScoringWorker(
+            interval_seconds=settings.VANDALISM_QUEUE_POLL_INTERVAL,
+            batch_size=settings.VANDALISM_QUEUE_BATCH_SIZE
+        )
+        asyncio.create_task(vandalism_worker.run())
     if not success:
         raise Exception("Failed to connect to database")
     
 # Static files
 @app.on_event("shutdown")
 async def shutdown_event():
+    await app.state.sync_worker.stop()
+    if app.state.suggest_listener is not None:
+        await app.state.suggest_listener.stop()
     await typesense_client.close()
+    await vandalism_client.close()
+    await embedding_client.close()
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
 # API Router
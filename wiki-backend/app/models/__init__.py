@@ -10,6 +10,10 @@ from .template import Template
 from .permission import Permission
 from .branch_tag import BranchTag,BranchAccess,BranchTagPermission
 from .search_sync_table import SearchSyncQueue
+from .vandalism_check_queue import VandalismCheckQueue
+from .article_head import ArticleHead
+from .article_search_index import ArticleSearchIndex
+from .article_section import ArticleSection
 
 __all__ = [
     "User", "UserProfile", "ProfileVersion",
@@ -19,5 +23,6 @@ __all__ = [
     "Moderation", "Comment", "Media", "Template", "Permission",
     "BranchTag","BranchAccess","BranchTagPermission", "ArticleFull",
     "commit_media_association", "article_media_association",
-    "SearchSyncQueue"
+    "SearchSyncQueue", "VandalismCheckQueue", "ArticleHead",
+    "ArticleSearchIndex", "ArticleSection"
 ]
\ No newline at end of file
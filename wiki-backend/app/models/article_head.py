@@ -0,0 +1,31 @@
+# app/models/article_head.py
+from sqlalchemy import Column, String, DateTime, Index, ForeignKey, text
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
+from sqlalchemy.orm import relationship
+from app.core.database import Base
+
+class ArticleHead(Base):
+    """
+    Денормализованная "голова" статьи: текущий коммит ветки main и поля, нужные поиску.
+    Обновляется в той же транзакции, что и ветка main (ArticleHeadService.refresh).
+    """
+    __tablename__ = "article_heads"
+    __table_args__ = (
+        Index('ix_article_heads_head_commit_id', 'head_commit_id'),
+        Index('ix_article_heads_status', 'status'),
+        Index('ix_article_heads_language', 'language'),
+        # Запасной путь подсказок заголовков (TitleSuggestIndex ещё не построен, опечатки)
+        Index('ix_article_heads_title_trgm', text('lower(title) gin_trgm_ops'), postgresql_using='gin'),
+    )
+
+    article_id = Column(UUID(as_uuid=True), ForeignKey("articles.id", ondelete="CASCADE"), primary_key=True)
+    head_commit_id = Column(UUID(as_uuid=True), ForeignKey("commits.id"), nullable=False)
+    status = Column(String(20), nullable=False)
+    # Язык определяется один раз при смене головы (app.utils.language), по нему строится tsvector
+    language = Column(String(8))
+    ts_config = Column(String(32), nullable=False, server_default='simple')
+    title = Column(String(255), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    article = relationship("Article")
@@ -0,0 +1,21 @@
+# app/models/article_search_index.py
+from sqlalchemy import Column, DateTime, Index, ForeignKey
+from sqlalchemy.dialects.postgresql import UUID, TSVECTOR
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+class ArticleSearchIndex(Base):
+    """
+    Полнотекстовый индекс только по текущей голове main каждой статьи: один tsvector,
+    построенный конфигурацией article_heads.ts_config (язык статьи).
+    Заполняется триггерами БД при смене головы в article_heads, из кода не пишется.
+    """
+    __tablename__ = "article_search_index"
+    __table_args__ = (
+        Index('ix_article_search_index_tsv_gin', 'tsv', postgresql_using='gin'),
+    )
+
+    article_id = Column(UUID(as_uuid=True), ForeignKey("articles.id", ondelete="CASCADE"), primary_key=True)
+    commit_id = Column(UUID(as_uuid=True), ForeignKey("commits.id"), nullable=False)
+    tsv = Column(TSVECTOR)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
@@ -0,0 +1,19 @@
+# app/models/article_section.py
+from sqlalchemy import Column, ForeignKey, Integer, String, Text
+from sqlalchemy.dialects.postgresql import UUID, TSVECTOR
+from app.core.database import Base
+
+class ArticleSection(Base):
+    """
+    Разделы текущей головы main (app.utils.sections.split_sections) со своими tsvector.
+    Нужны только для сниппетов: ts_headline строится по лучшему разделу, а не по всей статье.
+    Заполняется ArticleHeadService при SEARCH_SECTIONS_ENABLED.
+    """
+    __tablename__ = "article_sections"
+
+    article_id = Column(UUID(as_uuid=True), ForeignKey("articles.id", ondelete="CASCADE"), primary_key=True)
+    position = Column(Integer, primary_key=True)
+    commit_id = Column(UUID(as_uuid=True), ForeignKey("commits.id"), nullable=False)
+    heading = Column(String(255))
+    body = Column(Text, nullable=False)
+    tsv = Column(TSVECTOR)
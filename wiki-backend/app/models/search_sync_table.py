@@ -1,21 +1,26 @@
 # app/models/typesense_queue.py
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, Index, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Index, ForeignKey
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.core.database import Base
 
 class SearchSyncQueue(Base):
+    """Статьи, ожидающие синхронизации с Typesense: одна запись на статью (повторные правки сливаются)."""
     __tablename__ = "search_sync_queue"
     __table_args__ = (
-        Index('ix_typesense_sync_queue_article_id', 'article_id'),
+        Index('ix_typesense_sync_queue_article_id', 'article_id', unique=True),
         Index('ix_typesense_sync_queue_created_at', 'created_at'),
     )
 
     id = Column(Integer, primary_key=True)
     article_id = Column(UUID(as_uuid=True), ForeignKey("articles.id"), nullable=False)
     operation = Column(String(10), nullable=False)  # 'upsert' or 'delete'
+    # Растёт при каждой новой правке статьи: запись удаляется, только если за время синхронизации правок не было
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    # Запись "арендована" потребителем до этого момента; после истечения её заберёт другой
+    locked_until = Column(DateTime(timezone=True))
+    # Время первой несинхронизированной правки (по нему считается отставание)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     article = relationship("Article", back_populates="sync_queue_items")
-    # Можно добавить поле processed, но проще удалять после обработки
\ No newline at end of file
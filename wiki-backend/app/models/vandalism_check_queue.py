@@ -0,0 +1,23 @@
+# app/models/vandalism_check_queue.py
+from sqlalchemy import Column, Integer, DateTime, Index, ForeignKey
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
+from sqlalchemy.orm import relationship
+from app.core.database import Base
+
+class VandalismCheckQueue(Base):
+    """Очередь коммитов, ожидающих фоновой проверки на вандализм (async-режим)."""
+    __tablename__ = "vandalism_check_queue"
+    __table_args__ = (
+        Index('ix_vandalism_check_queue_commit_id', 'commit_id', unique=True),
+        Index('ix_vandalism_check_queue_locked_until', 'locked_until'),
+    )
+
+    id = Column(Integer, primary_key=True)
+    commit_id = Column(UUID(as_uuid=True), ForeignKey("commits.id", ondelete="CASCADE"), nullable=False)
+    attempts = Column(Integer, nullable=False, default=0, server_default="0")
+    # Запись "арендована" воркером до этого момента; после истечения её заберёт другой воркер
+    locked_until = Column(DateTime(timezone=True))
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    commit = relationship("Commit")
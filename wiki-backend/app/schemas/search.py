@@ -1,14 +1,14 @@
 from pydantic import BaseModel, Field, ConfigDict
-from typing import Optional, List, Union
+from typing import Dict, Optional, List, Union
 from uuid import UUID
 from datetime import datetime
 class SearchQueryParams(BaseModel):
     """Параметры поискового запроса."""
     q: str = Field(..., min_length=1, description="Поисковый запрос")
     language: Optional[str] = Field(
-        "ru",
+        None,
         pattern="^(ru|en)$",
-        description="Язык для полнотекстового поиска (ru или en)"
+        description="Только статьи на этом языке (ru или en); без него - на любом языке"
     )
     fields: str = Field(
         "both",
@@ -17,6 +17,11 @@ class SearchQueryParams(BaseModel):
     )
     limit: int = Field(20, ge=1, le=100, description="Количество результатов на странице")
     offset: int = Field(0, ge=0, description="Смещение для пагинации")
+    cursor: Optional[str] = Field(
+        None,
+        max_length=1024,
+        description="next_cursor предыдущей страницы: продолжение выдачи без OFFSET (offset не учитывается)"
+    )
     hybrid: bool = Field(
         False,
         description="Использовать гибридный поиск (комбинация текстового и семантического)"
@@ -27,6 +32,17 @@ class SearchQueryParams(BaseModel):
         le=1.0,
         description="Вес семантической составляющей (0 - только текст, 1 - только семантика)"
     )
+    category: Optional[str] = Field(
+        None,
+        max_length=255,
+        pattern=r"^[\w-]+(\.[\w-]+)*$",
+        description="Путь раздела (ltree): статьи раздела и его подразделов"
+    )
+    tag: Optional[str] = Field(None, min_length=1, max_length=50, description="Тег статьи")
+    facets: bool = Field(
+        False,
+        description="Вернуть счётчики совпадений по разделам, тегам и языкам"
+    )
 
 
 class SearchResultItem(BaseModel):
@@ -46,6 +62,16 @@ class SearchResultItem(BaseModel):
         None,
         description="Сходство заголовка (pg_trgm similarity)"
     )
+    section: Optional[str] = Field(
+        None,
+        description="Заголовок раздела, из которого взят сниппет"
+    )
+
+
+class FacetValue(BaseModel):
+    """Значение фасета и число совпадений с ним."""
+    value: str
+    count: int
 
 
 class SearchResponse(BaseModel):
@@ -54,4 +80,48 @@ class SearchResponse(BaseModel):
     language: Optional[str]
     fields: str
     total: int
-    results: List[SearchResultItem]
\ No newline at end of file
+    # total упёрся в SEARCH_MATCH_CAP: совпадений больше, чем показано
+    total_capped: bool = False
+    results: List[SearchResultItem]
+    # Следующая страница (параметр cursor); None - страница последняя
+    next_cursor: Optional[str] = None
+    # Только с facets=true: category, tag, language
+    facets: Optional[Dict[str, List[FacetValue]]] = None
+
+
+class SuggestItem(BaseModel):
+    """Подсказка заголовка."""
+    id: UUID
+    title: str
+
+
+class SuggestResponse(BaseModel):
+    """Подсказки заголовков по префиксу."""
+    query: str
+    # memory - индекс в памяти воркера, trgm - запасной запрос к Postgres
+    source: str
+    results: List[SuggestItem]
+
+
+class SuggestSelection(BaseModel):
+    """Пользователь выбрал подсказку (популярность для ранжирования)."""
+    article_id: UUID
+
+
+class SearchSyncLeader(BaseModel):
+    """Heartbeat лидера синхронизации с Typesense."""
+    identity: str = Field(..., description="host:pid воркера-лидера")
+    leader_since: Optional[float] = None
+    heartbeat_at: float
+    heartbeat_age_seconds: float
+    last_sync_at: Optional[float] = None
+    last_sync_count: int = 0
+
+
+class SearchSyncStatus(BaseModel):
+    """Состояние синхронизации поиска: кто лидер и насколько отстаёт очередь."""
+    leader: Optional[SearchSyncLeader] = None
+    # pid серверного процесса Postgres, держащего advisory lock лидера
+    leader_backend_pid: Optional[int] = None
+    queued: int
+    lag_seconds: float
@@ -0,0 +1,126 @@
+# app/services/article_head_service.py
+import asyncio
+from typing import Iterable, Optional
+from uuid import UUID
+
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.article_head import ArticleHead
+from app.services.search_services.search_cache import mark_search_index_changed
+from app.services.typesense_indexer import TypesenseIndexer
+from app.utils.language import SAMPLE_CHARS, detect_language, ts_config_for
+from app.utils.sections import split_sections
+
+# Голова берётся из ветки main, статус и заголовок - из статьи.
+# Язык без :language (голова не менялась) остаётся прежним
+REFRESH_HEAD_SQL = """
+    INSERT INTO article_heads (article_id, head_commit_id, status, title, language, ts_config, updated_at)
+    SELECT a.id, b.head_commit_id, a.status, a.title, :language, COALESCE(:ts_config, 'simple'), now()
+    FROM articles a
+    JOIN branches b ON b.article_id = a.id AND b.name = 'main'
+    WHERE a.id = :article_id AND b.head_commit_id IS NOT NULL
+    ORDER BY b.created_at DESC
+    LIMIT 1
+    ON CONFLICT (article_id) DO UPDATE
+    SET head_commit_id = EXCLUDED.head_commit_id,
+        status = EXCLUDED.status,
+        title = EXCLUDED.title,
+        language = COALESCE(:language, article_heads.language),
+        ts_config = COALESCE(:ts_config, article_heads.ts_config),
+        updated_at = EXCLUDED.updated_at
+"""
+
+# Текст новой головы main; NULL, если голова не сменилась
+CHANGED_HEAD_TEXT_SQL = """
+    SELECT {text_expr}
+    FROM branches b
+    LEFT JOIN article_heads h ON h.article_id = b.article_id
+    JOIN articles_full_text aft ON aft.article_id = b.article_id AND aft.commit_id = b.head_commit_id
+    WHERE b.article_id = :article_id AND b.name = 'main'
+      AND h.head_commit_id IS DISTINCT FROM b.head_commit_id
+    ORDER BY b.created_at DESC
+    LIMIT 1
+"""
+
+HEAD_TEXT_SQL = """
+    SELECT aft.text, h.ts_config
+    FROM article_heads h
+    JOIN articles_full_text aft ON aft.article_id = h.article_id AND aft.commit_id = h.head_commit_id
+    WHERE h.article_id = :article_id
+"""
+
+INSERT_SECTION_SQL = """
+    INSERT INTO article_sections (article_id, commit_id, position, heading, body, tsv)
+    SELECT h.article_id, h.head_commit_id, :position, CAST(:heading AS varchar), :body,
+           setweight(to_tsvector(CAST(:ts_config AS regconfig), coalesce(CAST(:heading AS varchar), '')), 'A')
+           || to_tsvector(CAST(:ts_config AS regconfig), :body)
+    FROM article_heads h
+    WHERE h.article_id = :article_id
+"""
+
+
+class ArticleHeadService:
+    """Поддержка таблицы article_heads. Изменения не фиксируются: вызывающий код делает commit сам."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def refresh(self, article_id: UUID, content: Optional[str] = None):
+        """
+        Пересчитать голову статьи после изменения ветки main, статуса или заголовка.
+        content - полный текст новой головы, если он уже известен вызывающему коду;
+        без него текст читается из articles_full_text, только когда голова сменилась.
+        """
+        # Изменения ORM-объектов (head_commit_id ветки, поля статьи) должны попасть в БД до запроса
+        await self.db.flush()
+        if content is None:
+            # Для разделов нужен весь текст, для определения языка - только начало
+            text_expr = "aft.text" if settings.SEARCH_SECTIONS_ENABLED else f"left(aft.text, {SAMPLE_CHARS})"
+            content = await self.db.scalar(
+                text(CHANGED_HEAD_TEXT_SQL.format(text_expr=text_expr)), {"article_id": article_id}
+            )
+
+        # langdetect - чистый Python: вне цикла событий, как и в воркере синхронизации
+        language = await asyncio.to_thread(detect_language, content) if content is not None else None
+        mark_search_index_changed(self.db)
+        await self.db.execute(text(REFRESH_HEAD_SQL), {
+            "article_id": article_id,
+            "language": language,
+            "ts_config": ts_config_for(language) if language else None,
+        })
+        if content is not None and settings.SEARCH_SECTIONS_ENABLED:
+            await self.replace_sections(article_id, content, ts_config_for(language))
+        # Очередь синхронизации с Typesense пишется в той же транзакции, что и голова
+        await TypesenseIndexer(self.db).mark_for_sync(article_id)
+
+    async def mark_facets_changed(self, article_ids: Iterable[UUID]):
+        """Разделы или теги статей изменились: выдача с фильтрами устарела, документы Typesense - тоже"""
+        mark_search_index_changed(self.db)
+        indexer = TypesenseIndexer(self.db)
+        for article_id in article_ids:
+            await indexer.mark_for_sync(article_id)
+
+    async def replace_sections(self, article_id: UUID, content: str, ts_config: str):
+        """Разделы головы для сниппетов поиска; старые разделы статьи удаляются"""
+        await self.db.execute(text("DELETE FROM article_sections WHERE article_id = :article_id"),
+                              {"article_id": article_id})
+        sections = split_sections(content)
+        if sections:
+            await self.db.execute(text(INSERT_SECTION_SQL), [
+                {"article_id": article_id, "position": section.position, "heading": section.heading,
+                 "body": section.body, "ts_config": ts_config}
+                for section in sections
+            ])
+
+    async def rebuild_sections(self, article_id: UUID) -> bool:
+        """Разделы по уже сохранённой голове (включение SEARCH_SECTIONS_ENABLED на существующих данных)"""
+        row = (await self.db.execute(text(HEAD_TEXT_SQL), {"article_id": article_id})).first()
+        if row is None:
+            return False
+        await self.replace_sections(article_id, row.text, row.ts_config)
+        return True
+
+    async def get_head(self, article_id: UUID) -> Optional[ArticleHead]:
+        return await self.db.scalar(select(ArticleHead).where(ArticleHead.article_id == article_id))
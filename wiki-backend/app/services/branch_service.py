@@ -4,9 +4,10 @@ from typing import List, Optional, Tuple
 from uuid import UUID
 from datetime import datetime
 
-from app.models.article import Branch, Commit, CommitParent, Article
+from app.models.article import ArticleFull, Branch, Commit, CommitParent, Article
 from app.models.user import User
 from app.schemas.article import BranchCreate, BranchCreateFromCommit, BranchUpdate
+from app.services.article_head_service import ArticleHeadService
 
 
 class BranchService:
@@ -282,6 +283,9 @@ class BranchService:
         if not source_head or not target_head:
             return False
         
+        # Полный текст новой головы; при fast-forward его прочитает ArticleHeadService
+        merged_content = None
+
         # Check if branches have diverged (simple check)
         if await self._is_ancestor(target_head.id, source_head.id):
             # Fast-forward merge possible
@@ -322,9 +326,19 @@ class BranchService:
             
             self.db.add(target_parent)
             self.db.add(source_parent)
+
+            # Полный текст нужен для поискового индекса головы и чтения без пересборки
+            self.db.add(ArticleFull(
+                article_id=target_branch.article_id,
+                commit_id=merge_commit.id,
+                text=merged_content
+            ))
             
             # Update target branch head
             target_branch.head_commit_id = merge_commit.id
+
+        if target_branch.name == "main":
+            await ArticleHeadService(self.db).refresh(target_branch.article_id, content=merged_content)
         
         await self.db.commit()
         return True
@@ -1,6 +1,6 @@
 # app/services/commit_service.py
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, text, and_
+from sqlalchemy import select, text, and_, func
 from sqlalchemy.orm import selectinload
 from typing import List, Optional, Tuple
 from uuid import UUID
@@ -13,47 +13,114 @@ from app.models.user import User
 from app.schemas.article import CommitResponse, CommitCreateInternal, CommitResponseDetailed, DiffResponse
 import whatthepatch
 import logging
-import httpx
 from app.models.moderation import Moderation
+from app.models.vandalism_check_queue import VandalismCheckQueue
 from app.core.config import settings
+from app.core.enums import VandalismCheckMode, TrustTier
+from app.core.metrics import metrics
+from app.core.vandalism_client import vandalism_client, VandalismServiceUnavailable
+from app.services.trust_service import TrustService
+from app.services.article_head_service import ArticleHeadService
 
 logger = logging.getLogger(__name__)
 class CommitService:
     def __init__(self, db: AsyncSession):
         self.db = db
-        self.vandalism_check_url = "http://localhost:8010/models/vandalism/"
 
+    async def _request_vandalism_score(
+        self,
+        added_text: str,
+        removed_text: str,
+        tier: TrustTier = TrustTier.FULL,
+        article_length: Optional[int] = None,
+    ) -> Tuple[float, bool]:
+        """
+        Запросить оценку правки у сервиса модели. Для уровня LIGHT (автор с репутацией) сервис
+        применяет только быстрый фильтр.
+        Возвращает (confidence, is_vandalism), при недоступности сервиса бросает VandalismServiceUnavailable.
+        """
+        trusted = tier == TrustTier.LIGHT
+        return await vandalism_client.score(
+            added_text,
+            removed_text,
+            max_tier="fast" if trusted else "transformer",
+            article_length=article_length,
+            trusted_author=trusted,
+        )
 
-    async def _check_vandalism(self, added_text: str, removed_text: str) -> Tuple[float, bool]:
+    async def _parent_text_length(self, commit_id: UUID) -> Optional[int]:
+        """Длина полного текста родительского коммита (статья до правки)"""
+        return await self.db.scalar(
+            select(func.length(ArticleFull.text))
+            .join(CommitParent, CommitParent.parent_id == ArticleFull.commit_id)
+            .where(CommitParent.commit_id == commit_id)
+        )
+
+    async def _check_vandalism(
+        self,
+        added_text: str,
+        removed_text: str,
+        tier: TrustTier = TrustTier.FULL,
+        article_length: Optional[int] = None,
+    ) -> Tuple[float, bool]:
         """
         Проверить правку на вандализм с помощью нейросетевой модели.
-        Возвращает (confidence, is_vandalism).
+        Возвращает (confidence, is_vandalism). Если сервис недоступен, правка пропускается (fail open).
         """
         if not settings.ENABLE_VANDALISM_CHECK:
             return 0, False
 
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.post(
-                    settings.VANDALISM_CHECK_URL,
-                    json={"added_text": added_text, "removed_text": removed_text}
-                )
-
-                if response.status_code == 200:
-                    result = response.json()
-                    confidence = result.get("confidence", 0)
-                    predicted_class = result.get("predicted_class", 0)
-                    is_vandalism = predicted_class == 1
-                    return confidence, is_vandalism
-                else:
-                    logger.warning(
-                        f"Vandalism check service returned status {response.status_code}"
-                    )
-                    return 0, False
-        except Exception as e:
-            logger.warning(f"Error checking vandalism: {e}")
+            return await self._request_vandalism_score(added_text, removed_text, tier, article_length)
+        except VandalismServiceUnavailable as e:
+            logger.warning(f"Vandalism check skipped: {e}")
+            await metrics.incr("vandalism.fail_open")
             return 0, False
 
+    async def _should_check_synchronously(self, author_id: UUID) -> bool:
+        """
+        В sync-режиме проверяется каждая правка. В async-режиме синхронно проверяются
+        только авторы с ролями из VANDALISM_SYNC_ROLES, остальные правки уходят в очередь.
+        """
+        if settings.VANDALISM_CHECK_MODE == VandalismCheckMode.SYNC:
+            return True
+
+        sync_roles = settings.vandalism_sync_roles
+        if not sync_roles:
+            return False
+
+        role = await self.db.scalar(select(User.role).where(User.id == author_id))
+        return role in sync_roles
+
+    def _add_vandalism_moderation(
+        self, commit_id: UUID, author_id: UUID, confidence: float, moderator_id: Optional[UUID] = None
+    ) -> Moderation:
+        """
+        Добавить в сессию запрос на модерацию по результату проверки на вандализм.
+        С moderator_id запись сразу закрыта как подтверждённая (автоматический откат)
+        и, как решение модератора, снижает репутацию автора правки.
+        """
+        if moderator_id is None:
+            moderation = Moderation(
+                commit_id=commit_id,
+                reason="Автоматическая проверка на вандализм.",
+                description=f"Правка требует проверки модератора. Уверенность модели: {confidence:.2%}",
+                reported_by_id=author_id,  # Автор коммита также является репортером
+                status="pending"
+            )
+        else:
+            moderation = Moderation(
+                commit_id=commit_id,
+                reason="Автоматическая проверка на вандализм.",
+                description=f"Правка откатена автоматически. Уверенность модели: {confidence:.2%}",
+                reported_by_id=moderator_id,
+                moderator_id=moderator_id,
+                status="resolved",
+                resolved_at=func.now(),
+            )
+        self.db.add(moderation)
+        return moderation
+
     def _extract_added_removed_from_diff(self, diff_content: str) -> Tuple[str, str]:
         """
         Извлечь добавленный и удаленный текст из diff
@@ -170,7 +237,8 @@ class CommitService:
         message: str, 
         content: str,
         branch_id: Optional[UUID] = None,
-        base_commit_id: Optional[UUID] = None
+        base_commit_id: Optional[UUID] = None,
+        check_vandalism: bool = True
     ) -> Commit:
         """Create a new commit in specified branch or main branch"""
         
@@ -225,19 +293,32 @@ class CommitService:
         
 
         needs_moderation = False
-        if previous_commit:
-            # Извлекаем добавленный и удаленный текст из diff
-            added_text, removed_text = self._extract_added_removed_from_diff(content_diff)
-            
-            # Проверяем через нейросетевую модель
-            confidence, is_vandalism = await self._check_vandalism(added_text, removed_text)
-            
-            if is_vandalism:
-                if confidence > settings.VANDALISM_REVERT_THRESHOLD:  # Более 80% уверенности - откатываем
-                    raise ValueError(f"Правка отклонена: высокий риск вандализма (уверенность: {confidence:.2%})")
-                elif confidence > settings.VANDALISM_MODERATION_THRESHOLD:  # Более 60% - отправляем на модерацию
-                    needs_moderation = True
-                    
+        enqueue_vandalism_check = False
+        if previous_commit and check_vandalism and settings.ENABLE_VANDALISM_CHECK:
+            # Уровень проверки по репутации автора; новые и отмеченные аккаунты проверяются полностью
+            trust_tier = await TrustService(self.db).get_tier(author_id)
+            await metrics.incr(f"vandalism.trust.{trust_tier.value}")
+
+            if trust_tier == TrustTier.SKIP:
+                pass
+            elif await self._should_check_synchronously(author_id):
+                # Извлекаем добавленный и удаленный текст из diff
+                added_text, removed_text = self._extract_added_removed_from_diff(content_diff)
+
+                # Проверяем через нейросетевую модель
+                confidence, is_vandalism = await self._check_vandalism(
+                    added_text, removed_text, trust_tier, len(previous_full_content)
+                )
+
+                if is_vandalism:
+                    if confidence > settings.VANDALISM_REVERT_THRESHOLD:  # Более 80% уверенности - откатываем
+                        raise ValueError(f"Правка отклонена: высокий риск вандализма (уверенность: {confidence:.2%})")
+                    elif confidence > settings.VANDALISM_MODERATION_THRESHOLD:  # Более 60% - отправляем на модерацию
+                        needs_moderation = True
+            else:
+                # Коммит принимается сразу, проверку выполнит VandalismScoringWorker
+                enqueue_vandalism_check = True
+
         # Create new commit
         new_commit = Commit(
             article_id=article_id,
@@ -281,22 +362,20 @@ class CommitService:
         self.db.add(full_content)
 
         if needs_moderation:
-            moderation = Moderation(
-                commit_id=new_commit.id,
-                reason="Автоматическая проверка на вандализм.",
-                description=f"Правка требует проверки модератора. Уверенность модели: {confidence:.2%}",
-                reported_by_id=author_id,  # Автор коммита также является репортером
-                status="pending"
-            )
-            self.db.add(moderation)
+            self._add_vandalism_moderation(new_commit.id, author_id, confidence)
+
+        if enqueue_vandalism_check:
+            # Запись в очередь попадает в ту же транзакцию, что и сам коммит
+            self.db.add(VandalismCheckQueue(commit_id=new_commit.id))
+
+        if branch.name == 'main':
+            await ArticleHeadService(self.db).refresh(article_id, content=full_text)
 
         await self.db.commit()
         await self.db.refresh(new_commit)
-        if branch.name == 'main':
-            from app.services.typesense_indexer import TypesenseIndexer
-            indexer = TypesenseIndexer(self.db)
-            await indexer.mark_for_sync(article_id)
-        
+        if needs_moderation:
+            await TrustService(self.db).invalidate(author_id)
+
         return new_commit
 
     def _create_diff(self, old_content: str, new_content: str) -> str:
@@ -555,8 +634,13 @@ class CommitService:
     
         return has_diff_header and has_hunk_header
 
-    async def revert_commit(self, commit_id: UUID, user_id: UUID) -> Optional[Commit]:
-        """Revert a specific commit"""
+    async def revert_commit(
+        self,
+        commit_id: UUID,
+        user_id: UUID,
+        check_vandalism: bool = True
+    ) -> Optional[Commit]:
+        """Revert a specific commit (only the current head of a branch can be reverted)"""
         commit_to_revert = await self.get_commit(commit_id)
         if not commit_to_revert:
             return None
@@ -582,13 +666,12 @@ class CommitService:
         if parent_content is None:
             return None
         
-        # Find branch containing the commit
-        branch_query = select(Branch).join(
-            CommitParent, Branch.head_commit_id == CommitParent.commit_id
-        ).where(CommitParent.parent_id == commit_id)
+        # Find branch whose head is the commit: reverting an older commit
+        # would silently discard the changes made on top of it
+        branch_query = select(Branch).where(Branch.head_commit_id == commit_id)
         
         branch_result = await self.db.execute(branch_query)
-        branch = branch_result.scalar_one_or_none()
+        branch = branch_result.scalars().first()
         
         if not branch:
             return None
@@ -599,7 +682,9 @@ class CommitService:
             author_id=user_id,
             message=f"Revert '{commit_to_revert.message}'",
             content=parent_content,
-            branch_id=branch.id
+            branch_id=branch.id,
+            base_commit_id=branch.head_commit_id,
+            check_vandalism=check_vandalism
         )
         
         return revert_commit
\ No newline at end of file
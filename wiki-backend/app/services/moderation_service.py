@@ -6,6 +6,8 @@ from uuid import UUID
 from datetime import datetime
 
 from app.models.moderation import Moderation
+from app.models.article import Commit
+from app.services.trust_service import TrustService
 from app.schemas.moderation import ModerationCreate, ModerationUpdate
 
 
@@ -37,6 +39,7 @@ class ModerationService:
         self.db.add(moderation)
         await self.db.commit()
         await self.db.refresh(moderation)
+        await self._invalidate_author_trust(moderation.commit_id)
         return moderation
 
     async def get_moderation(self, moderation_id: UUID) -> Optional[Moderation]:
@@ -72,8 +75,15 @@ class ModerationService:
         
         await self.db.commit()
         await self.db.refresh(moderation)
+        await self._invalidate_author_trust(moderation.commit_id)
         return moderation
 
+    async def _invalidate_author_trust(self, commit_id: UUID):
+        """Итог модерации меняет репутацию автора правки"""
+        author_id = await self.db.scalar(select(Commit.author_id).where(Commit.id == commit_id))
+        if author_id:
+            await TrustService(self.db).invalidate(author_id)
+
     async def get_commit_moderations(self, commit_id: UUID) -> List[Moderation]:
         """Get moderation requests for a specific commit"""
         query = select(Moderation).where(Moderation.commit_id == commit_id)
@@ -2,6 +2,7 @@ from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional, Dict, Any, Tuple
 
+from app.utils.language import TS_CONFIGS
 
 
 class SearchService:
@@ -16,36 +17,23 @@ class SearchService:
         limit: int = 20,
         offset: int = 0,
     ) -> Tuple[int, List[Dict[str, Any]]]:
-        config_map = {"ru": ("russian", "tsv_ru"), "en": ("english", "tsv_en")}
-        if language in config_map:
-            config, tsv_column = config_map[language]
-        else:
-            config = "simple"
-            tsv_column = None
-
         params = {
             "q": q,
-            "config": config,
             "fields": fields,
             "limit": limit,
             "offset": offset,
         }
 
-        if tsv_column:
-            tsv_expr = f"aft.{tsv_column}"
+        # tsvector головы построен конфигурацией языка статьи (article_heads.ts_config)
+        if language in TS_CONFIGS:
+            params["language"] = language
+            params["config"] = TS_CONFIGS[language]
+            language_cond = "h.language = :language AND "
             tsv_query_expr = "plainto_tsquery(:config, :q)"
         else:
-            tsv_expr = "to_tsvector(:config, aft.text)"
-            tsv_query_expr = "plainto_tsquery(:config, :q)"
-
-        base_cte = """
-            WITH main_commits AS (
-                SELECT DISTINCT ON (article_id) article_id, head_commit_id
-                FROM branches
-                WHERE name = 'main'
-                ORDER BY article_id, created_at DESC
-            )
-        """
+            language_cond = ""
+            tsv_query_expr = "plainto_tsquery(h.ts_config::regconfig, :q)"
+        tsv_expr = "si.tsv"
 
         if fields == "title":
             where_cond = "a.title % :q"
@@ -53,12 +41,14 @@ class SearchService:
             where_cond = f"{tsv_expr} @@ {tsv_query_expr}"
         else:
             where_cond = f"(a.title % :q OR {tsv_expr} @@ {tsv_query_expr})"
+        where_cond = language_cond + where_cond
 
-        count_sql = base_cte + f"""
+        count_sql = f"""
             SELECT COUNT(*)
-            FROM articles a
-            JOIN main_commits mc ON a.id = mc.article_id
-            JOIN articles_full_text aft ON mc.head_commit_id = aft.commit_id
+            FROM article_heads h
+            JOIN articles a ON a.id = h.article_id
+            JOIN articles_full_text aft ON aft.article_id = h.article_id AND aft.commit_id = h.head_commit_id
+            LEFT JOIN article_search_index si ON si.article_id = h.article_id
             WHERE {where_cond}
         """
         total = await self.db.scalar(text(count_sql), params) or 0
@@ -76,18 +66,19 @@ class SearchService:
         else:
             order_expr = "(sub.rank_content * 0.5 + sub.sim_title * 1.0)"
 
-        main_sql = base_cte + f"""
+        main_sql = f"""
             SELECT sub.id, sub.title, sub.created_at, sub.updated_at,
                    sub.snippet, sub.rank_content, sub.sim_title
             FROM (
                 SELECT a.id, a.title, a.created_at, a.updated_at,
-                       ts_headline(:config, aft.text, {tsv_query_expr},
+                       ts_headline(h.ts_config::regconfig, aft.text, {tsv_query_expr},
                                    'StartSel=<mark>, StopSel=</mark>, MaxWords=30, MinWords=15') as snippet,
                        {rank_expr} as rank_content,
                        {sim_expr} as sim_title
-                FROM articles a
-                JOIN main_commits mc ON a.id = mc.article_id
-                JOIN articles_full_text aft ON mc.head_commit_id = aft.commit_id
+                FROM article_heads h
+                JOIN articles a ON a.id = h.article_id
+                JOIN articles_full_text aft ON aft.article_id = h.article_id AND aft.commit_id = h.head_commit_id
+                LEFT JOIN article_search_index si ON si.article_id = h.article_id
                 WHERE {where_cond}
             ) sub
             ORDER BY {order_expr} DESC, sub.updated_at DESC
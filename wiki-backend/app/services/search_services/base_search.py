@@ -2,11 +2,15 @@
 from abc import ABC, abstractmethod
 from typing import List, Optional, Tuple, Dict, Any
 
+from app.services.search_services.search_cursor import SearchCursor
+
 class BaseSearchService(ABC):
     """
     Абстрактный базовый класс для всех поисковых сервисов.
     Определяет единый интерфейс для выполнения поиска.
     """
+    # Фильтры category и tag (встроенный индекс не хранит разделы и теги статей)
+    supports_filters = True
 
     @abstractmethod
     async def search(
@@ -18,6 +22,9 @@ class BaseSearchService(ABC):
         offset: int = 0,
         hybrid: bool = False,
         semantic_weight: float = 0.5,
+        cursor: Optional[SearchCursor] = None,
+        category: Optional[str] = None,
+        tag: Optional[str] = None,
     ) -> Tuple[int, List[Dict[str, Any]]]:
         """
         Выполняет поиск по запросу q.
@@ -28,10 +35,33 @@ class BaseSearchService(ABC):
             fields: поля для поиска ('title', 'content', 'both')
             limit: количество результатов на странице
             offset: смещение для пагинации
+            cursor: продолжение выдачи после последней статьи предыдущей страницы (offset не учитывается);
+                общее количество берётся из курсора
+            category: путь раздела (ltree) - статьи раздела и его подразделов
+            tag: тег статьи
 
         Возвращает:
-            Кортеж (общее количество результатов, список словарей с полями:
+            Кортеж (общее количество результатов - при SEARCH_MATCH_CAP > 0 достаточно
+            досчитать до SEARCH_MATCH_CAP + 1, список словарей с полями:
                 id, title, snippet, created_at, updated_at,
-                rank_content (опционально), sim_title (опционально))
+                rank_content (опционально), sim_title (опционально),
+                sort_rank - ключ сортировки для курсора следующей страницы)
+        """
+        pass
+
+    async def facets(
+        self,
+        q: str,
+        language: Optional[str] = None,
+        fields: str = "both",
+        category: Optional[str] = None,
+        tag: Optional[str] = None,
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Счётчики совпадений запроса по значениям: {"category": [...], "tag": [...], "language": [...]},
+        элемент - {"value", "count"}, не больше SEARCH_FACET_LIMIT на фасет, по убыванию count.
+        Фильтр фасета к его собственным счётчикам не применяется только для language:
+        видно, сколько статей найдётся на другом языке. Раздел считается вместе с предками.
+        Пустой словарь - движок фасеты не поддерживает.
         """
-        pass
\ No newline at end of file
+        return {}
\ No newline at end of file
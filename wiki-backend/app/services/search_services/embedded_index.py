@@ -0,0 +1,479 @@
+# app/services/search_services/embedded_index.py
+"""
+Встроенный поисковый индекс (SearchEngineType.EMBEDDED): BM25 по сегментам на диске.
+
+Сегмент - неизменяемый файл seg_<seq>.g<generation>.wsi: отсортированный словарь термов
+(поле + терм), списки вхождений (документ, tf), длины полей, язык, id статьи и сохранённый
+документ для сниппетов. Читатели (все воркеры uvicorn) отображают сегменты в память,
+страницы файла делит между процессами кэш ОС.
+
+manifest.json перечисляет сегменты и удалённые статьи и заменяется атомарно (os.replace).
+В нём же писатель сохраняет живость документов и суммы длин для BM25 (stats): читатель
+открывает снимок, не обходя все документы.
+Пишет только лидер синхронизации (EmbeddedIndexWriter из TypesenseSyncWorker), запись
+дополнительно сериализуется flock. Новая версия статьи попадает в новый сегмент и скрывает
+старые копии; удаление скрывает статью во всех сегментах с seq <= записанного в manifest.
+Когда сегментов больше SEARCH_EMBEDDED_MAX_SEGMENTS, самые новые (мелкие) сливаются в один.
+"""
+import fcntl
+import json
+import logging
+import math
+import mmap
+import os
+import re
+import struct
+import threading
+from array import array
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+from uuid import UUID
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "manifest.json"
+LOCK_NAME = "write.lock"
+MAGIC = b"WIKISEG1"
+SECTIONS = (
+    "term_offsets",      # uint32[terms + 1] - границы термов в terms
+    "terms",             # поле + b":" + терм в UTF-8, по возрастанию
+    "posting_offsets",   # uint64[terms + 1] - границы списков в postings (в элементах uint32)
+    "postings",          # uint32 пары (номер документа, tf) по возрастанию номера
+    "title_lengths",     # uint32[docs]
+    "content_lengths",   # uint32[docs]
+    "languages",         # LANGUAGE_WIDTH байт на документ
+    "ids",               # UUID статьи, 16 байт на документ
+    "stored_offsets",    # uint64[docs + 1]
+    "stored",            # JSON документа (title, content, language, даты)
+)
+HEADER = struct.Struct("<8sII" + "QQ" * len(SECTIONS))
+LANGUAGE_WIDTH = 8
+
+TITLE = b"t:"
+CONTENT = b"c:"
+FIELDS = {"title": (TITLE,), "content": (CONTENT,), "both": (TITLE, CONTENT)}
+BM25_K1 = 1.2
+BM25_B = 0.75
+MAX_TERM_CHARS = 64
+
+TOKEN_RE = re.compile(r"\w+")
+
+# Массивы пишутся в порядке байтов платформы и читаются memoryview.cast без копирования
+assert array("I").itemsize == 4 and array("Q").itemsize == 8
+
+
+def normalize_token(token: str) -> str:
+    return token.lower().replace("ё", "е")[:MAX_TERM_CHARS]
+
+
+def tokenize(text: str) -> List[str]:
+    return [normalize_token(token) for token in TOKEN_RE.findall(text or "")]
+
+
+def query_terms(q: str) -> List[str]:
+    """Уникальные термы запроса в исходном порядке"""
+    return list(dict.fromkeys(tokenize(q)))
+
+
+def _padding(size: int) -> bytes:
+    return b"\0" * (-size % 8)
+
+
+def write_segment(path: str, documents: Sequence[dict]):
+    """Сегмент из документов article_document(); файл появляется под path только целиком"""
+    postings: Dict[bytes, array] = defaultdict(lambda: array("I"))
+    title_lengths = array("I")
+    content_lengths = array("I")
+    languages = bytearray()
+    ids = bytearray()
+    stored_offsets = array("Q", [0])
+    stored = bytearray()
+
+    for number, document in enumerate(documents):
+        for field, lengths in ((TITLE, title_lengths), (CONTENT, content_lengths)):
+            counts = Counter(tokenize(document.get("title" if field == TITLE else "content")))
+            lengths.append(sum(counts.values()))
+            for term, tf in counts.items():
+                postings[field + term.encode("utf-8")].extend((number, tf))
+        languages += (document.get("language") or "").encode("ascii", "ignore")[:LANGUAGE_WIDTH].ljust(LANGUAGE_WIDTH, b"\0")
+        ids += UUID(str(document["id"])).bytes
+        stored += json.dumps({
+            "title": document.get("title") or "",
+            "content": document.get("content") or "",
+            "language": document.get("language"),
+            "created_at": document.get("created_at") or 0,
+            "updated_at": document.get("updated_at") or 0,
+        }, ensure_ascii=False).encode("utf-8")
+        stored_offsets.append(len(stored))
+
+    term_offsets = array("I", [0])
+    terms = bytearray()
+    posting_offsets = array("Q", [0])
+    posting_data = array("I")
+    for key in sorted(postings):
+        terms += key
+        term_offsets.append(len(terms))
+        posting_data.extend(postings[key])
+        posting_offsets.append(len(posting_data))
+
+    blobs = (term_offsets.tobytes(), bytes(terms), posting_offsets.tobytes(), posting_data.tobytes(),
+             title_lengths.tobytes(), content_lengths.tobytes(), bytes(languages), bytes(ids),
+             stored_offsets.tobytes(), bytes(stored))
+    layout = []
+    position = HEADER.size + len(_padding(HEADER.size))
+    for blob in blobs:
+        layout.extend((position, len(blob)))
+        position += len(blob) + len(_padding(len(blob)))
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        header = HEADER.pack(MAGIC, len(term_offsets) - 1, len(documents), *layout)
+        f.write(header + _padding(len(header)))
+        for blob in blobs:
+            f.write(blob)
+            f.write(_padding(len(blob)))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class _Terms:
+    """Словарь термов сегмента как последовательность bytes - для bisect без копирования словаря"""
+
+    def __init__(self, segment: "Segment"):
+        self.segment = segment
+
+    def __len__(self) -> int:
+        return self.segment.term_count
+
+    def __getitem__(self, index: int) -> bytes:
+        offsets = self.segment.term_offsets
+        return bytes(self.segment.terms[offsets[index]:offsets[index + 1]])
+
+
+class Segment:
+    """Сегмент, отображённый в память (только чтение)"""
+
+    def __init__(self, path: str, seq: int):
+        self.path = path
+        self.seq = seq
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._mmap)
+        magic, self.term_count, self.doc_count, *layout = HEADER.unpack_from(view)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a search segment")
+        sections = {name: view[layout[2 * i]:layout[2 * i] + layout[2 * i + 1]] for i, name in enumerate(SECTIONS)}
+        self.term_offsets = sections["term_offsets"].cast("I")
+        self.terms = sections["terms"]
+        self.posting_offsets = sections["posting_offsets"].cast("Q")
+        self.postings = sections["postings"].cast("I")
+        self.title_lengths = sections["title_lengths"].cast("I")
+        self.content_lengths = sections["content_lengths"].cast("I")
+        self.languages = sections["languages"]
+        self.ids = sections["ids"]
+        self.stored_offsets = sections["stored_offsets"].cast("Q")
+        self.stored = sections["stored"]
+        self._terms = _Terms(self)
+
+    def lookup(self, key: bytes) -> Optional[memoryview]:
+        """Вхождения терма: плоский uint32 (документ, tf, документ, tf, ...)"""
+        index = bisect_left(self._terms, key)
+        if index == self.term_count or self._terms[index] != key:
+            return None
+        return self.postings[self.posting_offsets[index]:self.posting_offsets[index + 1]]
+
+    def raw_id(self, doc: int) -> bytes:
+        return bytes(self.ids[doc * 16:doc * 16 + 16])
+
+    def article_id(self, doc: int) -> str:
+        return str(UUID(bytes=self.raw_id(doc)))
+
+    def language(self, doc: int) -> str:
+        return bytes(self.languages[doc * LANGUAGE_WIDTH:(doc + 1) * LANGUAGE_WIDTH]).rstrip(b"\0").decode("ascii")
+
+    def document(self, doc: int) -> dict:
+        stored = json.loads(bytes(self.stored[self.stored_offsets[doc]:self.stored_offsets[doc + 1]]))
+        return {"id": self.article_id(doc), **stored}
+
+    def size_bytes(self) -> int:
+        return len(self._mmap)
+
+
+def live_stats(manifest: dict, segments: List[Segment]) -> dict:
+    """
+    Живость документов версии manifest: dead - номера документов каждого сегмента, скрытых
+    более новой копией статьи или удалением, и суммы длин полей живых документов для BM25.
+    Обходит все документы, поэтому считается писателем при публикации (в потоке синхронизации).
+    """
+    deleted = {UUID(article_id).bytes: seq for article_id, seq in manifest.get("deleted", {}).items()}
+    dead: Dict[str, List[int]] = {}
+    live = title_total = content_total = 0
+    seen: Set[bytes] = set()
+    for segment in reversed(segments):
+        segment_dead = []
+        for doc in range(segment.doc_count - 1, -1, -1):
+            raw_id = segment.raw_id(doc)
+            if raw_id in seen or deleted.get(raw_id, -1) >= segment.seq:
+                segment_dead.append(doc)
+                continue
+            seen.add(raw_id)
+            live += 1
+            title_total += segment.title_lengths[doc]
+            content_total += segment.content_lengths[doc]
+        dead[os.path.basename(segment.path)] = segment_dead[::-1]
+    return {"dead": dead, "live": live, "title_total": title_total, "content_total": content_total}
+
+
+class IndexSnapshot:
+    """
+    Набор сегментов одной версии manifest. dead - документы, скрытые более новой копией
+    статьи или удалением; статистика BM25 считается только по живым документам,
+    df терма - по всем (как в Lucene до слияния сегментов).
+    """
+
+    def __init__(self, manifest: dict, segments: List[Segment]):
+        self.generation = manifest.get("generation", 0)
+        self.segments = segments  # от старых к новым
+        stats = manifest.get("stats")
+        if stats is None:
+            # manifest записан до появления stats - считаем сами, пока писатель его не перезапишет
+            stats = live_stats(manifest, segments)
+        self.dead: List[Set[int]] = [set(stats["dead"].get(os.path.basename(segment.path), ())) for segment in segments]
+        self.live_count = stats["live"]
+        self.average_lengths = {
+            TITLE: stats["title_total"] / self.live_count if self.live_count else 0.0,
+            CONTENT: stats["content_total"] / self.live_count if self.live_count else 0.0,
+        }
+
+    def live_documents(self) -> Iterator[Tuple[Segment, int]]:
+        for segment, dead in zip(self.segments, self.dead):
+            for doc in range(segment.doc_count):
+                if doc not in dead:
+                    yield segment, doc
+
+    def search(self, terms: List[str], fields: Sequence[bytes], language: Optional[str], top: int,
+               after: Optional[Tuple[float, bytes]] = None) -> Tuple[int, List[Tuple[float, Segment, int]]]:
+        """
+        Все термы запроса должны встретиться в документе (в любом из fields), как plainto_tsquery.
+        Возвращает (число совпадений, лучшие top документов по BM25); порядок - (счёт, id статьи)
+        по убыванию, after - ключ последнего документа предыдущей страницы
+        """
+        keys = [(bit, field, field + term.encode("utf-8")) for bit, term in enumerate(terms) for field in fields]
+        required = (1 << len(terms)) - 1
+        postings = [[segment.lookup(key) for _, _, key in keys] for segment in self.segments]
+        df = [sum(len(lists[i]) // 2 for lists in postings if lists[i] is not None) for i in range(len(keys))]
+        n = max(self.live_count, 1)
+        boosts = {TITLE: settings.SEARCH_EMBEDDED_TITLE_BOOST, CONTENT: 1.0}
+
+        total = 0
+        scored: List[Tuple[float, bytes, Segment, int]] = []
+        for segment_index, (segment, lists) in enumerate(zip(self.segments, postings)):
+            dead = self.dead[segment_index]
+            scores: Dict[int, float] = defaultdict(float)
+            matched: Dict[int, int] = defaultdict(int)
+            for (bit, field, _), posting, term_df in zip(keys, lists, df):
+                if posting is None:
+                    continue
+                idf = math.log(1 + (n - term_df + 0.5) / (term_df + 0.5))
+                weight = idf * boosts[field] * (BM25_K1 + 1)
+                lengths = segment.title_lengths if field == TITLE else segment.content_lengths
+                norm = BM25_K1 / (self.average_lengths[field] or 1.0)
+                flag = 1 << bit
+                for doc, tf in zip(posting[0::2], posting[1::2]):
+                    if doc in dead:
+                        continue
+                    scores[doc] += weight * tf / (tf + BM25_K1 * (1 - BM25_B) + BM25_B * norm * lengths[doc])
+                    matched[doc] |= flag
+            for doc, mask in matched.items():
+                if mask != required or (language and segment.language(doc) != language):
+                    continue
+                total += 1
+                key = (scores[doc], segment.raw_id(doc))
+                if after is None or key < after:
+                    scored.append((*key, segment, doc))
+        scored.sort(key=lambda item: item[:2], reverse=True)
+        return total, [(score, segment, doc) for score, _, segment, doc in scored[:top]]
+
+
+def read_manifest(path: str) -> dict:
+    try:
+        with open(os.path.join(path, MANIFEST_NAME), encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {"generation": 0, "next_seq": 1, "segments": [], "deleted": {}}
+
+
+class EmbeddedIndex:
+    """
+    Читатель индекса в процессе. snapshot() проверяет mtime manifest и при изменении
+    открывает новые сегменты; уже открытые переиспользуются. Файл, удалённый писателем
+    после отображения, остаётся доступен через mmap до закрытия снимка.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or settings.SEARCH_EMBEDDED_INDEX_PATH
+        self._lock = threading.Lock()
+        self._snapshot: Optional[IndexSnapshot] = None
+        self._stamp: Optional[Tuple[int, int]] = None
+        self._segments: Dict[str, Segment] = {}
+
+    def snapshot(self) -> IndexSnapshot:
+        with self._lock:
+            for attempt in range(3):
+                try:
+                    stat = os.stat(os.path.join(self.path, MANIFEST_NAME))
+                    stamp = (stat.st_mtime_ns, stat.st_ino)
+                except FileNotFoundError:
+                    stamp = None
+                if self._snapshot is not None and stamp == self._stamp:
+                    return self._snapshot
+                try:
+                    self._snapshot = self._load(read_manifest(self.path))
+                    self._stamp = stamp
+                    return self._snapshot
+                except FileNotFoundError:
+                    # Писатель успел слить сегменты и удалить файлы - manifest уже новый
+                    logger.debug(f"Search segment disappeared while loading, retry {attempt + 1}")
+            raise RuntimeError(f"Failed to load search index from {self.path}")
+
+    def _load(self, manifest: dict) -> IndexSnapshot:
+        return IndexSnapshot(manifest, self.open_segments(manifest))
+
+    def open_segments(self, manifest: dict) -> List[Segment]:
+        segments = []
+        for entry in manifest.get("segments", []):
+            segment = self._segments.get(entry["file"]) or Segment(os.path.join(self.path, entry["file"]), entry["seq"])
+            segments.append(segment)
+        self._segments = {os.path.basename(segment.path): segment for segment in segments}
+        return segments
+
+
+class EmbeddedIndexWriter:
+    """Запись индекса. Вызывается в потоке (asyncio.to_thread): запись и слияние - блокирующий ввод-вывод"""
+
+    def __init__(self, path: Optional[str] = None, max_segments: Optional[int] = None):
+        self.path = path or settings.SEARCH_EMBEDDED_INDEX_PATH
+        self.max_segments = max_segments or settings.SEARCH_EMBEDDED_MAX_SEGMENTS
+        self.reader = EmbeddedIndex(self.path)
+
+    @contextmanager
+    def _locked(self):
+        os.makedirs(self.path, exist_ok=True)
+        with open(os.path.join(self.path, LOCK_NAME), "a") as lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def apply(self, documents: List[dict], deleted_ids: Iterable[str]) -> int:
+        """Новые версии статей одним сегментом и удаления; возвращает номер опубликованной версии"""
+        deleted_ids = [str(article_id) for article_id in deleted_ids]
+        if not documents and not deleted_ids:
+            return read_manifest(self.path)["generation"]
+        with self._locked():
+            manifest = read_manifest(self.path)
+            manifest["generation"] += 1
+            if documents:
+                manifest["segments"].append(self._write(manifest, documents))
+            for article_id in deleted_ids:
+                # Скрывает статью во всех уже существующих сегментах
+                manifest["deleted"][article_id] = manifest["next_seq"] - 1
+            self._publish(manifest)
+            if len(manifest["segments"]) > self.max_segments:
+                self._merge(manifest, merge_count([entry["docs"] for entry in manifest["segments"]]))
+            return manifest["generation"]
+
+    def compact(self) -> int:
+        """Слить все сегменты в один: удалённые и заменённые документы выбрасываются"""
+        with self._locked():
+            manifest = read_manifest(self.path)
+            if len(manifest["segments"]) > 1 or manifest["deleted"]:
+                self._merge(manifest, len(manifest["segments"]))
+            return manifest["generation"]
+
+    def _write(self, manifest: dict, documents: Sequence[dict]) -> dict:
+        seq = manifest["next_seq"]
+        manifest["next_seq"] += 1
+        return self._write_as(manifest, seq, documents)
+
+    def _write_as(self, manifest: dict, seq: int, documents: Sequence[dict]) -> dict:
+        name = f"seg_{seq:08d}.g{manifest['generation']}.wsi"
+        write_segment(os.path.join(self.path, name), documents)
+        return {"seq": seq, "file": name, "docs": len(documents)}
+
+    def _merge(self, manifest: dict, count: int):
+        """
+        Самые новые count сегментов заменяются одним с seq новейшего из них:
+        порядок относительно старых сегментов и удалений сохраняется
+        """
+        if count < 1:
+            return
+        snapshot = self.reader.snapshot()
+        merged = snapshot.segments[-count:]
+        merged_seqs = {segment.seq for segment in merged}
+        documents = [
+            segment.document(doc)
+            for segment, doc in snapshot.live_documents()
+            if segment.seq in merged_seqs
+        ]
+        manifest["generation"] += 1
+        kept = manifest["segments"][:-count]
+        if documents:
+            kept.append(self._write_as(manifest, merged[-1].seq, documents))
+        manifest["segments"] = kept
+        # Удаление нужно, пока есть сегмент, который оно скрывает
+        oldest = min((entry["seq"] for entry in kept), default=manifest["next_seq"])
+        manifest["deleted"] = {article_id: seq for article_id, seq in manifest["deleted"].items() if seq >= oldest}
+        self._publish(manifest)
+        logger.info(f"Merged {count} search segments into one with {len(documents)} documents")
+
+    def _publish(self, manifest: dict):
+        manifest["stats"] = live_stats(manifest, self.reader.open_segments(manifest))
+        manifest_path = os.path.join(self.path, MANIFEST_NAME)
+        tmp_path = f"{manifest_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, manifest_path)
+        # Файлы, которых нет в manifest, больше никто не откроет; уже открытые живут в mmap читателей
+        referenced = {entry["file"] for entry in manifest["segments"]}
+        for name in os.listdir(self.path):
+            if name.endswith(".wsi") and name not in referenced:
+                os.remove(os.path.join(self.path, name))
+
+
+def merge_count(sizes: List[int]) -> int:
+    """
+    Сколько новых сегментов слить: хвост растёт, пока следующий более старый сегмент не крупнее
+    уже набранного (ступени по размеру, как в LSM) - каждый документ переписывается O(log n) раз
+    """
+    count, merged = 2, sizes[-1] + sizes[-2]
+    while count < len(sizes) and sizes[-count - 1] <= merged:
+        merged += sizes[-count - 1]
+        count += 1
+    return count
+
+
+_embedded_index: Optional[EmbeddedIndex] = None
+_embedded_index_writer: Optional[EmbeddedIndexWriter] = None
+
+
+def embedded_index() -> EmbeddedIndex:
+    global _embedded_index
+    if _embedded_index is None:
+        _embedded_index = EmbeddedIndex()
+    return _embedded_index
+
+
+def embedded_index_writer() -> EmbeddedIndexWriter:
+    global _embedded_index_writer
+    if _embedded_index_writer is None:
+        _embedded_index_writer = EmbeddedIndexWriter()
+    return _embedded_index_writer
@@ -0,0 +1,109 @@
+# app/services/search_services/embedded_search.py
+import asyncio
+from collections import deque
+from datetime import datetime
+from itertools import islice
+from typing import Any, Dict, List, Optional, Set, Tuple
+from uuid import UUID
+
+from app.services.search_services.base_search import BaseSearchService
+from app.services.search_services.embedded_index import (
+    FIELDS, TOKEN_RE, EmbeddedIndex, embedded_index, normalize_token, query_terms,
+)
+from app.services.search_services.search_cursor import SearchCursor
+
+# Как у ts_headline в PostgresSearchService: MaxWords=30
+SNIPPET_WORDS = 30
+SNIPPET_WORDS_BEFORE = 5
+
+
+class EmbeddedSearchService(BaseSearchService):
+    """
+    Поиск по встроенному индексу без обращения к внешним сервисам. Индекс пишет лидер
+    синхронизации из очереди search_sync_queue, сервис только читает сегменты (mmap).
+    hybrid и semantic_weight не поддерживаются: векторов во встроенном индексе нет.
+    Разделов и тегов в сегментах тоже нет - фильтры и фасеты не поддерживаются.
+    """
+    supports_filters = False
+
+    def __init__(self, index: Optional[EmbeddedIndex] = None):
+        self.index = index or embedded_index()
+
+    async def search(
+        self,
+        q: str,
+        language: Optional[str] = None,
+        fields: str = "both",
+        limit: int = 20,
+        offset: int = 0,
+        hybrid: bool = False,
+        semantic_weight: float = 0.5,
+        cursor: Optional[SearchCursor] = None,
+        category: Optional[str] = None,
+        tag: Optional[str] = None,
+    ) -> Tuple[int, List[Dict[str, Any]]]:
+        terms = query_terms(q or "")
+        if not terms:
+            return 0, []
+        # Подсчёт BM25 - чистый Python: в потоке, чтобы не держать цикл событий
+        return await asyncio.to_thread(self._search, terms, language, fields, limit, offset, cursor)
+
+    def _search(self, terms: List[str], language: Optional[str], fields: str, limit: int, offset: int,
+                cursor: Optional[SearchCursor] = None) -> Tuple[int, List[Dict[str, Any]]]:
+        snapshot = self.index.snapshot()
+        after = None
+        if cursor is not None:
+            # Порядок - (счёт, id статьи); следующая страница начинается после последней статьи
+            after, offset = (cursor.rank, UUID(cursor.id).bytes), 0
+        total, hits = snapshot.search(terms, FIELDS.get(fields, FIELDS["both"]), language, offset + limit, after)
+        if cursor is not None:
+            total = cursor.total
+
+        results = []
+        for score, segment, doc in hits[offset:]:
+            document = segment.document(doc)
+            results.append({
+                'id': document['id'],
+                'title': document['title'],
+                'snippet': build_snippet(document['content'], set(terms)),
+                'created_at': datetime.fromtimestamp(document['created_at']) if document['created_at'] else None,
+                'updated_at': datetime.fromtimestamp(document['updated_at']) if document['updated_at'] else None,
+                'rank_content': round(score, 6),
+                'sort_rank': score,
+                'sim_title': None,
+                'section': None,
+            })
+        return total, results
+
+
+def build_snippet(content: str, terms: Set[str]) -> Optional[str]:
+    """
+    SNIPPET_WORDS слов вокруг первого вхождения терма запроса, вхождения в <mark>.
+    Нет вхождения (совпал только заголовок) - начало текста
+    """
+    if not content:
+        return None
+    before = deque(maxlen=SNIPPET_WORDS_BEFORE)
+    words = []
+    for match in TOKEN_RE.finditer(content):
+        if words:
+            words.append(match)
+            if len(words) >= SNIPPET_WORDS:
+                break
+        elif normalize_token(match.group()) in terms:
+            words = [*before, match]
+        else:
+            before.append(match)
+    if not words:
+        words = list(islice(TOKEN_RE.finditer(content), SNIPPET_WORDS))
+    if not words:
+        return None
+
+    parts = []
+    position = words[0].start()
+    for match in words:
+        parts.append(content[position:match.start()])
+        token = match.group()
+        parts.append(f"<mark>{token}</mark>" if normalize_token(token) in terms else token)
+        position = match.end()
+    return " ".join("".join(parts).split())
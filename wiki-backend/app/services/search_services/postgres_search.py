@@ -1,20 +1,24 @@
 # app/services/postgres_search.py
-import hashlib
-import json
-from datetime import datetime
 from typing import List, Optional, Tuple, Dict, Any
 
 from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
-from fastapi_cache import FastAPICache
 
+from app.core.config import settings
 from app.services.search_services.base_search import BaseSearchService
+from app.services.search_services.search_cursor import SearchCursor
+from app.utils.language import FALLBACK_TS_CONFIG, TS_CONFIGS
+
+# Раздел с подразделами (ltree) и тег статьи
+CATEGORY_FILTER = """
+    EXISTS (SELECT 1 FROM article_categories ac JOIN categories c ON c.id = ac.category_id
+            WHERE ac.article_id = h.article_id AND c.path <@ CAST(:category AS ltree))"""
+TAG_FILTER = "EXISTS (SELECT 1 FROM tags t WHERE t.article_id = h.article_id AND t.tag = :tag)"
 
 
 class PostgresSearchService(BaseSearchService):
     def __init__(self, db: AsyncSession):
         self.db = db
-        self.cache_backend = FastAPICache.get_backend()
 
     async def search(
         self,
@@ -25,23 +29,15 @@ class PostgresSearchService(BaseSearchService):
         offset: int = 0,
         hybrid: bool = False,
         semantic_weight: float = 0.5,
+        cursor: Optional[SearchCursor] = None,
+        category: Optional[str] = None,
+        tag: Optional[str] = None,
     ) -> Tuple[int, List[Dict[str, Any]]]:
         if not q:
             return 0, []
 
-        # Проверка кэша
-        cache_key = self._generate_cache_key(q, language, fields, limit, offset)
-        cached = await self.cache_backend.get(cache_key)
-        if cached:
-            return json.loads(cached)
-
-        total, results = await self._execute_search(q, language, fields, limit, offset)
-        await self.cache_backend.set(
-            cache_key,
-            json.dumps((total, results), default=self._json_serializer),
-            expire=300
-        )
-        return total, results
+        # Кэш выдачи - SearchCache на уровне API
+        return await self._execute_search(q, language, fields, limit, offset, cursor, category, tag)
 
     async def _execute_search(
         self,
@@ -50,96 +46,212 @@ class PostgresSearchService(BaseSearchService):
         fields: str,
         limit: int,
         offset: int,
+        cursor: Optional[SearchCursor] = None,
+        category: Optional[str] = None,
+        tag: Optional[str] = None,
     ) -> Tuple[int, List[Dict[str, Any]]]:
-        config_map = {"ru": ("russian", "tsv_ru"), "en": ("english", "tsv_en")}
-        if language in config_map:
-            config, tsv_column = config_map[language]
-        else:
-            config = "simple"
-            tsv_column = None
-
         params = {
             "q": q,
-            "config": config,
             "fields": fields,
             "limit": limit,
             "offset": offset,
         }
+        match_from, rank_expr, headline_config = self._match(params, language, fields, category, tag)
+        sim_expr = "similarity(h.title, :q)"
 
-        if tsv_column:
-            tsv_expr = f"aft.{tsv_column}"
-            tsv_query_expr = "plainto_tsquery(:config, :q)"
+        if fields == "title":
+            order_expr = "{sim}"
+        elif fields == "content":
+            order_expr = "{rank}"
         else:
-            tsv_expr = "to_tsvector(:config, aft.text)"
-            tsv_query_expr = "plainto_tsquery(:config, :q)"
-
-        base_cte = """
-            WITH main_commits AS (
-                SELECT DISTINCT ON (article_id) article_id, head_commit_id
-                FROM branches
-                WHERE name = 'main'
-                ORDER BY article_id, created_at DESC
+            order_expr = "({rank} * 0.5 + {sim} * 1.0)"
+
+        # Ключ сортировки без NULL (нет строки article_search_index) и в double precision:
+        # значение из курсора должно сравниваться с ним точно
+        sort_expr = f"CAST(COALESCE({order_expr.format(rank=rank_expr, sim=sim_expr)}, 0) AS double precision)"
+        page_cond = ""
+        if cursor is not None:
+            # Продолжение после последней статьи предыдущей страницы, без OFFSET
+            page_cond = (f" AND ({sort_expr}, a.updated_at, a.id) < (CAST(:after_rank AS double precision), "
+                         "CAST(:after_updated_at AS timestamptz), CAST(:after_id AS uuid))")
+            params.update(after_rank=cursor.rank, after_updated_at=cursor.updated_at_value,
+                          after_id=cursor.id, offset=0)
+
+        match_cap = settings.SEARCH_MATCH_CAP
+        if cursor is not None:
+            # Версия индекса та же, что на первой странице, - и количество то же
+            total_expr = "NULL"
+            count_sql = None
+        elif match_cap > 0:
+            # Подсчёт останавливается после SEARCH_MATCH_CAP + 1 совпадений ("1000+ результатов")
+            capped_count = f"(SELECT count(*) FROM (SELECT 1 {match_from} LIMIT :count_limit) capped)"
+            params["count_limit"] = match_cap + 1
+            total_expr = capped_count
+            count_sql = f"SELECT {capped_count}"
+        else:
+            total_expr = "count(*) OVER ()"
+            count_sql = f"SELECT count(*) {match_from}"
+
+        headline_query = f"plainto_tsquery({headline_config}, :q)"
+        if settings.SEARCH_SECTIONS_ENABLED:
+            # Сниппет по лучшему разделу головы; без разделов (не построены) - по всему тексту
+            headline_text = "COALESCE(best.body, aft.text)"
+            section_expr = "best.heading"
+            section_join = f"""
+            LEFT JOIN LATERAL (
+                SELECT s.heading, s.body
+                FROM article_sections s
+                WHERE s.article_id = page.id AND s.commit_id = page.head_commit_id
+                ORDER BY ts_rank_cd(s.tsv, {headline_query}) DESC, s.position
+                LIMIT 1
+            ) best ON true
+            """
+        else:
+            headline_text = "aft.text"
+            section_expr = "NULL"
+            section_join = ""
+
+        # Один запрос: совпадения с рангом и общим количеством, страница,
+        # затем ts_headline только для строк страницы, а не для всех совпадений.
+        # MATERIALIZED не даёт планировщику подставить CTE во внешний запрос
+        main_sql = f"""
+            WITH page AS MATERIALIZED (
+                SELECT a.id, h.title, a.created_at, a.updated_at, h.head_commit_id, h.ts_config,
+                       {rank_expr} AS rank_content,
+                       {sim_expr} AS sim_title,
+                       {sort_expr} AS sort_rank,
+                       {total_expr} AS total_count
+                {match_from}{page_cond}
+                ORDER BY sort_rank DESC, a.updated_at DESC, a.id DESC
+                OFFSET :offset LIMIT :limit
             )
+            SELECT page.id, page.title, page.created_at, page.updated_at,
+                   ts_headline({headline_config}, {headline_text}, {headline_query},
+                               'StartSel=<mark>, StopSel=</mark>, MaxWords=30, MinWords=15') AS snippet,
+                   {section_expr} AS section,
+                   page.rank_content, page.sim_title, page.sort_rank, page.total_count
+            FROM page
+            JOIN articles_full_text aft ON aft.article_id = page.id AND aft.commit_id = page.head_commit_id
+            {section_join}
+            ORDER BY page.sort_rank DESC, page.updated_at DESC, page.id DESC
         """
 
-        if fields == "title":
-            where_cond = "a.title % :q"
-        elif fields == "content":
-            where_cond = f"{tsv_expr} @@ {tsv_query_expr}"
-        else:
-            where_cond = f"(a.title % :q OR {tsv_expr} @@ {tsv_query_expr})"
-
-        # Подсчёт общего количества
-        count_sql = base_cte + f"""
-            SELECT COUNT(*)
-            FROM articles a
-            JOIN main_commits mc ON a.id = mc.article_id
-            JOIN articles_full_text aft ON mc.head_commit_id = aft.commit_id
-            WHERE a.status = 'published' AND {where_cond}
+        result = await self.db.execute(text(main_sql), params)
+        rows = [dict(row) for row in result.mappings().all()]
+        if cursor is not None:
+            for row in rows:
+                row.pop("total_count")
+            return cursor.total, rows
+        if not rows:
+            if offset == 0:
+                return 0, []
+            # Страница за пределами выдачи: общее количество нужно отдельным запросом
+            return await self.db.scalar(text(count_sql), params) or 0, []
+
+        total = rows[0]["total_count"]
+        for row in rows:
+            row.pop("total_count")
+        return total, rows
+
+    async def facets(
+        self,
+        q: str,
+        language: Optional[str] = None,
+        fields: str = "both",
+        category: Optional[str] = None,
+        tag: Optional[str] = None,
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        if not q:
+            return {}
+        params = {"q": q, "facet_limit": settings.SEARCH_FACET_LIMIT}
+        # Совпадения без фильтра по языку: счётчики языков показывают, сколько найдётся на другом языке.
+        # Для статьи на языке запроса конфигурация её tsvector та же, что и конфигурация языка
+        match_from, _, _ = self._match(params, None, fields, category, tag)
+        language_cond = "true"
+        if language in TS_CONFIGS:
+            params["language"] = language
+            language_cond = "m.language = :language"
+
+        # Один проход по совпадениям; раздел считается вместе с предками (статья в a.b.c входит в a и a.b)
+        facets_sql = f"""
+            WITH matched AS MATERIALIZED (
+                SELECT h.article_id AS id, h.language
+                {match_from}
+            )
+            (SELECT 'language' AS facet, m.language AS value, count(*) AS count
+             FROM matched m
+             WHERE m.language IS NOT NULL
+             GROUP BY m.language)
+            UNION ALL
+            (SELECT 'category', CAST(anc.path AS text), count(DISTINCT m.id)
+             FROM matched m
+             JOIN article_categories ac ON ac.article_id = m.id
+             JOIN categories c ON c.id = ac.category_id
+             JOIN categories anc ON anc.path @> c.path
+             WHERE {language_cond}
+             GROUP BY anc.path
+             ORDER BY 3 DESC, 2
+             LIMIT :facet_limit)
+            UNION ALL
+            (SELECT 'tag', t.tag, count(*)
+             FROM matched m
+             JOIN tags t ON t.article_id = m.id
+             WHERE {language_cond}
+             GROUP BY t.tag
+             ORDER BY 3 DESC, 2
+             LIMIT :facet_limit)
         """
-        total = await self.db.scalar(text(count_sql), params) or 0
+        result = await self.db.execute(text(facets_sql), params)
+        facets: Dict[str, List[Dict[str, Any]]] = {"category": [], "tag": [], "language": []}
+        for row in result.mappings().all():
+            facets[row["facet"]].append({"value": row["value"], "count": row["count"]})
+        facets["language"].sort(key=lambda item: (-item["count"], item["value"]))
+        return facets
 
-        if total == 0:
-            return 0, []
+    def _match(self, params: Dict[str, Any], language: Optional[str], fields: str,
+               category: Optional[str], tag: Optional[str]) -> Tuple[str, str, str]:
+        """FROM ... WHERE совпадений, выражение ранга по тексту и конфигурация для ts_headline"""
+        # tsvector головы построен конфигурацией языка статьи (article_heads.ts_config)
+        if language in TS_CONFIGS:
+            # Язык задан: только статьи на этом языке, запрос в той же конфигурации
+            params["language"] = language
+            params["config"] = TS_CONFIGS[language]
+            language_cond = "h.language = :language AND "
+            content_cond = "si.tsv @@ plainto_tsquery(:config, :q)"
+            rank_expr = "ts_rank_cd(si.tsv, plainto_tsquery(:config, :q))"
+            headline_config = ":config"
+        else:
+            # Язык не задан: запрос строится в конфигурации каждой статьи.
+            # Условие раскрыто по конфигурациям, чтобы использовался GIN-индекс
+            language_cond = ""
+            content_cond = "(" + " OR ".join(
+                f"(h.ts_config = '{config}' AND si.tsv @@ plainto_tsquery('{config}', :q))"
+                for config in sorted(set(TS_CONFIGS.values()) | {FALLBACK_TS_CONFIG})
+            ) + ")"
+            rank_expr = "ts_rank_cd(si.tsv, plainto_tsquery(h.ts_config::regconfig, :q))"
+            headline_config = "page.ts_config::regconfig"
 
-        rank_expr = f"ts_rank_cd({tsv_expr}, {tsv_query_expr})"
-        sim_expr = "similarity(a.title, :q)"
+        filter_cond = ""
+        if category:
+            params["category"] = category
+            filter_cond += f" AND {CATEGORY_FILTER}"
+        if tag:
+            params["tag"] = tag
+            filter_cond += f" AND {TAG_FILTER}"
 
         if fields == "title":
-            order_expr = "sub.sim_title"
+            where_cond = "h.title % :q"
         elif fields == "content":
-            order_expr = "sub.rank_content"
+            where_cond = content_cond
         else:
-            order_expr = "(sub.rank_content * 0.5 + sub.sim_title * 1.0)"
-
-        main_sql = base_cte + f"""
-            SELECT sub.id, sub.title, sub.created_at, sub.updated_at,
-                   sub.snippet, sub.rank_content, sub.sim_title
-            FROM (
-                SELECT a.id, a.title, a.created_at, a.updated_at,
-                       ts_headline(:config, aft.text, {tsv_query_expr},
-                                   'StartSel=<mark>, StopSel=</mark>, MaxWords=30, MinWords=15') as snippet,
-                       {rank_expr} as rank_content,
-                       {sim_expr} as sim_title
-                FROM articles a
-                JOIN main_commits mc ON a.id = mc.article_id
-                JOIN articles_full_text aft ON mc.head_commit_id = aft.commit_id
-                WHERE a.status = 'published' AND {where_cond}
-            ) sub
-            ORDER BY {order_expr} DESC, sub.updated_at DESC
-            OFFSET :offset LIMIT :limit
-        """
+            where_cond = f"(h.title % :q OR {content_cond})"
 
-        result = await self.db.execute(text(main_sql), params)
-        rows = result.mappings().all()
-        return total, [dict(row) for row in rows]
-
-    def _generate_cache_key(self, q: str, language: Optional[str], fields: str, limit: int, offset: int) -> str:
-        key_data = f"{q}:{language}:{fields}:{limit}:{offset}"
-        key_hash = hashlib.md5(key_data.encode()).hexdigest()
-        return f"search:{key_hash}"
-
-    def _json_serializer(self, obj):
-        if isinstance(obj, datetime):
-            return obj.isoformat()
-        raise TypeError(f"Type {type(obj)} not serializable")
\ No newline at end of file
+        # article_heads хранит голову main, статус и язык, поэтому ветки в поиске не участвуют;
+        # tsvector хранится только для головы (article_search_index)
+        match_from = f"""
+                FROM article_heads h
+                JOIN articles a ON a.id = h.article_id
+                LEFT JOIN article_search_index si ON si.article_id = h.article_id
+                WHERE h.status = 'published' AND {language_cond}{where_cond}{filter_cond}
+        """
+        return match_from, rank_expr, headline_config
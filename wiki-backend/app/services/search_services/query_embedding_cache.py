@@ -0,0 +1,56 @@
+# app/services/search_services/query_embedding_cache.py
+import base64
+import hashlib
+import logging
+from array import array
+from typing import List, Optional
+
+from app.core.cache import get_redis
+from app.core.config import settings
+from app.core.embedding_client import embedding_client
+from app.core.metrics import metrics
+from app.services.search_services.search_cache import normalize_query
+
+logger = logging.getLogger(__name__)
+
+QUERY_EMBEDDING_PREFIX = "search:qemb"
+
+
+class QueryEmbeddingCache:
+    """
+    Эмбеддинги поисковых запросов в Redis по нормализованному тексту запроса.
+    В отличие от кэша выдачи не зависит от версии индекса: вектор запроса не меняется
+    при правке статей, поэтому популярные гибридные запросы не ходят в модель вовсе.
+    Вектор хранится как float32 в base64 (3 КБ на 768 измерений вместо ~15 КБ JSON).
+    """
+
+    @staticmethod
+    def key(q: str) -> str:
+        digest = hashlib.md5(normalize_query(q).encode()).hexdigest()
+        return f"{QUERY_EMBEDDING_PREFIX}:{settings.EMBEDDING_MODEL}:{digest}"
+
+    async def get(self, q: str) -> Optional[List[float]]:
+        try:
+            cached = await get_redis().get(self.key(q))
+        except Exception as e:
+            logger.debug(f"Query embedding cache read failed: {e}")
+            return None
+        await metrics.incr("search.query_embedding.hit" if cached else "search.query_embedding.miss")
+        if not cached:
+            return None
+        return array("f", base64.b64decode(cached)).tolist()
+
+    async def set(self, q: str, embedding: List[float]):
+        try:
+            await get_redis().set(self.key(q), base64.b64encode(array("f", embedding).tobytes()).decode(),
+                                  ex=settings.QUERY_EMBEDDING_CACHE_TTL)
+        except Exception as e:
+            logger.debug(f"Query embedding cache write failed: {e}")
+
+    async def get_or_embed(self, q: str) -> List[float]:
+        """Вектор запроса из кэша или от сервиса моделей; EmbeddingServiceUnavailable пробрасывается"""
+        embedding = await self.get(q)
+        if embedding is None:
+            embedding = (await embedding_client.embed([normalize_query(q)], kind="query"))[0]
+            await self.set(q, embedding)
+        return embedding
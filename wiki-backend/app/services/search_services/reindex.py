@@ -0,0 +1,50 @@
+# app/services/search_services/reindex.py
+"""
+Общее для полного построения поисковых индексов (scripts/reindex_typesense.py,
+scripts/build_embedded_index.py) и бенчмарков: чтение голов статей с полным текстом
+и повторная постановка в очередь статей, изменённых во время построения.
+"""
+from sqlalchemy import Select, and_, func, select
+
+from app.core.database import AsyncSessionLocal
+from app.models.article import Article, ArticleFull
+from app.models.article_head import ArticleHead
+from app.services.typesense_indexer import TypesenseIndexer
+
+
+def heads_select() -> Select:
+    """Головы статей; text - полный текст головы или None, если его нет в articles_full_text"""
+    return (
+        select(
+            ArticleHead.article_id,
+            ArticleHead.title,
+            ArticleHead.language,
+            ArticleHead.head_commit_id,
+            Article.created_at,
+            Article.updated_at,
+            ArticleFull.text,
+        )
+        .join(Article, Article.id == ArticleHead.article_id)
+        .outerjoin(
+            ArticleFull,
+            and_(ArticleFull.article_id == ArticleHead.article_id,
+                 ArticleFull.commit_id == ArticleHead.head_commit_id)
+        )
+    )
+
+
+# Порядок по article_id - по нему скрипты продолжают прерванное построение
+HEADS_QUERY = heads_select().order_by(ArticleHead.article_id)
+
+
+async def requeue_changed_since(started_at: float) -> int:
+    """Статьи, чья голова менялась во время построения: воркер синхронизировал их в старый индекс"""
+    async with AsyncSessionLocal() as db:
+        article_ids = (await db.scalars(
+            select(ArticleHead.article_id).where(ArticleHead.updated_at >= func.to_timestamp(started_at))
+        )).all()
+        indexer = TypesenseIndexer(db)
+        for article_id in article_ids:
+            await indexer.mark_for_sync(article_id)
+        await db.commit()
+    return len(article_ids)
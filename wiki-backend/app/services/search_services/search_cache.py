@@ -0,0 +1,172 @@
+# app/services/search_services/search_cache.py
+import asyncio
+import hashlib
+import json
+import logging
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Set, Tuple
+from uuid import UUID
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.cache import get_redis
+from app.core.config import settings
+from app.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+SEARCH_VERSION_KEY = "search:version"
+SEARCH_RESULT_PREFIX = "search:result"
+SEARCH_QUERY_STATS_PREFIX = "search:cache:queries"
+# Пустая выдача хранится маркером с отдельным TTL
+NEGATIVE_MARKER = "-"
+# Флаг в session.info: транзакция поменяла голову статьи
+SEARCH_INDEX_CHANGED = "search_index_changed"
+QUERY_STATS_TTL_SECONDS = 2 * 86400
+
+SearchResult = Tuple[int, List[Dict[str, Any]]]
+
+
+def _json_default(obj):
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    if isinstance(obj, UUID):
+        return str(obj)
+    raise TypeError(f"Type {type(obj)} not serializable")
+
+
+def normalize_query(q: str) -> str:
+    return " ".join(q.lower().split())[:200]
+
+
+class SearchCache:
+    """
+    Кэш выдачи поиска в Redis. Ключ включает глобальную версию поискового индекса,
+    которая растёт при каждой смене головы статьи и каждой пачке синхронизации:
+    старые записи перестают читаться сразу, поэтому TTL может быть долгим.
+    Ошибки Redis не ломают поиск - запрос просто идёт в движок.
+    """
+
+    def __init__(self, engine: str):
+        self.engine = engine
+
+    @staticmethod
+    async def get_version() -> int:
+        value = await get_redis().get(SEARCH_VERSION_KEY)
+        return int(value) if value else 0
+
+    @staticmethod
+    async def bump_version() -> Optional[int]:
+        try:
+            return await get_redis().incr(SEARCH_VERSION_KEY)
+        except Exception as e:
+            logger.warning(f"Failed to bump search index version: {e}")
+            return None
+
+    def key(self, version: int, params: Dict[str, Any]) -> str:
+        raw = json.dumps(params, sort_keys=True, default=str)
+        digest = hashlib.md5(raw.encode()).hexdigest()
+        return f"{SEARCH_RESULT_PREFIX}:{self.engine}:v{version}:{digest}"
+
+    async def get(
+        self, params: Dict[str, Any], record: bool = True
+    ) -> Tuple[Optional[int], Optional[SearchResult]]:
+        """
+        (версия, выдача); выдача None - промах. Версию нужно передать в set().
+        record=False - вспомогательные записи (фасеты), не попадают в статистику кэша выдачи.
+        """
+        if settings.SEARCH_CACHE_TTL <= 0:
+            return None, None
+        try:
+            version = await self.get_version()
+            cached = await get_redis().get(self.key(version, params))
+        except Exception as e:
+            logger.debug(f"Search cache read failed: {e}")
+            return None, None
+
+        if cached is None:
+            outcome, result = "miss", None
+        elif cached == NEGATIVE_MARKER:
+            outcome, result = "negative_hit", (0, [])
+        else:
+            outcome, result = "hit", tuple(json.loads(cached))
+        if record:
+            await self._record(params.get("q") or "", outcome)
+        return version, result
+
+    async def set(self, version: Optional[int], params: Dict[str, Any], total: int, results: List[Dict[str, Any]]):
+        if version is None or settings.SEARCH_CACHE_TTL <= 0:
+            return
+        try:
+            if total == 0 and not results:
+                await get_redis().set(self.key(version, params), NEGATIVE_MARKER,
+                                      ex=settings.SEARCH_CACHE_NEGATIVE_TTL)
+            else:
+                await get_redis().set(self.key(version, params),
+                                      json.dumps((total, results), default=_json_default),
+                                      ex=settings.SEARCH_CACHE_TTL)
+        except Exception as e:
+            logger.debug(f"Search cache write failed: {e}")
+
+    @staticmethod
+    def _stats_key(day: str, kind: str) -> str:
+        return f"{SEARCH_QUERY_STATS_PREFIX}:{day}:{kind}"
+
+    async def _record(self, q: str, outcome: str):
+        """Общие счётчики и счётчики по запросам за текущие сутки (обращения и попадания)"""
+        day = date.today().strftime("%Y%m%d")
+        query = normalize_query(q)
+        try:
+            async with get_redis().pipeline(transaction=False) as pipe:
+                pipe.hincrby(metrics.counters_key, f"search.cache.{outcome}", 1)
+                pipe.zincrby(self._stats_key(day, "lookups"), 1, query)
+                if outcome != "miss":
+                    pipe.zincrby(self._stats_key(day, "hits"), 1, query)
+                pipe.expire(self._stats_key(day, "lookups"), QUERY_STATS_TTL_SECONDS)
+                pipe.expire(self._stats_key(day, "hits"), QUERY_STATS_TTL_SECONDS)
+                await pipe.execute()
+        except Exception as e:
+            logger.debug(f"Failed to record search cache stats: {e}")
+
+    @classmethod
+    async def query_stats(cls, top: int = 20) -> List[Dict[str, Any]]:
+        """Самые частые запросы за сегодня с долей попаданий в кэш"""
+        day = date.today().strftime("%Y%m%d")
+        redis = get_redis()
+        lookups = await redis.zrevrange(cls._stats_key(day, "lookups"), 0, top - 1, withscores=True)
+        if not lookups:
+            return []
+        hits = await redis.zmscore(cls._stats_key(day, "hits"), [query for query, _ in lookups])
+        return [
+            {"query": query, "lookups": int(count), "hits": int(hit or 0), "hit_rate": round((hit or 0) / count, 4)}
+            for (query, count), hit in zip(lookups, hits)
+        ]
+
+
+_background_tasks: Set[asyncio.Task] = set()
+
+
+def mark_search_index_changed(db: AsyncSession):
+    """Версия индекса увеличится после commit этой сессии (до commit чужой запрос закэширует старые данные)"""
+    db.info[SEARCH_INDEX_CHANGED] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _bump_version_after_commit(session: Session):
+    if not session.info.pop(SEARCH_INDEX_CHANGED, False):
+        return
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        # Синхронный контекст (миграции, скрипты) - кэш живёт до истечения TTL
+        return
+    task = loop.create_task(SearchCache.bump_version())
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _forget_change_after_rollback(session: Session, previous_transaction):
+    session.info.pop(SEARCH_INDEX_CHANGED, None)
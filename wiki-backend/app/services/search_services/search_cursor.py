@@ -0,0 +1,127 @@
+# app/services/search_services/search_cursor.py
+"""
+Курсоры страниц поиска: следующая страница продолжается после последней показанной
+статьи (ранг, updated_at, id), а не пересчитывает и пропускает OFFSET строк.
+
+Курсор привязан к версии поискового индекса (SearchCache.get_version): если статьи
+изменились, порядок выдачи уже другой, и курсор отклоняется (StaleSearchCursor),
+а не показывает дубли и пропуски. Курсор подписан HMAC на SECRET_KEY и хранит
+отпечаток запроса - его нельзя подделать или применить к другому запросу.
+"""
+import base64
+import hashlib
+import hmac
+import json
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from app.core.config import settings
+from app.services.search_services.search_cache import SearchCache
+
+SIGNATURE_BYTES = 16
+
+
+class InvalidSearchCursor(ValueError):
+    pass
+
+
+class StaleSearchCursor(InvalidSearchCursor):
+    """Индекс изменился или курсор истёк: выдачу нужно начать с первой страницы"""
+
+
+@dataclass
+class SearchCursor:
+    version: int
+    query: str  # отпечаток параметров запроса (query_fingerprint)
+    total: int  # при неизменной версии общее количество то же, что на первой странице
+    offset: int  # позиция следующей строки (Typesense продолжает по номеру страницы)
+    rank: float  # ключ сортировки последней статьи страницы
+    updated_at: Optional[str]
+    id: str
+    issued_at: int
+
+    @property
+    def updated_at_value(self) -> Optional[datetime]:
+        return datetime.fromisoformat(self.updated_at) if self.updated_at else None
+
+
+def _b64encode(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(value: str) -> bytes:
+    return base64.urlsafe_b64decode(value + "=" * (-len(value) % 4))
+
+
+def _sign(payload: bytes) -> bytes:
+    return hmac.new(settings.secret_key.encode(), payload, hashlib.sha256).digest()[:SIGNATURE_BYTES]
+
+
+async def index_version() -> Optional[int]:
+    """Текущая версия индекса; None (Redis недоступен) - курсоры не выдаются и не принимаются"""
+    try:
+        return await SearchCache.get_version()
+    except Exception:
+        return None
+
+
+def query_fingerprint(params: Dict[str, Any]) -> str:
+    """Параметры, от которых зависят порядок и размер страницы (без offset и самого курсора)"""
+    relevant = {key: value for key, value in params.items() if key not in ("offset", "cursor")}
+    return hashlib.sha256(json.dumps(relevant, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+
+def encode_cursor(cursor: SearchCursor) -> str:
+    payload = json.dumps(asdict(cursor), separators=(",", ":")).encode()
+    return f"{_b64encode(payload)}.{_b64encode(_sign(payload))}"
+
+
+def decode_cursor(value: str, fingerprint: str, version: Optional[int]) -> SearchCursor:
+    try:
+        encoded_payload, encoded_signature = value.split(".", 1)
+        payload = _b64decode(encoded_payload)
+        signature = _b64decode(encoded_signature)
+    except ValueError:
+        raise InvalidSearchCursor("Malformed search cursor")
+    if not hmac.compare_digest(signature, _sign(payload)):
+        raise InvalidSearchCursor("Search cursor signature mismatch")
+    try:
+        cursor = SearchCursor(**json.loads(payload))
+    except (TypeError, ValueError):
+        raise InvalidSearchCursor("Malformed search cursor")
+
+    if cursor.query != fingerprint:
+        raise InvalidSearchCursor("Search cursor belongs to a different query")
+    if version is None or cursor.version != version:
+        raise StaleSearchCursor("Search index changed since the cursor was issued")
+    if time.time() - cursor.issued_at > settings.SEARCH_CURSOR_TTL_SECONDS:
+        raise StaleSearchCursor("Search cursor expired")
+    return cursor
+
+
+def next_cursor(version: Optional[int], fingerprint: str, total: int, offset: int, limit: int,
+                results: list) -> Optional[str]:
+    """Курсор на страницу после results; None - страница последняя или версия индекса неизвестна"""
+    if version is None or len(results) < limit:
+        return None
+    # total, упёршийся в SEARCH_MATCH_CAP, не точный - конец выдачи виден только по неполной странице
+    if not 0 < settings.SEARCH_MATCH_CAP < total and offset + len(results) >= total:
+        return None
+    last = results[-1]
+    if last.get("sort_rank") is None:
+        return None
+    updated_at = last.get("updated_at")
+    if isinstance(updated_at, datetime):
+        updated_at = updated_at.isoformat()
+    return encode_cursor(SearchCursor(
+        version=version,
+        query=fingerprint,
+        total=total,
+        offset=offset + len(results),
+        rank=float(last["sort_rank"]),
+        updated_at=updated_at,
+        id=str(last["id"]),
+        issued_at=int(time.time()),
+    ))
@@ -6,6 +6,7 @@ from typesense import AsyncClient
 from app.core.enums import SearchEngineType
 from app.core.config import settings
 from app.services.search_services.base_search import BaseSearchService
+from app.services.search_services.embedded_search import EmbeddedSearchService
 from app.services.search_services.postgres_search import PostgresSearchService
 from app.services.search_services.typesense_search import TypesenseSearchService
 
@@ -16,6 +17,7 @@ class SearchServiceFactory:
     _services: Dict[SearchEngineType, Type[BaseSearchService]] = {
         SearchEngineType.POSTGRES: PostgresSearchService,
         SearchEngineType.TYPESENSE: TypesenseSearchService,
+        SearchEngineType.EMBEDDED: EmbeddedSearchService,
     }
 
     @classmethod
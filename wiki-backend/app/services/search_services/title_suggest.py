@@ -0,0 +1,370 @@
+# app/services/search_services/title_suggest.py
+"""
+Подсказки заголовков (GET /search/suggest) из памяти процесса.
+
+Ключи - нормализованный заголовок и его хвосты с каждого из первых
+SEARCH_SUGGEST_WORD_KEYS слов ("война и мир" -> "война и мир", "и мир", "мир"),
+отсортированы; статьи с ключом на данный префикс - непрерывный диапазон,
+который находится двумя bisect. Лучшие SUGGEST_TOP_K статей префикса по популярности
+кэшируются (LRU). Короткие префиксы (их диапазоны самые длинные) считаются при построении
+и не вытесняются; после изменений они пересчитываются в потоке, а до замены отвечают
+старые списки.
+
+Каждый воркер uvicorn держит свою копию: TitleSuggestListener строит её при старте
+и обновляет по уведомлениям триггера на article_heads (канал article_heads).
+Пока копия не построена или соединение LISTEN потеряно, ответ даёт pg_trgm
+(ix_article_heads_title_trgm). Популярность - выбор подсказки пользователем
+(POST /search/suggest/select), общий счётчик в Redis.
+"""
+import asyncio
+import heapq
+import json
+import logging
+from bisect import bisect_left
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+import asyncpg
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import get_redis
+from app.core.config import settings
+from app.core.database import asyncpg_dsn
+from app.services.search_services.embedded_index import tokenize
+
+logger = logging.getLogger(__name__)
+
+# Канал pg_notify триггера на article_heads (смена заголовка или статуса, удаление)
+SUGGEST_CHANNEL = "article_heads"
+SUGGEST_POPULARITY_KEY = "search:suggest:popularity"
+SUGGEST_TOP_K = 20
+# Префиксы до этой длины ранжируются при построении, остальные - при первом запросе
+WARM_PREFIX_CHARS = 2
+POPULARITY_TOP = 10000
+RECONNECT_SECONDS = 5
+FALLBACK_MIN_CHARS = 3
+MAX_CHAR = "\U0010ffff"
+
+TITLES_SQL = "SELECT article_id, title FROM article_heads WHERE status = 'published'"
+
+# Префикс любого слова или похожий заголовок (опечатка); совпадения с начала заголовка выше
+FALLBACK_SQL = """
+    SELECT article_id AS id, title
+    FROM article_heads
+    WHERE status = 'published' AND (lower(title) LIKE :contains OR lower(title) % :q)
+    ORDER BY lower(title) LIKE :prefix DESC, similarity(lower(title), :q) DESC, length(title), title
+    LIMIT :limit
+"""
+
+
+def suggest_key(value: str) -> str:
+    return " ".join(tokenize(value))
+
+
+def title_keys(title: str, word_keys: int) -> List[str]:
+    words = tokenize(title)
+    return list(dict.fromkeys(" ".join(words[i:]) for i in range(min(len(words), word_keys))))
+
+
+def prefix_owners(keys: List[str], owners: List[str], prefix: str) -> List[str]:
+    """Статьи с ключом на префикс (копия диапазона, с повторами)"""
+    start = bisect_left(keys, prefix)
+    end = bisect_left(keys, prefix + MAX_CHAR, start)
+    return owners[start:end]
+
+
+def rank_prefix(keys: List[str], owners: List[str], titles: Dict[str, str],
+                popularity: Dict[str, float], prefix: str) -> List[str]:
+    """Лучшие статьи префикса: популярность, затем короче и по алфавиту"""
+    return rank_owners(prefix_owners(keys, owners, prefix), titles, popularity)
+
+
+def rank_owners(owners: List[str], titles: Dict[str, str], popularity: Dict[str, float]) -> List[str]:
+    # Вызывается и из потока, пока event loop меняет titles: удалённые статьи пропускаются
+    candidates = {article_id for article_id in owners if article_id in titles}
+    return heapq.nsmallest(
+        SUGGEST_TOP_K, candidates,
+        key=lambda article_id: (
+            -popularity.get(article_id, 0.0), len(titles.get(article_id, "")), titles.get(article_id, "")
+        ),
+    )
+
+
+class TitleSuggestIndex:
+    """Ключи и владельцы - параллельные списки: кортеж на ключ стоил бы лишние 56 байт"""
+
+    def __init__(self, word_keys: Optional[int] = None, cache_size: Optional[int] = None):
+        self.word_keys = word_keys or settings.SEARCH_SUGGEST_WORD_KEYS
+        self.cache_size = cache_size or settings.SEARCH_SUGGEST_CACHE_SIZE
+        self.keys: List[str] = []
+        self.owners: List[str] = []
+        self.titles: Dict[str, str] = {}
+        self.popularity: Dict[str, float] = {}
+        self._top: "OrderedDict[str, List[str]]" = OrderedDict()
+        # Короткие префиксы вне LRU; изменённые ждут пересчёта в потоке в _stale
+        self._warm: Dict[str, List[str]] = {}
+        self._stale: Set[str] = set()
+        self._warm_task: Optional[asyncio.Task] = None
+        # Результат пересчёта, начатого до перестройки, отбрасывается
+        self._generation = 0
+        self.ready = False
+        # Уведомления, пришедшие во время перестройки, применяются после неё
+        self._pending: Optional[List[dict]] = None
+
+    def begin_rebuild(self):
+        """Вызывается до LISTEN: уведомления копятся до замены структур в rebuild()"""
+        self._pending = []
+
+    async def rebuild(self, rows: Iterable[Tuple[Any, str]]):
+        if self._pending is None:
+            self._pending = []
+        try:
+            keys, owners, titles, warm = await asyncio.to_thread(self._build, list(rows), dict(self.popularity))
+            self.keys, self.owners, self.titles, self._warm = keys, owners, titles, warm
+            self._top = OrderedDict()
+            self._stale = set()
+            self._generation += 1
+            pending, self._pending = self._pending, None
+            for event in pending:
+                self.apply_event(event)
+            self.ready = True
+        finally:
+            self._pending = None
+        logger.info(f"Title suggest index built: {len(self.titles)} titles, {len(self.keys)} keys")
+
+    def _build(self, rows: List[Tuple[Any, str]], popularity: Dict[str, float]):
+        """Выполняется в потоке над новыми структурами; текущие продолжают отвечать"""
+        pairs = []
+        titles = {}
+        for article_id, title in rows:
+            article_id = str(article_id)
+            titles[article_id] = title
+            pairs.extend((key, article_id) for key in title_keys(title, self.word_keys))
+        pairs.sort()
+        keys = [key for key, _ in pairs]
+        owners = [owner for _, owner in pairs]
+        warm = {
+            prefix: rank_prefix(keys, owners, titles, popularity, prefix)
+            for prefix in {key[:n] for key in keys for n in range(1, WARM_PREFIX_CHARS + 1)}
+        }
+        return keys, owners, titles, warm
+
+    def apply_event(self, event: dict):
+        if self._pending is not None:
+            self._pending.append(event)
+            return
+        article_id = str(event["id"])
+        self.remove(article_id)
+        if not event.get("deleted") and event.get("status") == "published":
+            self.add(article_id, event["title"])
+
+    def add(self, article_id: str, title: str):
+        keys = title_keys(title, self.word_keys)
+        self.titles[article_id] = title
+        for key in keys:
+            index = bisect_left(self.keys, key)
+            self.keys.insert(index, key)
+            self.owners.insert(index, article_id)
+        self._invalidate(keys)
+
+    def remove(self, article_id: str):
+        title = self.titles.pop(article_id, None)
+        if title is None:
+            return
+        keys = title_keys(title, self.word_keys)
+        for key in keys:
+            index = bisect_left(self.keys, key)
+            while index < len(self.keys) and self.keys[index] == key:
+                if self.owners[index] == article_id:
+                    del self.keys[index]
+                    del self.owners[index]
+                    break
+                index += 1
+        self._invalidate(keys)
+
+    def _invalidate(self, keys: List[str]):
+        for key in keys:
+            for n in range(1, len(key) + 1):
+                if n <= WARM_PREFIX_CHARS:
+                    self._stale.add(key[:n])
+                else:
+                    self._top.pop(key[:n], None)
+        self._schedule_warm()
+
+    def _schedule_warm(self):
+        if not self._stale or (self._warm_task is not None and not self._warm_task.done()):
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # Вне event loop (скрипты) - пересчёт на месте
+            prefixes, self._stale = self._stale, set()
+            self._store_warm(self._rank_warm(self._warm_owners(prefixes), self.popularity))
+            return
+        self._warm_task = loop.create_task(self._refresh_warm())
+
+    async def _refresh_warm(self):
+        # Изменения во время пересчёта снова попадают в _stale и разбираются следующим проходом
+        while self._stale:
+            prefixes, self._stale = self._stale, set()
+            generation = self._generation
+            # Диапазоны копируются здесь: add/remove сдвигают keys и owners, пока поток ранжирует
+            candidates = self._warm_owners(prefixes)
+            try:
+                ranked = await asyncio.to_thread(self._rank_warm, candidates, self.popularity)
+            except Exception as e:
+                logger.warning(f"Failed to refresh short suggest prefixes: {e}")
+                return
+            if generation == self._generation:
+                self._store_warm(ranked)
+
+    def _warm_owners(self, prefixes: Set[str]) -> Dict[str, List[str]]:
+        return {prefix: prefix_owners(self.keys, self.owners, prefix) for prefix in prefixes}
+
+    def _rank_warm(self, candidates: Dict[str, List[str]], popularity: Dict[str, float]) -> Dict[str, List[str]]:
+        return {prefix: rank_owners(owners, self.titles, popularity) for prefix, owners in candidates.items()}
+
+    def _store_warm(self, ranked: Dict[str, List[str]]):
+        for prefix, top in ranked.items():
+            if top:
+                self._warm[prefix] = top
+            else:
+                self._warm.pop(prefix, None)
+
+    def set_popularity(self, popularity: Dict[str, float]):
+        """Сбрасываются только префиксы статей, чья популярность изменилась"""
+        changed = [
+            article_id for article_id in set(self.popularity) | set(popularity)
+            if self.popularity.get(article_id) != popularity.get(article_id)
+        ]
+        self.popularity = popularity
+        for article_id in changed:
+            title = self.titles.get(article_id)
+            if title is not None:
+                self._invalidate(title_keys(title, self.word_keys))
+
+    def suggest(self, q: str, limit: int) -> List[Dict[str, str]]:
+        prefix = suggest_key(q)
+        if not prefix:
+            return []
+        # Слово дописано - следующее должно начаться с нового слова
+        if q[-1:].isspace():
+            prefix += " "
+        top = self._warm.get(prefix) if len(prefix) <= WARM_PREFIX_CHARS else None
+        if top is None:
+            top = self._top.get(prefix)
+            if top is None:
+                top = rank_prefix(self.keys, self.owners, self.titles, self.popularity, prefix)
+                self._top[prefix] = top
+                if len(self._top) > self.cache_size:
+                    self._top.popitem(last=False)
+            else:
+                self._top.move_to_end(prefix)
+
+        # Список короткого префикса может ждать пересчёта: удалённые статьи пропускаются
+        results = []
+        for article_id in top:
+            title = self.titles.get(article_id)
+            if title is not None:
+                results.append({"id": article_id, "title": title})
+                if len(results) == limit:
+                    break
+        return results
+
+
+title_suggest_index = TitleSuggestIndex()
+
+
+async def fallback_suggest(db: AsyncSession, q: str, limit: int) -> List[Dict[str, Any]]:
+    """Подсказки из Postgres через GIN pg_trgm (индекс в памяти не готов или ничего не нашёл)"""
+    query = suggest_key(q)
+    if len(query) < FALLBACK_MIN_CHARS:
+        return []
+    pattern = query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    result = await db.execute(text(FALLBACK_SQL), {
+        "q": query, "contains": f"%{pattern}%", "prefix": f"{pattern}%", "limit": limit,
+    })
+    return [dict(row) for row in result.mappings().all()]
+
+
+async def record_selection(article_id: str):
+    """Пользователь выбрал подсказку: популярность статьи растёт во всех воркерах со следующим обновлением"""
+    try:
+        await get_redis().zincrby(SUGGEST_POPULARITY_KEY, 1, str(article_id))
+    except Exception as e:
+        logger.debug(f"Failed to record suggest selection: {e}")
+
+
+class TitleSuggestListener:
+    """
+    Держит title_suggest_index процесса в актуальном состоянии. Сначала LISTEN, потом чтение
+    заголовков - изменения между ними не теряются. Потеря соединения делает индекс неготовым
+    (подсказки идут из pg_trgm) до переподключения и полной перестройки.
+    """
+
+    def __init__(self, index: Optional[TitleSuggestIndex] = None):
+        self.index = index or title_suggest_index
+        self.connection: Optional[asyncpg.Connection] = None
+        self.running = False
+        self.wakeup = asyncio.Event()
+
+    async def run(self):
+        self.running = True
+        while self.running:
+            self.wakeup.clear()
+            if self.connection is None or self.connection.is_closed():
+                if not await self._connect():
+                    await self._sleep(RECONNECT_SECONDS)
+                    continue
+            await self.refresh_popularity()
+            await self._sleep(settings.SEARCH_SUGGEST_POPULARITY_REFRESH_SECONDS)
+
+    async def stop(self):
+        self.running = False
+        self.wakeup.set()
+        connection, self.connection = self.connection, None
+        if connection is not None and not connection.is_closed():
+            await connection.close()
+
+    async def _sleep(self, seconds: float):
+        try:
+            await asyncio.wait_for(self.wakeup.wait(), timeout=seconds)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _connect(self) -> bool:
+        connection = None
+        try:
+            connection = await asyncpg.connect(asyncpg_dsn())
+            connection.add_termination_listener(self._on_connection_lost)
+            self.index.begin_rebuild()
+            await connection.add_listener(SUGGEST_CHANNEL, self._on_notify)
+            rows = await connection.fetch(TITLES_SQL)
+            await self.refresh_popularity()
+            await self.index.rebuild((row["article_id"], row["title"]) for row in rows)
+        except Exception as e:
+            logger.warning(f"Title suggest index build failed: {e}")
+            if connection is not None and not connection.is_closed():
+                connection.terminate()
+            return False
+        self.connection = connection
+        return True
+
+    def _on_notify(self, connection, pid, channel, payload):
+        try:
+            self.index.apply_event(json.loads(payload))
+        except Exception as e:
+            logger.warning(f"Bad article_heads notification {payload!r}: {e}")
+
+    def _on_connection_lost(self, connection):
+        self.index.ready = False
+        self.wakeup.set()
+
+    async def refresh_popularity(self):
+        try:
+            top = await get_redis().zrevrange(SUGGEST_POPULARITY_KEY, 0, POPULARITY_TOP - 1, withscores=True)
+        except Exception as e:
+            logger.debug(f"Failed to read suggest popularity: {e}")
+            return
+        self.index.set_popularity({article_id: score for article_id, score in top})
@@ -1,16 +1,49 @@
 # app/services/typesense_search.py
+import logging
 from typing import List, Optional, Tuple, Dict, Any
 from datetime import datetime
 
 from typesense import AsyncClient
 
-from app.core.typesense_client import typesense_client
+from app.core.config import settings
+from app.core.embedding_client import EmbeddingServiceUnavailable
+from app.core.enums import EmbeddingSource, TypesenseIndexMode
+from app.core.typesense_client import index_collection, typesense_client
 from app.services.search_services.base_search import BaseSearchService
+from app.services.search_services.query_embedding_cache import QueryEmbeddingCache
+from app.services.search_services.search_cursor import SearchCursor
+
+logger = logging.getLogger(__name__)
+
+# Поля-фасеты коллекции -> ключи ответа facets()
+FACET_FIELDS = {'categories': 'category', 'tags': 'tag', 'language': 'language'}
+
+
+def filter_value(value: str) -> str:
+    """Значение filter_by в обратных кавычках: точки пути раздела и пробелы тега не разбирает парсер"""
+    return f"`{value.replace('`', '')}`"
+
+
+def filter_by(language: Optional[str] = None, category: Optional[str] = None, tag: Optional[str] = None) -> str:
+    conditions = []
+    if language:
+        conditions.append(f'language:={language}')
+    if category:
+        # В categories документа лежат пути раздела и всех его предков - подразделы попадают в фильтр
+        conditions.append(f'categories:={filter_value(category)}')
+    if tag:
+        conditions.append(f'tags:={filter_value(tag)}')
+    return ' && '.join(conditions)
 
 
 class TypesenseSearchService(BaseSearchService):
-    def __init__(self, typesense_client: AsyncClient):
+    def __init__(self, typesense_client: AsyncClient, mode: Optional[TypesenseIndexMode] = None,
+                 collection: Optional[str] = None):
         self.client = typesense_client
+        # mode/collection задаются явно только для сравнения раскладок (benchmarking/typesense_layouts.py)
+        self.mode = mode or settings.TYPESENSE_INDEX_MODE
+        self.collection = collection or index_collection(self.mode)
+        self.query_embeddings = QueryEmbeddingCache()
 
     async def search(
         self,
@@ -21,12 +54,20 @@ class TypesenseSearchService(BaseSearchService):
         offset: int = 0,
         hybrid: bool = False,
         semantic_weight: float = 0.5,
+        cursor: Optional[SearchCursor] = None,
+        category: Optional[str] = None,
+        tag: Optional[str] = None,
     ) -> Tuple[int, List[Dict[str, Any]]]:
         if not q:
             return 0, []
 
-        # Определяем поля для поиска
-        query_by = f'{"embedding, " if hybrid else ""}{"title,content" if fields == "both" else fields}'
+        passages = self.mode == TypesenseIndexMode.PASSAGE
+        if cursor is not None:
+            # Typesense не фильтрует по _text_match: курсор продолжает по номеру страницы,
+            # а версия индекса в курсоре гарантирует, что выдача не сдвинулась
+            offset = cursor.offset
+        text_fields = self._text_fields(fields)
+        query_by = f'{"embedding, " if hybrid else ""}{text_fields}'
 
         # Подготовка параметров поиска
         search_params = {
@@ -38,26 +79,58 @@ class TypesenseSearchService(BaseSearchService):
             'highlight_start_tag': '<mark>',
             'highlight_end_tag': '</mark>',
         }
-
-        # Фильтр по языку, если указан
+        if passages:
+            # Страница - статьи, а не фрагменты: из каждой статьи берётся лучший фрагмент
+            search_params['group_by'] = 'article_id'
+            search_params['group_limit'] = 1
+
+        # Фильтры по языку, разделу и тегу
+        filters = filter_by(language, category, tag)
+        if filters:
+            search_params['filter_by'] = filters
         if language:
-            search_params['filter_by'] = f'language:={language}'
             search_params['language'] = language  # для корректной стемминги
 
+        # Вектор документа в выдаче не нужен (768 чисел на попадание)
+        search_params["exclude_fields"] = "embedding"
+        query_embedding = None
+        if hybrid and settings.TYPESENSE_EMBEDDING_SOURCE == EmbeddingSource.LOCAL:
+            try:
+                query_embedding = await self.query_embeddings.get_or_embed(q)
+            except EmbeddingServiceUnavailable as e:
+                # Без вектора запроса остаётся лексический поиск
+                logger.warning(f"Hybrid search falls back to keyword search: {e}")
+                hybrid = False
+                search_params['query_by'] = text_fields
+
         if hybrid:
             # Используем поле embedding, которое должно быть настроено в коллекции
-            # Параметры: k=100 (количество ближайших соседей), alpha = semantic_weight
-            search_params['vector_query'] = f'embedding:([], k:100, alpha:{semantic_weight})'
-            search_params["exclude_fields"] = "embedding"
+            # Параметры: k=100 (количество ближайших соседей), alpha = semantic_weight.
+            # Пустой вектор - запрос эмбеддит встроенная модель Typesense
+            vector = ",".join(f"{value:.6f}" for value in query_embedding) if query_embedding else ""
+            search_params['vector_query'] = f'embedding:([{vector}], k:100, alpha:{semantic_weight})'
 
         try:
-            response = await self.client.collections['articles'].documents.search(search_params)
+            if query_embedding:
+                # Вектор не помещается в строку GET-запроса: multi_search передаёт параметры в теле POST
+                multi = await self.client.multi_search.perform({'searches': [search_params]},
+                                                               {'collection': self.collection})
+                response = multi['results'][0]
+                if 'error' in response:
+                    raise RuntimeError(response['error'])
+            else:
+                response = await self.client.collections[self.collection].documents.search(search_params)
         except Exception as e:
             # Логирование ошибки
+            logger.error(f"Typesense search failed: {e}")
             return 0, []
 
+        # С group_by found - число групп (статей), попадания лежат в grouped_hits
         total = response.get('found', 0)
-        hits = response.get('hits', [])
+        if passages:
+            hits = [group['hits'][0] for group in response.get('grouped_hits', []) if group.get('hits')]
+        else:
+            hits = response.get('hits', [])
 
         results = []
         for hit in hits:
@@ -72,16 +145,74 @@ class TypesenseSearchService(BaseSearchService):
                 updated_at = datetime.fromtimestamp(updated_at)
 
             results.append({
-                'id': doc['id'],
+                'id': doc.get('article_id', doc['id']),
                 'title': doc['title'],
                 'snippet': snippet,
                 'created_at': created_at,
                 'updated_at': updated_at,
                 'rank_content': hit.get('text_match'),  # опционально
+                'sort_rank': hit.get('text_match') or 0,
                 'sim_title': None,  # Typesense не предоставляет отдельно similarity
+                'section': doc.get('heading') or None,
             })
 
         return total, results
+
+    async def facets(
+        self,
+        q: str,
+        language: Optional[str] = None,
+        fields: str = "both",
+        category: Optional[str] = None,
+        tag: Optional[str] = None,
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Счётчики facet_by по лексическим совпадениям (вектор нашёл бы ближайших соседей для любого запроса).
+        Два поиска в одном multi_search: языки считаются без фильтра по языку
+        """
+        if not q:
+            return {}
+        base = {
+            'q': q,
+            'query_by': self._text_fields(fields),
+            'per_page': 0,
+            'max_facet_values': settings.SEARCH_FACET_LIMIT,
+        }
+        if self.mode == TypesenseIndexMode.PASSAGE:
+            # Счётчики по группам (статьям), а не по фрагментам
+            base['group_by'] = 'article_id'
+            base['group_limit'] = 1
+        searches = [
+            {**base, 'facet_by': 'categories,tags', 'filter_by': filter_by(language, category, tag)},
+            {**base, 'facet_by': 'language', 'filter_by': filter_by(None, category, tag)},
+        ]
+        for search in searches:
+            if not search['filter_by']:
+                del search['filter_by']
+        try:
+            multi = await self.client.multi_search.perform({'searches': searches}, {'collection': self.collection})
+        except Exception as e:
+            logger.error(f"Typesense facet search failed: {e}")
+            return {}
+
+        facets: Dict[str, List[Dict[str, Any]]] = {name: [] for name in FACET_FIELDS.values()}
+        for response in multi['results']:
+            if 'error' in response:
+                logger.error(f"Typesense facet search failed: {response['error']}")
+                return {}
+            for facet in response.get('facet_counts', []):
+                name = FACET_FIELDS.get(facet['field_name'])
+                if name:
+                    facets[name] = [{'value': item['value'], 'count': item['count']} for item in facet['counts']]
+        return facets
+
+    def _text_fields(self, fields: str) -> str:
+        text_fields = {"both": "title,content", "title": "title", "content": "content"}.get(fields, fields)
+        if self.mode == TypesenseIndexMode.PASSAGE:
+            # Заголовок раздела ищется вместе с текстом фрагмента
+            text_fields = text_fields.replace("content", "heading,content")
+        return text_fields
+
     def _extract_snippet(self, highlights: List[Dict]) -> Optional[str]:
         """Извлекает подсвеченный фрагмент из результатов поиска."""
         if not highlights:
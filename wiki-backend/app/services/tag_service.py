@@ -8,6 +8,7 @@ from uuid import UUID
 from app.models.tag import Tag, TagPermission
 from app.models.article import Article
 from app.schemas.tag import TagCreate, TagPermissionCreate
+from app.services.article_head_service import ArticleHeadService
 
 
 class TagService:
@@ -54,6 +55,7 @@ class TagService:
         )
         
         self.db.add(tag)
+        await ArticleHeadService(self.db).mark_facets_changed([tag_data.article_id])
         await self.db.commit()
         await self.db.refresh(tag)
         return tag
@@ -76,6 +78,7 @@ class TagService:
             pass
         
         await self.db.delete(tag)
+        await ArticleHeadService(self.db).mark_facets_changed([article_id])
         await self.db.commit()
         return True
 
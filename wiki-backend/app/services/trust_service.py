@@ -0,0 +1,136 @@
+# app/services/trust_service.py
+import json
+import logging
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from typing import Optional
+from uuid import UUID
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import get_redis
+from app.core.config import settings
+from app.core.enums import TrustTier
+from app.models.article import Commit
+from app.models.moderation import Moderation
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+TRUST_KEY_PREFIX = "trust"
+
+
+@dataclass
+class UserTrust:
+    score: float
+    tier: TrustTier
+    # Есть нерассмотренные запросы на модерацию или аккаунт заблокирован
+    flagged: bool
+    commits: int
+    computed_at: str
+
+
+class TrustService:
+    """
+    Репутация автора для выбора уровня проверки на вандализм. Считается по роли,
+    возрасту аккаунта, числу коммитов и итогам модерации его правок, хранится
+    в Redis и пересчитывается по истечении TRUST_REFRESH_SECONDS.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    @staticmethod
+    def _key(user_id: UUID) -> str:
+        return f"{TRUST_KEY_PREFIX}:{user_id}"
+
+    async def get_tier(self, user_id: UUID) -> TrustTier:
+        if not settings.TRUST_ENABLED:
+            return TrustTier.FULL
+        trust = await self.get_trust(user_id)
+        return trust.tier if trust else TrustTier.FULL
+
+    async def get_trust(self, user_id: UUID) -> Optional[UserTrust]:
+        try:
+            cached = await get_redis().get(self._key(user_id))
+            if cached:
+                data = json.loads(cached)
+                data["tier"] = TrustTier(data["tier"])
+                return UserTrust(**data)
+        except Exception as e:
+            logger.debug(f"Failed to read trust score for {user_id}: {e}")
+
+        trust = await self.compute_trust(user_id)
+        if trust is None:
+            return None
+        try:
+            payload = asdict(trust)
+            payload["tier"] = trust.tier.value
+            await get_redis().set(self._key(user_id), json.dumps(payload), ex=settings.TRUST_REFRESH_SECONDS)
+        except Exception as e:
+            logger.debug(f"Failed to store trust score for {user_id}: {e}")
+        return trust
+
+    async def invalidate(self, user_id: UUID):
+        """Сбросить кэш, например после нового запроса на модерацию правки автора"""
+        try:
+            await get_redis().delete(self._key(user_id))
+        except Exception as e:
+            logger.debug(f"Failed to invalidate trust score for {user_id}: {e}")
+
+    async def compute_trust(self, user_id: UUID) -> Optional[UserTrust]:
+        def moderation_count(status: str):
+            return (
+                select(func.count(Moderation.id))
+                .join(Commit, Commit.id == Moderation.commit_id)
+                .where(Commit.author_id == User.id, Moderation.status == status)
+                .scalar_subquery()
+            )
+
+        query = select(
+            User.role,
+            User.created_at,
+            User.is_active,
+            select(func.count(Commit.id)).where(Commit.author_id == User.id).scalar_subquery().label("commits"),
+            moderation_count("pending").label("pending"),
+            # resolved - модератор подтвердил проблему; rejected - ложное срабатывание, не штрафуется
+            moderation_count("resolved").label("resolved"),
+        ).where(User.id == user_id)
+        row = (await self.db.execute(query)).first()
+        if row is None:
+            return None
+
+        now = datetime.now(timezone.utc)
+        created_at = row.created_at or now
+        if created_at.tzinfo is None:
+            created_at = created_at.replace(tzinfo=timezone.utc)
+        age_days = (now - created_at).total_seconds() / 86400
+
+        flagged = row.pending > 0 or not row.is_active
+        if row.role in settings.trust_trusted_roles:
+            score = 1.0
+        else:
+            experience = (
+                0.6 * min(row.commits / settings.TRUST_FULL_COMMITS, 1.0)
+                + 0.4 * min(age_days / settings.TRUST_FULL_ACCOUNT_AGE_DAYS, 1.0)
+            )
+            score = max(experience - settings.TRUST_FLAG_PENALTY * row.resolved, 0.0)
+
+        is_new = row.commits < settings.TRUST_MIN_COMMITS or age_days < settings.TRUST_MIN_ACCOUNT_AGE_DAYS
+        if flagged or (is_new and row.role not in settings.trust_trusted_roles):
+            tier = TrustTier.FULL
+        elif score >= settings.TRUST_SKIP_THRESHOLD:
+            tier = TrustTier.SKIP
+        elif score >= settings.TRUST_LIGHT_THRESHOLD:
+            tier = TrustTier.LIGHT
+        else:
+            tier = TrustTier.FULL
+
+        return UserTrust(
+            score=round(score, 3),
+            tier=tier,
+            flagged=flagged,
+            commits=row.commits,
+            computed_at=now.isoformat(),
+        )
@@ -1,18 +1,24 @@
 from uuid import UUID
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import insert, delete
-from app.models.search_sync_table import SearchSyncQueue  # новая модель
+from sqlalchemy.dialects.postgresql import insert
+from app.models.search_sync_table import SearchSyncQueue
+
 
 class TypesenseIndexer:
     def __init__(self, db: AsyncSession):
         self.db = db
 
     async def mark_for_sync(self, article_id: UUID, operation: str = 'upsert'):
-        # Можно использовать merge/on conflict для обновления, но для простоты будем вставлять новую запись
-        # Позже при обработке мы возьмём последнюю по времени для каждой статьи.
-        stmt = insert(SearchSyncQueue).values(
-            article_id=article_id,
-            operation=operation
+        """
+        Поставить статью в очередь синхронизации. Запись попадает в транзакцию
+        вызывающего кода (outbox): без commit статьи она не появится, commit делает вызывающий.
+        """
+        stmt = insert(SearchSyncQueue).values(article_id=article_id, operation=operation)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[SearchSyncQueue.article_id],
+            set_={
+                "operation": stmt.excluded.operation,
+                "version": SearchSyncQueue.version + 1,
+            },
         )
         await self.db.execute(stmt)
-        await self.db.commit()
\ No newline at end of file
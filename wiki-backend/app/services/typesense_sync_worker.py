@@ -1,53 +1,257 @@
 # app/services/typesense_sync_worker.py
 import asyncio
-from typing import Dict, List
+import json
+import logging
+import os
+import socket
+import time
+from collections import Counter
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
 from uuid import UUID
 
-from sqlalchemy import select, delete
+import asyncpg
+from sqlalchemy import and_, select, delete, text, tuple_, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from typesense import AsyncClient
 
-from app.core.database import AsyncSessionLocal
-from app.core.typesense_client import typesense_client 
+from app.core.cache import get_redis
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, asyncpg_dsn
+from app.core.embedding_client import embedding_client
+from app.core.enums import EmbeddingSource, SearchEngineType, TypesenseIndexMode
+from app.core.typesense_client import index_collection, typesense_client
+from app.models.article import Article, ArticleFull
+from app.models.article_head import ArticleHead
+from app.models.category import ArticleCategory, Category
 from app.models.search_sync_table import SearchSyncQueue
+from app.models.tag import Tag
 from app.services.commit_service import CommitService  # для получения контента статьи
+from app.services.search_services.embedded_index import embedded_index_writer
+from app.services.search_services.search_cache import SearchCache
+from app.utils.language import detect_language
+from app.utils.sections import split_sections
+
+logger = logging.getLogger(__name__)
+
+# Канал pg_notify, в который пишет триггер на search_sync_queue
+SYNC_CHANNEL = "search_sync"
+# Ключ advisory lock лидера синхронизации (один на развёртывание)
+SYNC_LEADER_LOCK_KEY = 0x7A5E_5C01
+SYNC_LEADER_KEY = "search:sync:leader"
+
+# Пачка статей, которые никто не синхронизирует (или чья аренда истекла), в порядке первой правки.
+# SKIP LOCKED позволяет нескольким потребителям разбирать очередь параллельно без повторной работы
+CLAIM_SQL = """
+    UPDATE search_sync_queue
+    SET locked_until = now() + make_interval(secs => :lease_seconds)
+    WHERE id IN (
+        SELECT id
+        FROM search_sync_queue
+        WHERE locked_until IS NULL OR locked_until < now()
+        ORDER BY created_at
+        LIMIT :batch_size
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING article_id, operation, version
+"""
+
+QUEUE_STATUS_SQL = """
+    SELECT count(*) AS queued, EXTRACT(EPOCH FROM now() - min(created_at)) AS oldest_seconds
+    FROM search_sync_queue
+"""
+LEADER_BACKEND_SQL = """
+    SELECT pid FROM pg_locks
+    WHERE locktype = 'advisory' AND granted
+      AND ((classid::bigint << 32) | objid::bigint) = :lock_key
+    LIMIT 1
+"""
+
 
 class TypesenseSyncWorker:
-    def __init__(self, interval_seconds: int = 60):
-        self.interval = interval_seconds
+    """
+    Синхронизация статей с Typesense по событиям: триггер на search_sync_queue делает
+    pg_notify при commit, воркер слушает канал на отдельном соединении asyncpg,
+    собирает уведомления в микропачку и разбирает очередь. Периодический проход
+    (SEARCH_SYNC_SWEEP_SECONDS) остаётся страховкой на случай потерянных уведомлений.
+
+    Воркер запускается в каждом процессе uvicorn, но синхронизирует только лидер:
+    тот, кто взял advisory lock на своём соединении LISTEN. Lock живёт, пока живо
+    соединение, поэтому при падении лидера его сменяет следующий воркер
+    (попытка раз в SEARCH_SYNC_LEADER_RETRY_SECONDS). Лидер пишет heartbeat в Redis.
+    """
+
+    def __init__(self, sweep_interval_seconds: Optional[int] = None, batch_size: Optional[int] = None):
+        self.sweep_interval = sweep_interval_seconds or settings.SEARCH_SYNC_SWEEP_SECONDS
+        self.batch_size = batch_size or settings.SEARCH_SYNC_BATCH_SIZE
+        self.consumers = max(settings.SEARCH_SYNC_CONSUMERS, 1)
         self.running = True
+        self.wakeup = asyncio.Event()
+        self.listener: Optional[asyncpg.Connection] = None
+        self.identity = f"{socket.gethostname()}:{os.getpid()}"
+        self.leader_since: Optional[float] = None
+        self.last_sync_at: Optional[float] = None
+        self.last_sync_count = 0
+
+    @property
+    def is_leader(self) -> bool:
+        return self.listener is not None and not self.listener.is_closed()
 
     async def run(self):
+        loop = asyncio.get_running_loop()
+        next_sweep = 0.0
         while self.running:
+            if not self.is_leader:
+                await self._close_listener()
+                if not await self._acquire_leadership():
+                    await self._sleep(settings.SEARCH_SYNC_LEADER_RETRY_SECONDS)
+                    continue
+                # Новый лидер сначала разбирает всё, что накопилось
+                next_sweep = 0.0
+
+            await self._heartbeat()
+            if loop.time() >= next_sweep:
+                await self.drain()
+                next_sweep = loop.time() + self.sweep_interval
+                continue
+
+            timeout = min(settings.SEARCH_SYNC_HEARTBEAT_SECONDS, max(next_sweep - loop.time(), 0))
             try:
-                await self.sync_batch()
-            except Exception as e:
-                print(f"Error in Typesense sync: {e}")
-            await asyncio.sleep(self.interval)
+                await asyncio.wait_for(self.wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                continue  # heartbeat или страховочный проход
+            if not self.running or not self.is_leader:
+                continue
+            await self._debounce()
+            await self.drain()
+        await self._close_listener()
 
-    async def sync_batch(self, batch_size: int = 100):
-        async with AsyncSessionLocal() as db:
-            # Получаем непроцессенные записи, сгруппированные по article_id с последней операцией
-            # Используем подзапрос для получения последней записи для каждой статьи
-            subq = (
-                select(
-                    SearchSyncQueue.article_id,
-                    SearchSyncQueue.operation,
-                    SearchSyncQueue.created_at
-                )
-                
-                .order_by(SearchSyncQueue.article_id, SearchSyncQueue.created_at.desc())
-                .distinct(SearchSyncQueue.article_id)
-                .limit(batch_size)
-                .subquery()
-            )
-            stmt = select(subq).order_by(subq.c.created_at)
-            result = await db.execute(stmt)
-            rows = result.fetchall()
+    async def stop(self):
+        self.running = False
+        self.wakeup.set()
+        await self._close_listener()
+        try:
+            # Уступаем сразу, не дожидаясь истечения heartbeat
+            leader = await get_redis().get(SYNC_LEADER_KEY)
+            if leader and json.loads(leader).get("identity") == self.identity:
+                await get_redis().delete(SYNC_LEADER_KEY)
+        except Exception as e:
+            logger.debug(f"Failed to clear sync leader heartbeat: {e}")
 
-            if not rows:
+    async def _sleep(self, seconds: float):
+        """Пауза, которую прерывает stop()"""
+        try:
+            await asyncio.wait_for(self.wakeup.wait(), timeout=seconds)
+        except asyncio.TimeoutError:
+            pass
+        self.wakeup.clear()
+
+    async def drain(self):
+        """Разбирает очередь пачками, пока она не опустеет; SEARCH_SYNC_CONSUMERS потребителей параллельно"""
+        await asyncio.gather(*(self._consume() for _ in range(self.consumers)))
+
+    async def _consume(self):
+        while self.running:
+            try:
+                processed = await self.sync_batch(self.batch_size)
+            except Exception as e:
+                logger.error(f"Error in Typesense sync: {e}")
                 return
+            if processed < self.batch_size:
+                return
+
+    async def _debounce(self):
+        """Ждёт, пока уведомления перестанут приходить SEARCH_SYNC_DEBOUNCE_MS, но не дольше SEARCH_SYNC_MAX_DELAY_MS"""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + settings.SEARCH_SYNC_MAX_DELAY_MS / 1000
+        while True:
+            self.wakeup.clear()
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), timeout=min(settings.SEARCH_SYNC_DEBOUNCE_MS / 1000, remaining))
+            except asyncio.TimeoutError:
+                break
+        self.wakeup.clear()
 
+    def _on_notify(self, connection, pid, channel, payload):
+        self.wakeup.set()
+
+    def _on_listener_lost(self, connection):
+        # Соединение (и lock) потеряно: основной цикл попробует снова стать лидером
+        self.wakeup.set()
+
+    async def _acquire_leadership(self) -> bool:
+        connection = None
+        try:
+            connection = await asyncpg.connect(asyncpg_dsn())
+            if not await connection.fetchval("SELECT pg_try_advisory_lock($1)", SYNC_LEADER_LOCK_KEY):
+                await connection.close()
+                return False
+            connection.add_termination_listener(self._on_listener_lost)
+            await connection.add_listener(SYNC_CHANNEL, self._on_notify)
+        except Exception as e:
+            logger.warning(f"Typesense sync leader election failed: {e}")
+            if connection is not None and not connection.is_closed():
+                connection.terminate()
+            return False
+
+        self.listener = connection
+        self.leader_since = time.time()
+        logger.info(f"Typesense sync leader: {self.identity}, listening on '{SYNC_CHANNEL}'")
+        return True
+
+    async def _heartbeat(self):
+        payload = {
+            "identity": self.identity,
+            "leader_since": self.leader_since,
+            "heartbeat_at": time.time(),
+            "last_sync_at": self.last_sync_at,
+            "last_sync_count": self.last_sync_count,
+        }
+        try:
+            await get_redis().set(SYNC_LEADER_KEY, json.dumps(payload),
+                                  ex=settings.SEARCH_SYNC_HEARTBEAT_SECONDS * 3)
+        except Exception as e:
+            logger.debug(f"Failed to write sync leader heartbeat: {e}")
+
+    async def _close_listener(self):
+        listener, self.listener = self.listener, None
+        self.leader_since = None
+        if listener is not None and not listener.is_closed():
+            try:
+                # Закрытие соединения снимает advisory lock
+                await listener.close()
+            except Exception:
+                listener.terminate()
+
+    @staticmethod
+    async def get_status(db: AsyncSession) -> Dict[str, Any]:
+        """Лидер (по heartbeat в Redis и по pg_locks) и отставание очереди"""
+        queue = (await db.execute(text(QUEUE_STATUS_SQL))).one()
+        backend_pid = await db.scalar(text(LEADER_BACKEND_SQL), {"lock_key": SYNC_LEADER_LOCK_KEY})
+        leader = None
+        try:
+            raw = await get_redis().get(SYNC_LEADER_KEY)
+            leader = json.loads(raw) if raw else None
+        except Exception as e:
+            logger.debug(f"Failed to read sync leader heartbeat: {e}")
+        now = time.time()
+        if leader:
+            leader["heartbeat_age_seconds"] = round(now - leader["heartbeat_at"], 3)
+        return {
+            "leader": leader,
+            "leader_backend_pid": backend_pid,
+            "queued": queue.queued,
+            "lag_seconds": round(float(queue.oldest_seconds), 3) if queue.oldest_seconds is not None else 0.0,
+        }
+
+    async def sync_batch(self, batch_size: int = 100) -> int:
+        rows = await self._claim_batch(batch_size)
+        if not rows:
+            return 0
+
+        async with AsyncSessionLocal() as db:
             # Группируем по операции
             to_upsert = []
             to_delete = []
@@ -57,89 +261,271 @@ class TypesenseSyncWorker:
                 else:
                     to_upsert.append(row.article_id)
 
-            # Получаем клиент Typesense
-            client = typesense_client.get_client()
+            if settings.SEARCH_ENGINE == SearchEngineType.EMBEDDED:
+                await self._write_embedded(db, to_upsert, to_delete)
+                failed = set()
+            else:
+                failed = await self._write_typesense(db, to_upsert, to_delete)
 
-            # Обрабатываем удаления
-            if to_delete:
+            # Удаляем только синхронизированные записи без новых правок; остальные
+            # (в том числе неудачные) сразу снова доступны для захвата
+            article_ids = [r.article_id for r in rows]
+            synced = [(r.article_id, r.version) for r in rows if r.article_id not in failed]
+            if synced:
+                await db.execute(
+                    delete(SearchSyncQueue).where(
+                        tuple_(SearchSyncQueue.article_id, SearchSyncQueue.version).in_(synced)
+                    )
+                )
+            await db.execute(
+                update(SearchSyncQueue)
+                .where(SearchSyncQueue.article_id.in_(article_ids))
+                .values(locked_until=None)
+            )
+            await db.commit()
+        if failed:
+            logger.warning(f"Search sync failed for {len(failed)} of {len(rows)} articles, will retry")
+        # Документы в индексе изменились: кэшированная выдача больше не читается
+        await SearchCache.bump_version()
+        self.last_sync_at = time.time()
+        self.last_sync_count = len(rows) - len(failed)
+        # Неудачные не считаются: при недоступном Typesense _consume не крутится вхолостую
+        return len(rows) - len(failed)
+
+    async def _write_typesense(self, db: AsyncSession, to_upsert: List[UUID], to_delete: List[UUID]) -> Set[UUID]:
+        """
+        Запись пачки в Typesense; возвращает статьи, которые синхронизировать не удалось.
+        Сначала импорт, потом удаления: ошибка импорта оставляет в индексе прежнюю версию статьи.
+        """
+        # Получаем клиент Typesense
+        client = typesense_client.get_client()
+        collection = index_collection()
+
+        # Документы (и эмбеддинги) готовятся до записи: ошибка здесь не оставит статьи без документов,
+        # записи останутся в очереди до истечения аренды
+        documents = []
+        if to_upsert:
+            documents = await self._get_article_documents(db, to_upsert)
+            await attach_facets(db, documents)
+            await attach_embeddings(documents)
+
+        failed: Set[UUID] = set()
+        if documents:
+            failed |= await self._import_documents(client, documents)
+
+        if to_delete:
+            try:
+                await client.collections[collection].documents.delete({
+                    'filter_by': delete_filter(to_delete)
+                })
+            except Exception as e:
+                logger.error(f"Typesense bulk delete error: {e}")
+                failed.update(to_delete)
+
+        # Фрагментов у статьи могло стать меньше: удаляются позиции за концом новой версии
+        # (для статьи без документов - все), и только у статей, чей импорт прошёл
+        if settings.TYPESENSE_INDEX_MODE == TypesenseIndexMode.PASSAGE:
+            passages = Counter(document['article_id'] for document in documents)
+            stale = {
+                article_id: passages.get(str(article_id), 0)
+                for article_id in to_upsert if article_id not in failed
+            }
+            if stale:
                 try:
-                    await client.collections['articles'].documents.delete({
-                        'filter_by': f'article_id: {[str(id) for id in to_delete]}'
+                    await client.collections[collection].documents.delete({
+                        'filter_by': stale_passages_filter(stale)
                     })
                 except Exception as e:
-                    print(f"Typesense bulk delete error: {e}")
-
-            # Обрабатываем upsert
-            if to_upsert:
-                documents = []
-                for article_id in to_upsert:
-                    # Получить полные данные статьи (последний коммит в main)
-                    doc = await self._get_article_document(db, article_id)
-                    if doc:
-                        documents.append(doc)
-                if documents:
-                    try:
-                        await client.collections['articles'].documents.import_(documents, {'action': 'upsert'})
-                    except Exception as e:
-                        print(f"Typesense bulk upsert error: {e}")
-
-            # Удаляем обработанные записи из очереди (можно удалить все записи для этих article_id)
-            if rows:
-                article_ids = [r.article_id for r in rows]
-                await db.execute(
-                    delete(SearchSyncQueue).where(SearchSyncQueue.article_id.in_(article_ids))
-                )
-                await db.commit()
-
-    async def _get_article_document(self, db: AsyncSession, article_id: UUID) -> dict | None:
-        # Получаем статью и её содержимое
-        from app.models.article import Article, Branch, ArticleFull
-        from sqlalchemy import select, and_
-
-        # Получить последний коммит в main ветке
-        branch_stmt = select(Branch).where(
-            and_(Branch.article_id == article_id, Branch.name == 'main')
-        ).order_by(Branch.created_at.desc()).limit(1)
-        branch = await db.execute(branch_stmt)
-        branch = branch.scalar_one_or_none()
-        if not branch:
-            return None
-
-        commit_id = branch.head_commit_id
-        # Получить полный текст
-        full_stmt = select(ArticleFull.text).where(
-            and_(ArticleFull.article_id == article_id, ArticleFull.commit_id == commit_id)
+                    logger.error(f"Typesense stale passages delete error: {e}")
+                    failed.update(stale)
+        return failed
+
+    async def _write_embedded(self, db: AsyncSession, to_upsert: List[UUID], to_delete: List[UUID]):
+        """Пачка - один новый сегмент встроенного индекса; воркеры увидят его при следующем поиске"""
+        documents = []
+        if to_upsert:
+            documents = await self._get_article_documents(db, to_upsert, TypesenseIndexMode.ARTICLE)
+        await asyncio.to_thread(embedded_index_writer().apply, documents, to_delete)
+
+    async def _claim_batch(self, batch_size: int) -> List:
+        """Аренда пачки в отдельной короткой транзакции: запись статьи не ждёт, пока идёт импорт"""
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(text(CLAIM_SQL), {
+                "lease_seconds": settings.SEARCH_SYNC_LEASE_SECONDS,
+                "batch_size": batch_size,
+            })
+            rows = result.fetchall()
+            await db.commit()
+        return rows
+
+    async def _get_article_documents(self, db: AsyncSession, article_ids: List[UUID],
+                                     mode: Optional[TypesenseIndexMode] = None) -> List[dict]:
+        """Документы для всей пачки одним запросом: голова из article_heads, текст, даты статьи"""
+        stmt = (
+            select(
+                ArticleHead.article_id,
+                ArticleHead.title,
+                ArticleHead.language,
+                ArticleHead.head_commit_id,
+                Article.created_at,
+                Article.updated_at,
+                ArticleFull.text,
+            )
+            .join(Article, Article.id == ArticleHead.article_id)
+            .outerjoin(
+                ArticleFull,
+                and_(ArticleFull.article_id == ArticleHead.article_id,
+                     ArticleFull.commit_id == ArticleHead.head_commit_id)
+            )
+            .where(ArticleHead.article_id.in_(article_ids))
         )
-        content = await db.scalar(full_stmt)
-        if not content:
-            # Возможно, нет в ArticleFull, тогда нужно пересобрать через CommitService
-            commit_service = CommitService(db)
-            content = await commit_service.rebuild_content_at_commit(commit_id)
+        rows = (await db.execute(stmt)).all()
+
+        documents = []
+        for row in rows:
+            content = row.text
             if not content:
-                return None
+                # Нет в ArticleFull (старые данные) - пересобираем через CommitService
+                content = await CommitService(db).rebuild_content_at_commit(row.head_commit_id)
+                if not content:
+                    continue
+            # Язык определён при смене головы (ArticleHeadService.refresh); без него - вне цикла событий
+            language = row.language or await asyncio.to_thread(detect_language, content)
+            documents.extend(index_documents(row, content, language, mode))
+        return documents
 
-        # Получить статью
-        article_stmt = select(Article).where(Article.id == article_id)
-        article = await db.execute(article_stmt)
-        article = article.scalar_one()
+    async def _import_documents(self, client: AsyncClient, documents: List[dict]) -> Set[UUID]:
+        """import_ кусками; возвращает статьи, хотя бы один документ которых не записан"""
+        failed: Set[UUID] = set()
+        offset = 0
+        for count, chunk in jsonl_chunks(documents, settings.SEARCH_SYNC_IMPORT_CHUNK_BYTES):
+            chunk_documents = documents[offset:offset + count]
+            offset += count
+            try:
+                response = await client.collections[index_collection()].documents.import_(chunk, {'action': 'upsert'})
+            except Exception as e:
+                logger.error(f"Typesense bulk upsert error ({count} documents): {e}")
+                failed.update(document_article_id(document) for document in chunk_documents)
+                continue
+            # Строка ответа на каждый документ куска, в том же порядке
+            rejected = [
+                (document, line)
+                for document, line in zip(chunk_documents, response.splitlines())
+                if not json.loads(line).get('success')
+            ]
+            if rejected:
+                logger.error(f"Typesense rejected {len(rejected)} of {count} documents, first: {rejected[0][1]}")
+                failed.update(document_article_id(document) for document, _ in rejected)
+        return failed
 
-        # Определить язык
-        sample = (article.title + " " + content)[:1000]
-        from langdetect import detect
-        try:
-            lang = detect(sample)
-            if lang in ('ru', 'uk', 'be'):
-                language = 'ru'
-            else:
-                language = 'en'
-        except:
-            language = 'en'
 
-        return {
-            'id': str(article_id),
-            'title': article.title,
-            'content': content,
-            'language': language,
-            'created_at': int(article.created_at.timestamp()) if article.created_at else 0,
-            'updated_at': int(article.updated_at.timestamp()) if article.updated_at else 0,
-        }
\ No newline at end of file
+def article_document(row, content: str, language: str) -> dict:
+    """Документ Typesense по строке article_heads + articles (article_id, title, created_at, updated_at)"""
+    return {
+        'id': str(row.article_id),
+        'title': row.title,
+        'content': content,
+        'language': language,
+        'created_at': int(row.created_at.timestamp()) if row.created_at else 0,
+        'updated_at': int(row.updated_at.timestamp()) if row.updated_at else 0,
+    }
+
+
+def passage_documents(row, content: str, language: str) -> List[dict]:
+    """Документы коллекции фрагментов: разделы головы не длиннее TYPESENSE_PASSAGE_MAX_CHARS"""
+    article = article_document(row, content, language)
+    return [
+        {
+            **article,
+            'id': f"{article['id']}:{section.position}",
+            'article_id': article['id'],
+            'heading': section.heading or '',
+            'content': section.body,
+            'position': section.position,
+        }
+        for section in split_sections(content, max_chars=settings.TYPESENSE_PASSAGE_MAX_CHARS)
+    ]
+
+
+def index_documents(row, content: str, language: str,
+                    mode: Optional[TypesenseIndexMode] = None) -> List[dict]:
+    """Документы статьи для коллекции текущего TYPESENSE_INDEX_MODE"""
+    if (mode or settings.TYPESENSE_INDEX_MODE) == TypesenseIndexMode.PASSAGE:
+        return passage_documents(row, content, language)
+    return [article_document(row, content, language)]
+
+
+def category_paths(path: str) -> List[str]:
+    """Путь раздела и пути всех его предков: a.b.c -> a, a.b, a.b.c"""
+    labels = path.split('.')
+    return ['.'.join(labels[:depth]) for depth in range(1, len(labels) + 1)]
+
+
+async def attach_facets(db: AsyncSession, documents: List[dict]):
+    """Поля-фасеты categories и tags для документов пачки (двумя запросами на пачку)"""
+    article_ids = {UUID(document.get('article_id', document['id'])) for document in documents}
+    if not article_ids:
+        return
+    categories: Dict[str, set] = {}
+    rows = await db.execute(
+        select(ArticleCategory.article_id, Category.path)
+        .join(Category, Category.id == ArticleCategory.category_id)
+        .where(ArticleCategory.article_id.in_(article_ids))
+    )
+    for article_id, path in rows:
+        categories.setdefault(str(article_id), set()).update(category_paths(str(path)))
+    tags: Dict[str, set] = {}
+    rows = await db.execute(select(Tag.article_id, Tag.tag).where(Tag.article_id.in_(article_ids)))
+    for article_id, tag in rows:
+        tags.setdefault(str(article_id), set()).add(tag)
+    for document in documents:
+        article_id = document.get('article_id', document['id'])
+        document['categories'] = sorted(categories.get(article_id, ()))
+        document['tags'] = sorted(tags.get(article_id, ()))
+
+
+def embedding_text(document: dict) -> str:
+    """Текст для эмбеддинга - те же поля, из которых его считала бы встроенная модель Typesense"""
+    return " ".join(filter(None, (document.get('title'), document.get('heading'), document.get('content'))))
+
+
+async def attach_embeddings(documents: List[dict]):
+    """С TYPESENSE_EMBEDDING_SOURCE=local вектор считается сервисом моделей пачкой, а не Typesense при import"""
+    if settings.TYPESENSE_EMBEDDING_SOURCE != EmbeddingSource.LOCAL or not documents:
+        return
+    embeddings = await embedding_client.embed([embedding_text(document) for document in documents], kind="passage")
+    for document, embedding in zip(documents, embeddings):
+        document['embedding'] = embedding
+
+
+def document_article_id(document: dict) -> UUID:
+    return UUID(document.get('article_id', document['id']))
+
+
+def stale_passages_filter(passage_counts: Dict[UUID, int]) -> str:
+    """filter_by для фрагментов статей с позицией не меньше числа фрагментов новой версии"""
+    return ' || '.join(
+        f"(article_id:=`{article_id}` && position:>={count})" if count else f"article_id:=`{article_id}`"
+        for article_id, count in passage_counts.items()
+    )
+
+
+def delete_filter(article_ids: List[UUID], mode: Optional[TypesenseIndexMode] = None) -> str:
+    """filter_by для удаления всех документов статей (в режиме article id документа - id статьи)"""
+    field = 'article_id' if (mode or settings.TYPESENSE_INDEX_MODE) == TypesenseIndexMode.PASSAGE else 'id'
+    return f"{field}:[{','.join(f'`{article_id}`' for article_id in article_ids)}]"
+
+
+def jsonl_chunks(documents: List[dict], max_bytes: int) -> Iterator[Tuple[int, bytes]]:
+    """JSONL для import_ кусками не больше max_bytes (документ крупнее лимита уходит один)"""
+    lines: List[bytes] = []
+    size = 0
+    for document in documents:
+        line = json.dumps(document, ensure_ascii=False).encode('utf-8')
+        if lines and size + len(line) + 1 > max_bytes:
+            yield len(lines), b"\n".join(lines)
+            lines, size = [], 0
+        lines.append(line)
+        size += len(line) + 1
+    if lines:
+        yield len(lines), b"\n".join(lines)
@@ -0,0 +1,158 @@
+# app/services/vandalism_worker.py
+import asyncio
+import logging
+from typing import List, Optional
+from uuid import UUID
+
+from sqlalchemy import delete, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.user import User
+from app.models.vandalism_check_queue import VandalismCheckQueue
+from app.services.commit_service import CommitService
+from app.services.trust_service import TrustService
+
+logger = logging.getLogger(__name__)
+
+# Забираем пачку записей, которые никто не обрабатывает (или чья аренда истекла),
+# и продлеваем им аренду. SKIP LOCKED позволяет запускать воркер в каждом процессе uvicorn.
+CLAIM_SQL = """
+    UPDATE vandalism_check_queue
+    SET locked_until = now() + make_interval(secs => :lease_seconds),
+        attempts = attempts + 1
+    WHERE id IN (
+        SELECT id
+        FROM vandalism_check_queue
+        WHERE locked_until IS NULL OR locked_until < now()
+        ORDER BY id
+        LIMIT :batch_size
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING id, commit_id, attempts
+"""
+
+
+class VandalismScoringWorker:
+    """
+    Фоновая проверка коммитов на вандализм (VANDALISM_CHECK_MODE=async).
+    Высокая уверенность модели - автоматический откат через revert_commit,
+    средняя - запрос на модерацию.
+    """
+
+    def __init__(self, interval_seconds: float = 2.0, batch_size: int = 20):
+        self.interval = interval_seconds
+        self.batch_size = batch_size
+        self.running = True
+
+    async def run(self):
+        while self.running:
+            try:
+                processed = await self.process_batch()
+            except Exception as e:
+                logger.error(f"Error in vandalism scoring worker: {e}")
+                processed = 0
+            # Пока очередь не разобрана, берём следующую пачку без паузы
+            if processed < self.batch_size:
+                await asyncio.sleep(self.interval)
+
+    async def process_batch(self) -> int:
+        rows = await self._claim_batch()
+        for row in rows:
+            try:
+                await self._process_item(row.id, row.commit_id, row.attempts)
+            except Exception as e:
+                # Запись останется в очереди и будет взята снова после истечения аренды
+                logger.error(f"Failed to process vandalism check for commit {row.commit_id}: {e}")
+        return len(rows)
+
+    async def _claim_batch(self) -> List:
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                text(CLAIM_SQL),
+                {
+                    "lease_seconds": settings.VANDALISM_QUEUE_LEASE_SECONDS,
+                    "batch_size": self.batch_size,
+                }
+            )
+            rows = result.fetchall()
+            await db.commit()
+        return rows
+
+    async def _process_item(self, item_id: int, commit_id: UUID, attempts: int):
+        async with AsyncSessionLocal() as db:
+            commit_service = CommitService(db)
+            commit = await commit_service.get_commit(commit_id)
+            if commit is None:
+                await self._remove_item(db, item_id)
+                await db.commit()
+                return
+
+            added_text, removed_text = commit_service._extract_added_removed_from_diff(commit.content_diff)
+            article_length = await commit_service._parent_text_length(commit_id)
+            # Уровень LIGHT - только быстрый фильтр, как и при синхронной проверке
+            trust_tier = await TrustService(db).get_tier(commit.author_id)
+            try:
+                confidence, is_vandalism = await commit_service._request_vandalism_score(
+                    added_text, removed_text, trust_tier, article_length
+                )
+            except Exception as e:
+                if attempts >= settings.VANDALISM_QUEUE_MAX_ATTEMPTS:
+                    logger.error(
+                        f"Giving up vandalism check for commit {commit_id} after {attempts} attempts: {e}"
+                    )
+                    await self._remove_item(db, item_id)
+                    await db.commit()
+                else:
+                    logger.warning(f"Vandalism check for commit {commit_id} failed, will retry: {e}")
+                return
+
+            await self._remove_item(db, item_id)
+
+            author_id = commit.author_id
+            if is_vandalism and confidence > settings.VANDALISM_REVERT_THRESHOLD:
+                reverter_id = await self._reverter_id(db)
+                reverted = None
+                if reverter_id is None:
+                    logger.warning(f"No account for automatic reverts, commit {commit_id} goes to moderation")
+                else:
+                    # Закрытая запись модерации фиксируется вместе с откатом и снижает репутацию автора
+                    commit_service._add_vandalism_moderation(commit_id, author_id, confidence, moderator_id=reverter_id)
+                    try:
+                        # revert_commit фиксирует транзакцию вместе с удалением записи из очереди
+                        reverted = await commit_service.revert_commit(
+                            commit_id, reverter_id, check_vandalism=False
+                        )
+                    except ValueError as e:
+                        logger.warning(f"Automatic revert of commit {commit_id} failed: {e}")
+                    if not reverted:
+                        await db.rollback()
+                        await self._remove_item(db, item_id)
+
+                if reverted:
+                    logger.info(f"Commit {commit_id} reverted automatically (confidence: {confidence:.2%})")
+                    await TrustService(db).invalidate(author_id)
+                    return
+                # Коммит уже не является головой ветки - решение остаётся за модератором
+                commit_service._add_vandalism_moderation(commit_id, author_id, confidence)
+            elif is_vandalism and confidence > settings.VANDALISM_MODERATION_THRESHOLD:
+                commit_service._add_vandalism_moderation(commit_id, author_id, confidence)
+
+            await db.commit()
+            if is_vandalism and confidence > settings.VANDALISM_MODERATION_THRESHOLD:
+                await TrustService(db).invalidate(author_id)
+
+    async def _reverter_id(self, db: AsyncSession) -> Optional[UUID]:
+        """Откат делается от имени VANDALISM_BOT_USER_ID или самого старого активного админа, но не автора правки"""
+        if settings.VANDALISM_BOT_USER_ID:
+            return UUID(settings.VANDALISM_BOT_USER_ID)
+        return await db.scalar(
+            select(User.id)
+            .where(User.role == "admin", User.is_active.is_(True))
+            .order_by(User.created_at)
+            .limit(1)
+        )
+
+    async def _remove_item(self, db: AsyncSession, item_id: int):
+        await db.execute(delete(VandalismCheckQueue).where(VandalismCheckQueue.id == item_id))
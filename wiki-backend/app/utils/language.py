@@ -0,0 +1,36 @@
+# app/utils/language.py
+from typing import Optional
+
+from langdetect import DetectorFactory, LangDetectException, detect
+
+# Без seed langdetect недетерминирован: один и тот же текст может получить разный язык
+DetectorFactory.seed = 0
+
+# Языки поиска и конфигурации полнотекстового поиска PostgreSQL для них
+TS_CONFIGS = {"ru": "russian", "en": "english"}
+DEFAULT_LANGUAGE = "en"
+# Конфигурация для голов, язык которых ещё не определён
+FALLBACK_TS_CONFIG = "simple"
+
+# Близкие кириллические языки индексируются русской конфигурацией
+LANGUAGE_ALIASES = {"uk": "ru", "be": "ru"}
+
+# Для определения языка хватает начала текста
+SAMPLE_CHARS = 1000
+
+
+def detect_language(text: Optional[str]) -> str:
+    """Язык статьи из TS_CONFIGS по началу текста, DEFAULT_LANGUAGE если определить не удалось"""
+    sample = (text or "")[:SAMPLE_CHARS]
+    if not sample.strip():
+        return DEFAULT_LANGUAGE
+    try:
+        language = detect(sample)
+    except LangDetectException:
+        return DEFAULT_LANGUAGE
+    language = LANGUAGE_ALIASES.get(language, language)
+    return language if language in TS_CONFIGS else DEFAULT_LANGUAGE
+
+
+def ts_config_for(language: Optional[str]) -> str:
+    return TS_CONFIGS.get(language, FALLBACK_TS_CONFIG)
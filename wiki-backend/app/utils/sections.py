@@ -0,0 +1,68 @@
+# app/utils/sections.py
+import re
+from dataclasses import dataclass
+from typing import List, Optional
+
+# Заголовки markdown (ATX): "# Раздел", "## Подраздел ##"
+HEADING_RE = re.compile(r"^ {0,3}(#{1,6})\s+(.*?)(?:\s+#+)?\s*$")
+FENCE_RE = re.compile(r"^ {0,3}(```|~~~)")
+
+# Длинные разделы режутся по абзацам: ts_headline разбирает весь переданный текст
+SECTION_MAX_CHARS = 4000
+
+
+@dataclass
+class Section:
+    position: int
+    heading: Optional[str]
+    body: str
+
+
+def _split_long(body: str, max_chars: int) -> List[str]:
+    if len(body) <= max_chars:
+        return [body]
+    parts, current = [], ""
+    for paragraph in re.split(r"\n\s*\n", body):
+        while len(paragraph) > max_chars:
+            if current:
+                parts.append(current)
+                current = ""
+            # Абзац длиннее раздела режется по пробелу, чтобы не разрывать слова
+            cut = paragraph.rfind(" ", max_chars // 2, max_chars)
+            cut = cut if cut > 0 else max_chars
+            parts.append(paragraph[:cut])
+            paragraph = paragraph[cut:].lstrip()
+        if current and len(current) + len(paragraph) + 2 > max_chars:
+            parts.append(current)
+            current = ""
+        current = f"{current}\n\n{paragraph}" if current else paragraph
+    if current:
+        parts.append(current)
+    return parts
+
+
+def split_sections(text: str, max_chars: int = SECTION_MAX_CHARS) -> List[Section]:
+    """
+    Разбивает markdown на разделы по заголовкам. Текст до первого заголовка - раздел
+    без заголовка; заголовки внутри блоков кода не учитываются.
+    """
+    raw = []
+    heading, lines, in_fence = None, [], False
+    for line in (text or "").splitlines():
+        if FENCE_RE.match(line):
+            in_fence = not in_fence
+        match = None if in_fence else HEADING_RE.match(line)
+        if match:
+            raw.append((heading, "\n".join(lines).strip()))
+            heading, lines = match.group(2).strip()[:255] or None, []
+        else:
+            lines.append(line)
+    raw.append((heading, "\n".join(lines).strip()))
+
+    sections = []
+    for heading, body in raw:
+        if not body and not heading:
+            continue
+        for part in _split_long(body, max_chars):
+            sections.append(Section(position=len(sections), heading=heading, body=part))
+    return sections
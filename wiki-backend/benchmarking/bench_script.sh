@@ -1,3 +1,23 @@
-vegeta attack -targets=./targets.txt -duration=20s -rate=5 > results/results.bin
+#!/bin/bash
+# Нагрузочный тест поиска: цели строятся из search_queries.txt (один запрос на строку)
+# BASE_URL, LANGUAGE, FIELDS, LIMIT, RATE, DURATION можно переопределить через окружение
+cd "$(dirname "$0")"
+BASE_URL=${BASE_URL:-http://localhost:8000}
+LANGUAGE=${LANGUAGE:-en}
+FIELDS=${FIELDS:-both}
+LIMIT=${LIMIT:-20}
+RATE=${RATE:-5}
+DURATION=${DURATION:-20s}
+
+mkdir -p results
+: > targets.txt
+while IFS= read -r query || [ -n "$query" ]; do
+    [ -z "$query" ] && continue
+    encoded=$(python3 -c 'import sys, urllib.parse; print(urllib.parse.quote(sys.argv[1]))' "$query")
+    echo "GET ${BASE_URL}/api/v1/search/?q=${encoded}&language=${LANGUAGE}&fields=${FIELDS}&limit=${LIMIT}&offset=0" >> targets.txt
+done < search_queries.txt
+
+vegeta attack -targets=./targets.txt -duration=${DURATION} -rate=${RATE} > results/results.bin
 vegeta report results/results.bin > results/report.txt
-vegeta plot results/results.bin > results/plot.html
\ No newline at end of file
+vegeta plot results/results.bin > results/plot.html
+cat results/report.txt
@@ -0,0 +1,126 @@
+"""
+Размер полнотекстовых индексов и стоимость записи коммита в БД.
+
+    PYTHONPATH=. python benchmarking/index_stats.py --commits 200
+
+Запускается до и после миграции article_search_index: сравниваются размер GIN
+(tsvector на каждой ревизии против tsvector только на голове main) и время
+вставки коммита с полным текстом: в ветку (голова main не меняется) и в main
+(с переносом головы). Коммиты пишутся в одной транзакции, которая откатывается,
+данные не меняются.
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+import uuid
+
+from sqlalchemy import text
+
+from app.core.database import AsyncSessionLocal
+
+SIZE_SQL = """
+    SELECT c.relname AS name,
+           i.indrelid::regclass::text AS table_name,
+           pg_relation_size(c.oid) AS bytes
+    FROM pg_class c
+    JOIN pg_index i ON i.indexrelid = c.oid
+    JOIN pg_am am ON am.oid = c.relam
+    WHERE am.amname = 'gin'
+      AND i.indrelid::regclass::text IN ('articles_full_text', 'article_search_index')
+    ORDER BY c.relname
+"""
+
+TABLE_SQL = """
+    SELECT relname AS name, pg_total_relation_size(oid) AS bytes
+    FROM pg_class
+    WHERE relname IN ('articles_full_text', 'article_search_index', 'article_heads') AND relkind = 'r'
+    ORDER BY relname
+"""
+
+
+def percentile(values, q: float) -> float:
+    ordered = sorted(values)
+    index = min(int(round(q / 100 * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[index]
+
+
+async def measure_commits(db, count: int, text_size: int, move_head: bool) -> dict:
+    """move_head=False - коммит в ветку (голова main не меняется), True - коммит в main"""
+    heads = (await db.execute(text("""
+        SELECT h.article_id, c.author_id
+        FROM article_heads h JOIN commits c ON c.id = h.head_commit_id
+        ORDER BY h.updated_at DESC
+        LIMIT :count
+    """), {"count": count})).all()
+    if not heads:
+        return {"error": "no articles with a main head"}
+
+    base_text = ("Съешь же ещё этих мягких французских булок, да выпей чаю. "
+                 "The quick brown fox jumps over the lazy dog. ") * max(text_size // 100, 1)
+    latencies = []
+    try:
+        for i in range(count):
+            # Коммиты распределяются по статьям, как при обычной правке вики
+            head = heads[i % len(heads)]
+            commit_id = uuid.uuid4()
+            params = {"id": commit_id, "article_id": head.article_id, "author_id": head.author_id}
+            started = time.perf_counter()
+            await db.execute(text("""
+                INSERT INTO commits (id, article_id, author_id, message, content_diff, is_merge)
+                VALUES (:id, :article_id, :author_id, 'bench', '', false)
+            """), params)
+            await db.execute(text("""
+                INSERT INTO articles_full_text (article_id, commit_id, text) VALUES (:article_id, :id, :text)
+            """), {**params, "text": f"{base_text} ревизия {i}"})
+            if move_head:
+                await db.execute(text("""
+                    UPDATE article_heads SET head_commit_id = :id, updated_at = now() WHERE article_id = :article_id
+                """), params)
+            latencies.append((time.perf_counter() - started) * 1000)
+    finally:
+        await db.rollback()
+
+    return {
+        "commits": count,
+        "articles": len(heads),
+        "text_bytes": len(base_text.encode("utf-8")),
+        "mean_ms": round(statistics.mean(latencies), 3),
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p95_ms": round(percentile(latencies, 95), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--commits", type=int, default=100, help="Сколько коммитов вставить (0 - только размеры)")
+    parser.add_argument("--text-size", type=int, default=8000, help="Примерный размер полного текста, байт")
+    parser.add_argument("--output", help="JSON-отчёт")
+    args = parser.parse_args()
+
+    async with AsyncSessionLocal() as db:
+        gin = [dict(row) for row in (await db.execute(text(SIZE_SQL))).mappings().all()]
+        tables = [dict(row) for row in (await db.execute(text(TABLE_SQL))).mappings().all()]
+        await db.commit()
+        report = {
+            "gin_indexes": gin,
+            "gin_total_bytes": sum(row["bytes"] for row in gin),
+            "tables": tables,
+        }
+        if args.commits > 0:
+            report["commit_write"] = {
+                "branch": await measure_commits(db, args.commits, args.text_size, move_head=False),
+                "main": await measure_commits(db, args.commits, args.text_size, move_head=True),
+            }
+
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    print(output)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,297 @@
+"""
+Нагрузочный бенчмарк поиска: p50/p95/p99 и QPS по движкам, сравнение с базовым отчётом.
+
+    PYTHONPATH=. python benchmarking/search_bench.py --populate 2000 --output benchmarking/results/search.json
+    PYTHONPATH=. python benchmarking/search_bench.py --baseline benchmarking/results/search.json
+
+Цели - все сочетания запросов из search_queries.txt, языков, полей и страниц (--pages);
+гибридные цели (hybrid=true) - только для движков с векторами. Запрос выполняет
+обработчик GET /search/ в процессе, без HTTP: кэш выдачи, курсоры и фасеты работают
+как в API, а движок (SEARCH_ENGINE) выбирается на прогон. Каждый движок проходит две фазы:
+cold - версия индекса увеличена, кэш выдачи и эмбеддингов запросов пуст;
+warm - те же цели ещё --repeat раз, выдача из SearchCache. --concurrency запросов
+одновременно, у каждого своя сессия.
+
+--populate N сначала заполняет БД через stress_population.py (N статей, с очисткой),
+строит головы статей (article_heads, tsvector) и индексы выбранных движков.
+С --baseline отчёт сравнивается с сохранённым: рост p95/p99 или падение QPS больше
+--tolerance (и не меньше --min-delta-ms для задержек) - регрессия, выход с кодом 1.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from fastapi import HTTPException
+from sqlalchemy import func, select
+
+from app.api.v1.search import search_articles
+from app.core.cache import get_redis
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.enums import SearchEngineType
+from app.core.typesense_client import ensure_typesense_collection, typesense_client
+from app.models.article import Article
+from app.models.article_head import ArticleHead
+from app.schemas.search import SearchQueryParams
+from app.services.article_head_service import ArticleHeadService
+from app.services.search_services.embedded_index import EmbeddedIndexWriter
+from app.services.search_services.query_embedding_cache import QueryEmbeddingCache
+from app.services.search_services.search_cache import SearchCache
+from app.services.typesense_sync_worker import TypesenseSyncWorker
+from benchmarking.search_engines import percentile
+from scripts.build_embedded_index import build as build_embedded_index
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+DEFAULT_QUERIES = Path(__file__).resolve().parent / "search_queries.txt"
+# Движки, для которых hybrid=true что-то меняет (остальные его игнорируют)
+HYBRID_ENGINES = {SearchEngineType.TYPESENSE}
+BREAKDOWN = ("language", "fields", "page", "hybrid")
+HEADS_BATCH = 200
+
+
+def latency_stats(latencies: List[float]) -> Dict[str, float]:
+    if not latencies:
+        return {}
+    return {
+        "mean_ms": round(statistics.mean(latencies), 2),
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "max_ms": round(max(latencies), 2),
+    }
+
+
+def build_targets(queries: List[str], languages: List[str], fields: List[str], pages: List[int],
+                  limit: int, hybrid: bool) -> List[Dict[str, Any]]:
+    return [
+        {"q": q, "language": language, "fields": field, "limit": limit, "offset": (page - 1) * limit,
+         "hybrid": use_hybrid, "page": page}
+        for q, language, field, page, use_hybrid in itertools.product(
+            queries, languages, fields, pages, (False, True) if hybrid else (False,)
+        )
+    ]
+
+
+# --- Подготовка данных ---
+
+def populate(articles: int, text_kb: int, commits: int):
+    """stress_population.py с очисткой: статьи, коммиты и полные тексты без голов"""
+    subprocess.run(
+        [sys.executable, "stress_population.py", "--articles", str(articles), "--truncate",
+         "--commits-per-article", str(commits), "--min-text-kb", str(text_kb), "--max-text-kb", str(text_kb * 2)],
+        cwd=BACKEND_DIR, check=True,
+    )
+
+
+async def build_heads() -> int:
+    """Головы статей, у которых их нет: stress_population пишет ветки напрямую, мимо ArticleHeadService"""
+    built = 0
+    while True:
+        async with AsyncSessionLocal() as db:
+            article_ids = (await db.scalars(
+                select(Article.id)
+                .outerjoin(ArticleHead, ArticleHead.article_id == Article.id)
+                .where(ArticleHead.article_id.is_(None), Article.current_commit_id.is_not(None))
+                .limit(HEADS_BATCH)
+            )).all()
+            if not article_ids:
+                return built
+            service = ArticleHeadService(db)
+            for article_id in article_ids:
+                await service.refresh(article_id)
+            await db.commit()
+        built += len(article_ids)
+        print(f"Article heads built: {built}", file=sys.stderr)
+
+
+async def build_engine_index(engine: SearchEngineType):
+    if engine == SearchEngineType.TYPESENSE:
+        # Головы поставили статьи в очередь синхронизации - её и разбираем
+        await ensure_typesense_collection()
+        settings.SEARCH_ENGINE = SearchEngineType.TYPESENSE
+        await TypesenseSyncWorker().drain()
+    elif engine == SearchEngineType.EMBEDDED:
+        writer = EmbeddedIndexWriter()
+        await build_embedded_index(writer, 1000)
+        await asyncio.to_thread(writer.compact)
+
+
+async def dataset_stats() -> Dict[str, Any]:
+    async with AsyncSessionLocal() as db:
+        rows = (await db.execute(
+            select(ArticleHead.language, func.count()).where(ArticleHead.status == "published")
+            .group_by(ArticleHead.language)
+        )).all()
+    return {"published_articles": sum(count for _, count in rows),
+            "languages": {language or "unknown": count for language, count in rows}}
+
+
+# --- Замеры ---
+
+async def reset_caches(queries: List[str]):
+    """Холодный старт: новая версия индекса (старая выдача не читается) и без эмбеддингов запросов"""
+    await SearchCache.bump_version()
+    try:
+        await get_redis().delete(*{QueryEmbeddingCache.key(q) for q in queries})
+    except Exception as e:
+        print(f"Failed to reset query embedding cache: {e}", file=sys.stderr)
+
+
+async def run_phase(engine: SearchEngineType, targets: List[Dict[str, Any]], concurrency: int) -> Dict[str, Any]:
+    client = typesense_client.get_client() if engine == SearchEngineType.TYPESENSE else None
+    slots = asyncio.Semaphore(concurrency)
+    samples: List[Optional[float]] = [None] * len(targets)
+    errors: Dict[str, int] = {}
+
+    async def run_target(index: int, target: Dict[str, Any]):
+        params = SearchQueryParams(**{key: value for key, value in target.items() if key != "page"})
+        async with slots, AsyncSessionLocal() as db:
+            started = time.perf_counter()
+            try:
+                await search_articles(params=params, db=db, typesense_client=client)
+            except HTTPException as e:
+                errors[str(e.status_code)] = errors.get(str(e.status_code), 0) + 1
+                return
+            except Exception as e:
+                errors[type(e).__name__] = errors.get(type(e).__name__, 0) + 1
+                return
+            samples[index] = (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    await asyncio.gather(*(run_target(index, target) for index, target in enumerate(targets)))
+    elapsed = time.perf_counter() - started
+
+    latencies = [sample for sample in samples if sample is not None]
+    breakdown = {}
+    for dimension in BREAKDOWN:
+        groups: Dict[str, List[float]] = {}
+        for target, sample in zip(targets, samples):
+            if sample is not None:
+                groups.setdefault(str(target[dimension]).lower(), []).append(sample)
+        if len(groups) > 1:
+            breakdown[dimension] = {value: latency_stats(group) for value, group in sorted(groups.items())}
+    return {
+        "requests": len(targets),
+        "errors": sum(errors.values()),
+        "error_kinds": errors,
+        "qps": round(len(latencies) / elapsed, 1) if elapsed else None,
+        "latency": latency_stats(latencies),
+        "breakdown": breakdown,
+    }
+
+
+async def measure_engine(engine: SearchEngineType, targets: List[Dict[str, Any]], queries: List[str],
+                         concurrency: int, repeat: int) -> Dict[str, Any]:
+    settings.SEARCH_ENGINE = engine
+    engine_targets = [target for target in targets if not target["hybrid"] or engine in HYBRID_ENGINES]
+    await reset_caches(queries)
+    cold = await run_phase(engine, engine_targets, concurrency)
+    warm = await run_phase(engine, engine_targets * repeat, concurrency)
+    return {"cold": cold, "warm": warm}
+
+
+# --- Сравнение с базовым отчётом ---
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], tolerance: float,
+            min_delta_ms: float) -> Dict[str, List[Dict[str, Any]]]:
+    regressions, warnings = [], []
+    if baseline.get("dataset") != report.get("dataset") or baseline.get("targets") != report.get("targets"):
+        warnings.append({"message": "Dataset or targets differ from the baseline",
+                         "baseline": {"dataset": baseline.get("dataset"), "targets": baseline.get("targets")}})
+    for engine, phases in report["engines"].items():
+        for phase, current in phases.items():
+            base = baseline.get("engines", {}).get(engine, {}).get(phase)
+            if not base or not base.get("latency") or not current.get("latency"):
+                warnings.append({"engine": engine, "phase": phase, "message": "No baseline to compare"})
+                continue
+            for metric in ("p95_ms", "p99_ms"):
+                before, after = base["latency"][metric], current["latency"][metric]
+                if after > before * (1 + tolerance) and after - before >= min_delta_ms:
+                    regressions.append({"engine": engine, "phase": phase, "metric": metric,
+                                        "baseline": before, "current": after})
+            if base.get("qps") and current["qps"] < base["qps"] * (1 - tolerance):
+                regressions.append({"engine": engine, "phase": phase, "metric": "qps",
+                                    "baseline": base["qps"], "current": current["qps"]})
+            if current["errors"] > base["errors"]:
+                regressions.append({"engine": engine, "phase": phase, "metric": "errors",
+                                    "baseline": base["errors"], "current": current["errors"]})
+    return {"regressions": regressions, "warnings": warnings}
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--engines", nargs="+", type=SearchEngineType,
+                        default=[SearchEngineType.POSTGRES, SearchEngineType.TYPESENSE])
+    parser.add_argument("--queries", default=str(DEFAULT_QUERIES), help="Файл с запросами (по одному на строку)")
+    parser.add_argument("--query-count", type=int, default=50)
+    parser.add_argument("--languages", nargs="+", default=["ru", "en"])
+    parser.add_argument("--fields", nargs="+", default=["title", "content", "both"])
+    parser.add_argument("--pages", nargs="+", type=int, default=[1, 5, 25], help="Номера страниц (глубина)")
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--no-hybrid", action="store_true", help="Без гибридных целей")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=3, help="Проходов по целям в тёплой фазе")
+    parser.add_argument("--populate", type=int, metavar="ARTICLES",
+                        help="Заполнить БД stress_population.py (существующие данные удаляются)")
+    parser.add_argument("--text-kb", type=int, default=20, help="Размер текста первого коммита при --populate")
+    parser.add_argument("--commits-per-article", type=int, default=3)
+    parser.add_argument("--baseline", help="Отчёт, с которым сравнивать")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Допустимое ухудшение (доля)")
+    parser.add_argument("--min-delta-ms", type=float, default=2.0, help="Меньший рост задержки - шум")
+    parser.add_argument("--output", help="JSON-отчёт (его можно потом передать в --baseline)")
+    args = parser.parse_args()
+
+    with open(args.queries, encoding="utf-8") as f:
+        queries = [line.strip() for line in f if line.strip()][:args.query_count]
+    targets = build_targets(queries, args.languages, args.fields, args.pages, args.limit,
+                            hybrid=not args.no_hybrid and any(engine in HYBRID_ENGINES for engine in args.engines))
+
+    uses_typesense = SearchEngineType.TYPESENSE in args.engines
+    if uses_typesense:
+        await typesense_client.initialize()
+    try:
+        if args.populate:
+            await asyncio.to_thread(populate, args.populate, args.text_kb, args.commits_per_article)
+            await build_heads()
+            for engine in args.engines:
+                await build_engine_index(engine)
+
+        report: Dict[str, Any] = {
+            "dataset": await dataset_stats(),
+            "targets": {"queries": len(queries), "languages": args.languages, "fields": args.fields,
+                        "pages": args.pages, "limit": args.limit, "count": len(targets)},
+            "concurrency": args.concurrency,
+            "repeat": args.repeat,
+            "engines": {},
+        }
+        for engine in args.engines:
+            report["engines"][engine.value] = await measure_engine(engine, targets, queries, args.concurrency,
+                                                               args.repeat)
+    finally:
+        if uses_typesense:
+            await typesense_client.close()
+
+    failed = False
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            report["comparison"] = compare(report, json.load(f), args.tolerance, args.min_delta_ms)
+        failed = bool(report["comparison"]["regressions"])
+
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    print(output)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
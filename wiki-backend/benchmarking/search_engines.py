@@ -0,0 +1,145 @@
+"""
+Сравнение поисковых движков: postgres, typesense и встроенный индекс (embedded).
+
+    PYTHONPATH=. python scripts/build_embedded_index.py
+    PYTHONPATH=. python benchmarking/search_engines.py --queries benchmarking/search_queries.txt
+
+Каждый запрос сначала выполняется один раз в каждом движке (прогрев: кэш страниц,
+соединения), затем --repeat раз с замером задержки на клиенте. Кэш выдачи (SearchCache)
+не участвует - вызывается сам сервис. Для каждого движка считаются задержки, QPS
+последовательного выполнения, пустые выдачи и совпадение первых --limit статей
+с выдачей postgres. Ошибка движка попадает в отчёт вместо замеров; недоступный
+Typesense сервис не считает ошибкой - это видно по empty_results.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+from typing import Dict, List, Optional
+
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.enums import SearchEngineType
+from app.core.typesense_client import typesense_client
+from app.models.article_head import ArticleHead
+from app.services.search_services.embedded_index import embedded_index
+from app.services.search_services.search_service_factory import SearchServiceFactory
+
+
+def percentile(values, q: float) -> float:
+    ordered = sorted(values)
+    index = min(int(round(q / 100 * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[index]
+
+
+def latency_stats(latencies: List[float]) -> Dict[str, float]:
+    return {
+        "mean_ms": round(statistics.mean(latencies), 2),
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "max_ms": round(max(latencies), 2),
+    }
+
+
+async def measure_engine(service, queries: List[str], repeat: int, limit: int) -> dict:
+    top: Dict[str, List[str]] = {}
+    for query in queries:
+        _total, results = await service.search(q=query, limit=limit)
+        top[query] = [str(result["id"]) for result in results]
+
+    latencies = []
+    empty = 0
+    started = time.perf_counter()
+    for query in queries:
+        for _ in range(repeat):
+            query_started = time.perf_counter()
+            total, _results = await service.search(q=query, limit=limit)
+            latencies.append((time.perf_counter() - query_started) * 1000)
+            empty += int(total == 0)
+    elapsed = time.perf_counter() - started
+    return {
+        "queries": len(latencies),
+        "empty_results": empty,
+        "qps": round(len(latencies) / elapsed, 1) if elapsed else None,
+        "latency": latency_stats(latencies),
+        "top": top,
+    }
+
+
+def overlap(top: Dict[str, List[str]], baseline: Dict[str, List[str]]) -> Optional[float]:
+    """Средняя доля статей первой страницы, которые есть и в выдаче postgres"""
+    shares = [
+        len(set(ids) & set(baseline[query])) / len(baseline[query])
+        for query, ids in top.items() if baseline.get(query)
+    ]
+    return round(statistics.mean(shares), 3) if shares else None
+
+
+def embedded_index_stats() -> dict:
+    snapshot = embedded_index().snapshot()
+    return {
+        "path": settings.SEARCH_EMBEDDED_INDEX_PATH,
+        "segments": len(snapshot.segments),
+        "documents": snapshot.live_count,
+        "size_mb": round(sum(segment.size_bytes() for segment in snapshot.segments) / 1024 / 1024, 2),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--engines", nargs="+", type=SearchEngineType, default=list(SearchEngineType))
+    parser.add_argument("--queries", help="Файл с запросами (по одному на строку); по умолчанию - заголовки статей")
+    parser.add_argument("--query-count", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--output", help="JSON-отчёт")
+    args = parser.parse_args()
+
+    async with AsyncSessionLocal() as db:
+        if args.queries:
+            with open(args.queries, encoding="utf-8") as f:
+                queries = [line.strip() for line in f if line.strip()][:args.query_count]
+        else:
+            queries = list((await db.scalars(
+                select(ArticleHead.title).order_by(ArticleHead.updated_at.desc()).limit(args.query_count)
+            )).all())
+
+        report = {"queries": len(queries), "repeat": args.repeat, "limit": args.limit, "engines": {}}
+        tops = {}
+        if SearchEngineType.TYPESENSE in args.engines:
+            await typesense_client.initialize()
+        try:
+            for engine in args.engines:
+                service = SearchServiceFactory.create_service(engine, db, typesense_client.get_client()
+                                                              if engine == SearchEngineType.TYPESENSE else None)
+                try:
+                    result = await measure_engine(service, queries, args.repeat, args.limit)
+                except Exception as e:
+                    report["engines"][engine.value] = {"error": str(e)}
+                    continue
+                tops[engine] = result.pop("top")
+                if engine == SearchEngineType.EMBEDDED and os.path.isdir(settings.SEARCH_EMBEDDED_INDEX_PATH):
+                    result["index"] = embedded_index_stats()
+                report["engines"][engine.value] = result
+        finally:
+            if SearchEngineType.TYPESENSE in args.engines:
+                await typesense_client.close()
+
+    if SearchEngineType.POSTGRES in tops:
+        for engine, top in tops.items():
+            if engine != SearchEngineType.POSTGRES:
+                report["engines"][engine.value]["overlap_with_postgres"] = overlap(top, tops[SearchEngineType.POSTGRES])
+
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    print(output)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
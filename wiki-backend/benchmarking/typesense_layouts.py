@@ -0,0 +1,166 @@
+"""
+Сравнение раскладок индекса Typesense: документ на статью против фрагментов с group_by.
+
+    PYTHONPATH=. python benchmarking/typesense_layouts.py --articles 2000 --queries benchmarking/search_queries.txt
+
+Обе раскладки строятся во временных коллекциях bench_<mode>_<время> из одних и тех же
+голов статей. Время индексации включает эмбеддинги (Typesense при import_ или сервис
+моделей при TYPESENSE_EMBEDDING_SOURCE=local). Затем каждый запрос выполняется --repeat раз через TypesenseSearchService
+в каждой раскладке (лексический и гибридный поиск), снимаются задержки на клиенте
+и search_time_ms сервера. Коллекции удаляются в конце.
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from typing import Dict, List
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.enums import TypesenseIndexMode
+from app.core.typesense_client import index_schema, typesense_client
+from app.models.article import ArticleFull
+from app.models.article_head import ArticleHead
+from app.services.search_services.reindex import heads_select
+from app.services.search_services.typesense_search import TypesenseSearchService
+from app.services.typesense_sync_worker import attach_embeddings, index_documents, jsonl_chunks
+from app.utils.language import detect_language
+
+
+def percentile(values, q: float) -> float:
+    ordered = sorted(values)
+    index = min(int(round(q / 100 * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[index]
+
+
+def latency_stats(latencies: List[float]) -> Dict[str, float]:
+    return {
+        "mean_ms": round(statistics.mean(latencies), 2),
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "max_ms": round(max(latencies), 2),
+    }
+
+
+async def load_heads(limit: int) -> List:
+    # Только головы с сохранённым полным текстом, самые свежие
+    stmt = (
+        heads_select()
+        .where(ArticleFull.text.is_not(None))
+        .order_by(ArticleHead.updated_at.desc())
+        .limit(limit)
+    )
+    async with AsyncSessionLocal() as db:
+        return (await db.execute(stmt)).all()
+
+
+async def build_collection(client, name: str, mode: TypesenseIndexMode, heads: List, chunk_bytes: int) -> dict:
+    await client.collections.create(index_schema(name, mode))
+    documents = [
+        document
+        for row in heads
+        for document in index_documents(row, row.text, row.language or detect_language(row.text), mode)
+    ]
+    payload_bytes = 0
+    rejected = 0
+    started = time.perf_counter()
+    # С TYPESENSE_EMBEDDING_SOURCE=local время эмбеддингов сервиса моделей входит во время индексации
+    await attach_embeddings(documents)
+    for count, chunk in jsonl_chunks(documents, chunk_bytes):
+        payload_bytes += len(chunk)
+        response = await client.collections[name].documents.import_(chunk, {'action': 'upsert'})
+        rejected += sum(1 for line in response.splitlines() if line and not json.loads(line).get('success'))
+    elapsed = time.perf_counter() - started
+    return {
+        "collection": name,
+        "documents": len(documents),
+        "rejected": rejected,
+        "payload_mb": round(payload_bytes / 1024 / 1024, 2),
+        "index_seconds": round(elapsed, 2),
+        "articles_per_second": round(len(heads) / elapsed, 1) if elapsed else None,
+    }
+
+
+async def measure_queries(client, name: str, mode: TypesenseIndexMode, queries: List[str],
+                          repeat: int, limit: int, hybrid: bool) -> dict:
+    service = TypesenseSearchService(client, mode=mode, collection=name)
+    latencies = []
+    server_ms = []
+    empty = 0
+    for query in queries:
+        for _ in range(repeat):
+            started = time.perf_counter()
+            total, _results = await service.search(q=query, limit=limit, hybrid=hybrid)
+            latencies.append((time.perf_counter() - started) * 1000)
+            empty += int(total == 0)
+        # search_time_ms сервера - отдельным запросом с теми же параметрами, без учёта разбора ответа
+        params = {'q': query, 'query_by': 'title,content' if mode == TypesenseIndexMode.ARTICLE
+                  else 'title,heading,content', 'per_page': limit, 'exclude_fields': 'embedding'}
+        if mode == TypesenseIndexMode.PASSAGE:
+            params.update(group_by='article_id', group_limit=1)
+        response = await client.collections[name].documents.search(params)
+        server_ms.append(response.get('search_time_ms', 0))
+    return {
+        "hybrid": hybrid,
+        "queries": len(queries) * repeat,
+        "empty_results": empty,
+        "client": latency_stats(latencies),
+        "server_search_time_ms": latency_stats(server_ms),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--articles", type=int, default=1000, help="Сколько последних голов проиндексировать")
+    parser.add_argument("--queries", help="Файл с запросами (по одному на строку); по умолчанию - заголовки статей")
+    parser.add_argument("--query-count", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--chunk-bytes", type=int, default=settings.SEARCH_SYNC_IMPORT_CHUNK_BYTES)
+    parser.add_argument("--keep", action="store_true", help="Не удалять коллекции после замеров")
+    parser.add_argument("--output", help="JSON-отчёт")
+    args = parser.parse_args()
+
+    heads = await load_heads(args.articles)
+    if args.queries:
+        with open(args.queries, encoding="utf-8") as f:
+            queries = [line.strip() for line in f if line.strip()][:args.query_count]
+    else:
+        queries = [row.title for row in heads[:args.query_count]]
+
+    await typesense_client.initialize()
+    client = typesense_client.get_client()
+    suffix = int(time.time())
+    report = {"articles": len(heads), "text_mb": round(sum(len(r.text.encode()) for r in heads) / 1024 / 1024, 2),
+              "passage_max_chars": settings.TYPESENSE_PASSAGE_MAX_CHARS,
+              "embedding_source": settings.TYPESENSE_EMBEDDING_SOURCE.value, "layouts": {}}
+    created = []
+    try:
+        for mode in TypesenseIndexMode:
+            name = f"bench_{mode.value}_{suffix}"
+            created.append(name)
+            layout = {"index": await build_collection(client, name, mode, heads, args.chunk_bytes)}
+            layout["search"] = [
+                await measure_queries(client, name, mode, queries, args.repeat, args.limit, hybrid)
+                for hybrid in (False, True)
+            ]
+            report["layouts"][mode.value] = layout
+    finally:
+        if not args.keep:
+            for name in created:
+                try:
+                    await client.collections[name].delete()
+                except Exception:
+                    pass
+        await typesense_client.close()
+
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    print(output)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,85 @@
+"""
+Первичное построение встроенного поискового индекса (SEARCH_ENGINE=embedded).
+
+    PYTHONPATH=. python scripts/build_embedded_index.py --batch-size 1000
+
+Дальше индекс поддерживает лидер синхронизации из search_sync_queue. Скрипт можно
+запускать при работающем приложении: запись сериализуется с воркером через flock,
+а статьи, изменённые за время построения, в конце снова ставятся в очередь - их
+сегмент скрыл бы более свежую копию, записанную воркером раньше.
+Головы читаются потоком, каждая пачка - сегмент; статьи, которых больше нет
+в article_heads, удаляются; в конце сегменты сливаются в один.
+"""
+import argparse
+import asyncio
+import logging
+import time
+
+from sqlalchemy import select
+
+from app.core.enums import TypesenseIndexMode
+from app.core.database import AsyncSessionLocal
+from app.models.article_head import ArticleHead
+from app.services.commit_service import CommitService
+from app.services.search_services.embedded_index import EmbeddedIndexWriter
+from app.services.search_services.reindex import HEADS_QUERY, requeue_changed_since
+from app.services.search_services.search_cache import SearchCache
+from app.services.typesense_sync_worker import index_documents
+from app.utils.language import detect_language
+
+logger = logging.getLogger("build_embedded_index")
+
+async def build(writer: EmbeddedIndexWriter, batch_size: int) -> int:
+    indexed = set()
+    async with AsyncSessionLocal() as db, AsyncSessionLocal() as content_db:
+        result = await db.stream(HEADS_QUERY.execution_options(yield_per=batch_size))
+        async for rows in result.partitions():
+            documents = []
+            for row in rows:
+                content = row.text
+                if not content:
+                    # Отдельная сессия: основная занята серверным курсором
+                    content = await CommitService(content_db).rebuild_content_at_commit(row.head_commit_id)
+                    if not content:
+                        continue
+                language = row.language or detect_language(content)
+                documents.extend(index_documents(row, content, language, TypesenseIndexMode.ARTICLE))
+            await asyncio.to_thread(writer.apply, documents, [])
+            indexed.update(document["id"] for document in documents)
+            logger.info(f"Indexed {len(indexed)} articles")
+
+    # Статьи, созданные во время построения, уже записал воркер - удаляются только те, чьей головы нет
+    candidates = {
+        segment.article_id(doc) for segment, doc in writer.reader.snapshot().live_documents()
+    } - indexed
+    async with AsyncSessionLocal() as db:
+        existing = set(map(str, (await db.scalars(
+            select(ArticleHead.article_id).where(ArticleHead.article_id.in_(candidates))
+        )).all())) if candidates else set()
+    stale = sorted(candidates - existing)
+    await asyncio.to_thread(writer.apply, [], stale)
+    logger.info(f"Removed {len(stale)} articles without a head")
+    return len(indexed)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=1000, help="Статей в одном сегменте")
+    parser.add_argument("--path", help="Каталог индекса (по умолчанию SEARCH_EMBEDDED_INDEX_PATH)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    writer = EmbeddedIndexWriter(args.path)
+    started_at = time.time()
+    started = time.perf_counter()
+    indexed = await build(writer, args.batch_size)
+    generation = await asyncio.to_thread(writer.compact)
+    requeued = await requeue_changed_since(started_at)
+    logger.info(f"Articles changed during the build queued for sync: {requeued}")
+    await SearchCache.bump_version()
+    logger.info(f"Embedded index '{writer.path}' generation {generation}: {indexed} articles "
+                f"in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
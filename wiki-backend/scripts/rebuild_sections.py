@@ -0,0 +1,33 @@
+"""
+Построение article_sections для текущих голов всех статей.
+
+    PYTHONPATH=. python scripts/rebuild_sections.py
+
+Нужно один раз после включения SEARCH_SECTIONS_ENABLED: дальше разделы
+обновляются при каждой смене головы main.
+"""
+import asyncio
+
+from sqlalchemy import select
+
+from app.core.database import AsyncSessionLocal
+from app.models.article_head import ArticleHead
+from app.services.article_head_service import ArticleHeadService
+
+BATCH_SIZE = 200
+
+
+async def rebuild_sections():
+    async with AsyncSessionLocal() as db:
+        article_ids = (await db.scalars(select(ArticleHead.article_id))).all()
+        service = ArticleHeadService(db)
+        done = 0
+        for i in range(0, len(article_ids), BATCH_SIZE):
+            for article_id in article_ids[i:i + BATCH_SIZE]:
+                done += int(await service.rebuild_sections(article_id))
+            await db.commit()
+            print(f"Разделы построены: {done}/{len(article_ids)}")
+
+
+if __name__ == "__main__":
+    asyncio.run(rebuild_sections())
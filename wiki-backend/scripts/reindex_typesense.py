@@ -0,0 +1,250 @@
+"""
+Полная переиндексация статей в Typesense без простоя поиска.
+
+    PYTHONPATH=. python scripts/reindex_typesense.py --concurrency 4 --processes 4
+    PYTHONPATH=. python scripts/reindex_typesense.py --resume
+
+Головы статей читаются потоком (серверный курсор, порядок по article_id) и пишутся
+в новую коллекцию <алиас>_<время>, пока поиск продолжает работать по старой.
+Язык, которого нет в article_heads (или всех статей с --detect-language), определяется
+в пуле процессов; отсутствующий полный текст пересобирается через CommitService.
+Одновременно идут до --concurrency запросов import_, каждый - JSONL не больше --chunk-bytes;
+с TYPESENSE_EMBEDDING_SOURCE=local эмбеддинги пачки считает сервис моделей до import_.
+
+С --mode passage (TYPESENSE_INDEX_MODE) строится коллекция фрагментов article_passages.
+
+После последней пачки алиас переключается на новую коллекцию, а статьи, изменённые
+за время построения, ставятся в очередь синхронизации (воркер всё это время писал
+в старую коллекцию). Прогресс сохраняется в --checkpoint: --resume
+продолжает ту же коллекцию после последней статьи, все пачки до которой импортированы.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Set
+from uuid import UUID
+
+import typesense.exceptions
+from sqlalchemy import func, select
+from typesense import AsyncClient
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.enums import TypesenseIndexMode
+from app.core.typesense_client import index_collection, index_schema, typesense_client
+from app.models.article_head import ArticleHead
+from app.services.commit_service import CommitService
+from app.services.search_services.reindex import HEADS_QUERY, requeue_changed_since
+from app.services.search_services.search_cache import SearchCache
+from app.services.typesense_sync_worker import attach_embeddings, attach_facets, index_documents, jsonl_chunks
+from app.utils.language import SAMPLE_CHARS, detect_language
+
+logger = logging.getLogger("reindex_typesense")
+
+CHECKPOINT_PATH = "reindex_typesense.checkpoint.json"
+IMPORT_ATTEMPTS = 3
+
+def detect_languages(samples: List[str]) -> List[str]:
+    """Выполняется в процессе пула: langdetect держит GIL, в потоках не масштабируется"""
+    return [detect_language(sample) for sample in samples]
+
+
+def load_checkpoint(path: str) -> Optional[dict]:
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_checkpoint(path: str, checkpoint: dict):
+    # Запись через временный файл: прерывание не оставит полузаписанный JSON
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp_path, path)
+
+
+class Reindexer:
+    def __init__(self, client: AsyncClient, args, checkpoint: dict, pool: ProcessPoolExecutor):
+        self.client = client
+        self.args = args
+        self.checkpoint = checkpoint
+        self.pool = pool
+        self.collection = checkpoint["collection"]
+        self.slots = asyncio.Semaphore(args.concurrency)
+        self.tasks: Set[asyncio.Task] = set()
+        # Номер пачки -> последняя статья в ней; checkpoint двигается только по непрерывному префиксу
+        self.batch_last_id: Dict[int, str] = {}
+        self.finished: Set[int] = set()
+        self.next_to_save = 0
+        self.failed_documents = 0
+
+    async def run(self):
+        started = time.perf_counter()
+        stmt = HEADS_QUERY.execution_options(yield_per=self.args.batch_size)
+        if self.checkpoint.get("last_article_id"):
+            stmt = stmt.where(ArticleHead.article_id > UUID(self.checkpoint["last_article_id"]))
+
+        async with AsyncSessionLocal() as db:
+            total = await db.scalar(select(func.count()).select_from(ArticleHead))
+            result = await db.stream(stmt)
+            batch_number = 0
+            async for rows in result.partitions():
+                documents = await self._build_documents(rows)
+                # Не больше --concurrency импортов в полёте: чтение курсора ждёт свободный слот
+                await self.slots.acquire()
+                self.batch_last_id[batch_number] = str(rows[-1].article_id)
+                self.tasks.add(asyncio.create_task(self._import_batch(batch_number, documents, len(rows))))
+                batch_number += 1
+                # Ошибка импорта останавливает чтение; checkpoint остаётся на последней целой пачке
+                for done in [t for t in self.tasks if t.done()]:
+                    self.tasks.discard(done)
+                    done.result()
+            await asyncio.gather(*self.tasks)
+
+        elapsed = time.perf_counter() - started
+        logger.info(f"Indexed {self.checkpoint['indexed']}/{total} articles into '{self.collection}' "
+                    f"in {elapsed:.1f}s, rejected documents: {self.failed_documents}")
+
+    async def _build_documents(self, rows) -> List[dict]:
+        contents = {row.article_id: row.text for row in rows}
+        missing = [row for row in rows if not row.text]
+        if missing:
+            # Отдельная сессия: основная занята серверным курсором
+            async with AsyncSessionLocal() as db:
+                for row in missing:
+                    contents[row.article_id] = await CommitService(db).rebuild_content_at_commit(row.head_commit_id)
+
+        rows = [row for row in rows if contents[row.article_id]]
+        languages = {row.article_id: row.language for row in rows}
+        to_detect = [row for row in rows if self.args.detect_language or not row.language]
+        if to_detect:
+            detected = await asyncio.get_running_loop().run_in_executor(
+                self.pool, detect_languages, [contents[row.article_id][:SAMPLE_CHARS] for row in to_detect]
+            )
+            languages.update(zip([row.article_id for row in to_detect], detected))
+
+        documents = [
+            document
+            for row in rows
+            for document in index_documents(row, contents[row.article_id], languages[row.article_id], self.args.mode)
+        ]
+        async with AsyncSessionLocal() as db:
+            await attach_facets(db, documents)
+        return documents
+
+    async def _import_batch(self, batch_number: int, documents: List[dict], articles: int):
+        try:
+            # Эмбеддинги (TYPESENSE_EMBEDDING_SOURCE=local) считаются здесь, параллельно с чтением следующих пачек
+            await attach_embeddings(documents)
+            documents_collection = self.client.collections[self.collection].documents
+            for count, chunk in jsonl_chunks(documents, self.args.chunk_bytes):
+                for attempt in range(1, IMPORT_ATTEMPTS + 1):
+                    try:
+                        response = await documents_collection.import_(chunk, {'action': 'upsert'})
+                        break
+                    except Exception as e:
+                        if attempt == IMPORT_ATTEMPTS:
+                            raise
+                        logger.warning(f"Import of {count} documents failed (attempt {attempt}): {e}")
+                        await asyncio.sleep(2 ** attempt)
+                failed = [line for line in response.splitlines() if line and not json.loads(line).get('success')]
+                if failed:
+                    self.failed_documents += len(failed)
+                    logger.error(f"Typesense rejected {len(failed)} of {count} documents, first: {failed[0]}")
+            self.checkpoint["indexed"] += articles
+            self._finish(batch_number)
+        finally:
+            self.slots.release()
+
+    def _finish(self, batch_number: int):
+        self.finished.add(batch_number)
+        advanced = False
+        while self.next_to_save in self.finished:
+            self.finished.discard(self.next_to_save)
+            self.checkpoint["last_article_id"] = self.batch_last_id.pop(self.next_to_save)
+            self.next_to_save += 1
+            advanced = True
+        if advanced:
+            save_checkpoint(self.args.checkpoint, self.checkpoint)
+            logger.info(f"Indexed {self.checkpoint['indexed']} articles, last {self.checkpoint['last_article_id']}")
+
+
+async def swap_alias(client: AsyncClient, alias: str, collection: str, keep_old: bool):
+    old_collection = None
+    try:
+        old_collection = (await client.aliases[alias].retrieve())["collection_name"]
+    except typesense.exceptions.ObjectNotFound:
+        try:
+            await client.collections[alias].retrieve()
+            # Первый переход на алиас: обычная коллекция с этим именем удаляется, пока алиас
+            # не создан, поиск недоступен (один раз, дальше переключение атомарное)
+            logger.warning(f"Replacing collection '{alias}' with an alias")
+            await client.collections[alias].delete()
+        except typesense.exceptions.ObjectNotFound:
+            pass
+
+    await client.aliases.upsert(alias, {"collection_name": collection})
+    logger.info(f"Alias '{alias}' -> '{collection}' (was {old_collection})")
+    if old_collection and old_collection != collection and not keep_old:
+        await client.collections[old_collection].delete()
+        logger.info(f"Collection '{old_collection}' deleted")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=500, help="Статей за одно чтение курсора")
+    parser.add_argument("--concurrency", type=int, default=4, help="Одновременных запросов import_")
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1,
+                        help="Процессов для определения языка")
+    parser.add_argument("--chunk-bytes", type=int, default=settings.SEARCH_SYNC_IMPORT_CHUNK_BYTES)
+    parser.add_argument("--detect-language", action="store_true",
+                        help="Определить язык заново для всех статей, а не только для тех, где его нет")
+    parser.add_argument("--mode", type=TypesenseIndexMode, default=settings.TYPESENSE_INDEX_MODE,
+                        help="article - документ на статью, passage - документ на фрагмент (TYPESENSE_INDEX_MODE)")
+    parser.add_argument("--checkpoint", default=CHECKPOINT_PATH)
+    parser.add_argument("--resume", action="store_true", help="Продолжить построение из --checkpoint")
+    parser.add_argument("--no-swap", action="store_true", help="Только построить коллекцию, алиас не трогать")
+    parser.add_argument("--keep-old", action="store_true", help="Не удалять прежнюю коллекцию после переключения")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    await typesense_client.initialize()
+    client = typesense_client.get_client()
+    try:
+        checkpoint = load_checkpoint(args.checkpoint) if args.resume else None
+        if checkpoint is None:
+            checkpoint = {
+                "mode": args.mode.value,
+                "collection": f"{index_collection(args.mode)}_{int(time.time())}",
+                "started_at": time.time(),
+                "last_article_id": None,
+                "indexed": 0,
+            }
+            await client.collections.create(index_schema(checkpoint["collection"], args.mode))
+            save_checkpoint(args.checkpoint, checkpoint)
+            logger.info(f"Building collection '{checkpoint['collection']}'")
+        else:
+            args.mode = TypesenseIndexMode(checkpoint["mode"])
+            logger.info(f"Resuming '{checkpoint['collection']}' after {checkpoint['last_article_id']}")
+
+        with ProcessPoolExecutor(max_workers=max(args.processes, 1)) as pool:
+            await Reindexer(client, args, checkpoint, pool).run()
+
+        if args.no_swap:
+            return
+        await swap_alias(client, index_collection(args.mode), checkpoint["collection"], args.keep_old)
+        requeued = await requeue_changed_since(checkpoint["started_at"])
+        logger.info(f"Articles changed during the rebuild queued for sync: {requeued}")
+        await SearchCache.bump_version()
+        os.remove(args.checkpoint)
+    finally:
+        await typesense_client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
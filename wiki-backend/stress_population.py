@@ -163,8 +163,8 @@ def create_users(session):
             user_id = uuid.uuid4()
             session.execute(
                 text("""
-                    INSERT INTO users (id, username, email, password_hash, role, created_at, last_login)
-                    VALUES (:id, :username, :email, :password_hash, :role, :created_at, :last_login)
+                    INSERT INTO users (id, username, email, password_hash, role, created_at, last_login, is_active)
+                    VALUES (:id, :username, :email, :password_hash, :role, :created_at, :last_login, true)
                 """),
                 {
                     'id': user_id,